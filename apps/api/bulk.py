@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+import uuid
+import zipfile
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path, PurePosixPath
+from threading import Condition, Lock
+from typing import Any, Callable, Dict, Iterator, List
+
+from apps.api.config import settings
+from apps.api.job_registry import JobStatus, job_registry
+from core.ingestion.page_cache import PageCache
+from core.ingestion.pdf_loader import extract_page_pairs
+from core.registry.filelock import file_lock
+from core.resilience.ratelimit import RateLimiter
+
+# Global ingest budget: every ingest job (single upload, bulk, resumed) runs on
+# this pool, and every ingest embedding call draws from the same rate limiter.
+_pool_lock = Lock()
+_ingest_pool: ThreadPoolExecutor | None = None
+_extract_pool: ProcessPoolExecutor | None = None
+
+embed_rate_limiter = RateLimiter(settings.ingest_embed_rps)
+
+page_cache = PageCache(settings.processed_dir / "pages")
+
+
+class IngestAdmission:
+    """
+    In-flight memory budget of this process's ingest jobs.
+
+    A running job holds its PDF bytes while extracting, then its page text
+    and chunks while embedding, so jobs are admitted in two steps: against a
+    byte budget before the raw PDF is read, then against a page budget once
+    its pages are extracted (releasing its bytes). A job that does not fit
+    waits (status "queued") until running jobs release enough; one that alone
+    exceeds a budget runs once nothing else holds it. Uploads are rejected
+    with 429 while `max_queued` jobs are already waiting.
+    """
+
+    def __init__(self, max_bytes: int, max_pages: int, max_queued: int) -> None:
+        self.limits = {"bytes": max_bytes, "pages": max_pages}
+        self.max_queued = max_queued
+        self.inflight = {"bytes": 0, "pages": 0}
+        self.waiting = 0  # submitted, not admitted yet
+        self.running = 0
+        self._job_s = 30.0  # moving average of job duration, for Retry-After
+        self._cond = Condition()
+
+    def _fits(self, kind: str, n: int) -> bool:
+        limit, held = self.limits[kind], self.inflight[kind]
+        return limit <= 0 or held == 0 or held + n <= limit
+
+    def _reserve(self, kind: str, n: int, job_id: str) -> None:
+        with self._cond:
+            if self._fits(kind, n):
+                self.inflight[kind] += n
+                return
+        job_registry.update(
+            job_id, status=JobStatus.QUEUED, message="Waiting for ingest capacity."
+        )
+        with self._cond:
+            self._cond.wait_for(lambda: self._fits(kind, n))
+            self.inflight[kind] += n
+        job_registry.update(job_id, status=JobStatus.PROCESSING, message=None)
+
+    def _release(self, kind: str, n: int) -> None:
+        with self._cond:
+            self.inflight[kind] -= n
+            self._cond.notify_all()
+
+    def enqueue(self) -> None:
+        with self._cond:
+            self.waiting += 1
+
+    def full(self) -> bool:
+        with self._cond:
+            return self.max_queued > 0 and self.waiting >= self.max_queued
+
+    def retry_after(self) -> int:
+        """Seconds until the queue has likely drained by one slot."""
+        with self._cond:
+            per_slot = self._job_s / max(1, settings.ingest_concurrency)
+            return max(1, min(300, round(per_slot * max(1, self.waiting))))
+
+    @contextmanager
+    def admit(self, job_id: str, nbytes: int):
+        """Hold `nbytes` for the job; yields a function that swaps the byte
+        reservation for a page reservation once the page count is known."""
+        try:
+            self._reserve("bytes", nbytes, job_id)
+        finally:
+            with self._cond:
+                self.waiting -= 1
+        held = {"bytes": nbytes, "pages": 0}
+
+        def use_pages(pages: int) -> None:
+            self._reserve("pages", pages, job_id)
+            held["pages"] = pages
+            self._release("bytes", held["bytes"])
+            held["bytes"] = 0
+
+        with self._cond:
+            self.running += 1
+        t0 = time.monotonic()
+        try:
+            yield use_pages
+        finally:
+            for kind, n in held.items():
+                self._release(kind, n)
+            with self._cond:
+                self.running -= 1
+                self._job_s = 0.8 * self._job_s + 0.2 * (time.monotonic() - t0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "waiting": self.waiting,
+                "running": self.running,
+                "inflight_bytes": self.inflight["bytes"],
+                "inflight_pages": self.inflight["pages"],
+                "max_bytes": self.limits["bytes"],
+                "max_pages": self.limits["pages"],
+                "max_queued": self.max_queued,
+            }
+
+
+admission = IngestAdmission(
+    settings.ingest_inflight_mb * 1024 * 1024,
+    settings.ingest_inflight_pages,
+    settings.ingest_max_queued,
+)
+
+
+def submit_ingest(fn: Callable[..., None], *args: Any) -> Future:
+    """Queue an ingest job; the job itself waits for `admission`."""
+    global _ingest_pool
+    admission.enqueue()
+    with _pool_lock:
+        if _ingest_pool is None:
+            _ingest_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.ingest_concurrency),
+                thread_name_prefix="ingest",
+            )
+    return _ingest_pool.submit(fn, *args)
+
+
+def extract_pairs(data: bytes) -> List[tuple[int, str]]:
+    """PDF -> (page, text) pairs, in a worker process when EXTRACT_WORKERS > 0.
+
+    pypdf is pure Python and holds the GIL, so extraction only runs in
+    parallel across documents when it is moved out of the ingest threads.
+    """
+    global _extract_pool
+    if settings.extract_workers <= 0:
+        return extract_page_pairs(data)
+    with _pool_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=settings.extract_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _extract_pool.submit(extract_page_pairs, data).result()
+
+
+def load_page_pairs(
+    doc_id: str, data: bytes, file_hash: str | None = None
+) -> List[tuple[int, str]]:
+    """Page text of `data` from the page cache, extracted and cached on a miss."""
+    file_hash = file_hash or hashlib.sha256(data).hexdigest()
+    pairs = page_cache.load(doc_id, file_hash)
+    if pairs is None:
+        pairs = extract_pairs(data)
+        page_cache.save(doc_id, file_hash, pairs)
+    return pairs
+
+
+def iter_zip_pdfs(
+    data: bytes,
+    max_member_bytes: int,
+    max_total_bytes: int,
+    on_skip: Callable[[str, str], None],
+) -> Iterator[tuple[str, Callable[[], bytes]]]:
+    """(filename, read) for every PDF inside a zip archive.
+
+    Nothing is decompressed up front: `read()` inflates one member, so a
+    caller holds a single member at a time. Limits are checked against the
+    declared uncompressed sizes (zipfile never inflates past them): a member
+    over `max_member_bytes`, and every member once the archive's total passes
+    `max_total_bytes`, is passed to `on_skip` instead.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        total = 0
+        for info in zf.infolist():
+            name = PurePosixPath(info.filename)
+            if info.is_dir() or name.name.startswith("."):
+                continue
+            if name.suffix.lower() != ".pdf":
+                continue
+            if info.file_size > max_member_bytes:
+                on_skip(name.name, f"larger than {max_member_bytes >> 20} MB")
+                continue
+            total += info.file_size
+            if total > max_total_bytes:
+                on_skip(
+                    name.name,
+                    f"zip expands to more than {max_total_bytes >> 20} MB",
+                )
+                continue
+            yield name.name, lambda info=info: zf.read(info)
+
+
+@dataclass
+class BatchJob:
+    batch_id: str
+    job_ids: List[str] = field(default_factory=list)
+    skipped: List[Dict[str, Any]] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+
+class BatchRegistry:
+    """Grouping of per-document jobs (the jobs themselves live in the job
+    registry). With a `path`, batches are also written to a JSON file so any
+    API worker process can report on them."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        self._batches: dict[str, BatchJob] = {}
+        self._lock = Lock()
+        self.path = path
+
+    def _load(self) -> dict[str, BatchJob]:
+        if self.path is None or not self.path.exists():
+            return {}
+        return {
+            d["batch_id"]: BatchJob(**d)
+            for d in json.loads(self.path.read_text() or "[]")
+        }
+
+    def _save(self, batch: BatchJob) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.path.with_suffix(".lock")):
+            batches = self._load()
+            batches[batch.batch_id] = batch
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps([asdict(b) for b in batches.values()]))
+            os.replace(tmp, self.path)
+
+    def create(self, job_ids: List[str], skipped: List[Dict[str, Any]]) -> BatchJob:
+        batch = BatchJob(
+            batch_id=f"batch_{uuid.uuid4().hex[:8]}",
+            job_ids=list(job_ids),
+            skipped=list(skipped),
+        )
+        with self._lock:
+            self._batches[batch.batch_id] = batch
+            self._save(batch)
+        return batch
+
+    def get(self, batch_id: str) -> BatchJob | None:
+        with self._lock:
+            if batch_id not in self._batches:
+                batch = self._load().get(batch_id)
+                if batch is not None:
+                    self._batches[batch_id] = batch
+            return self._batches.get(batch_id)
+
+    def progress(self, batch: BatchJob) -> Dict[str, Any]:
+        """Aggregate progress + throughput over all documents of the batch."""
+        jobs = [j for j in (job_registry.get(i) for i in batch.job_ids) if j]
+        counts = {s.value: 0 for s in JobStatus}
+        for j in jobs:
+            counts[j.status.value] += 1
+        indexed = sum(j.indexed_chunks for j in jobs)
+        total = sum(j.total_chunks for j in jobs)
+        pages = sum(j.pages for j in jobs)
+
+        finished = counts["done"] + counts["error"] == len(jobs)
+        if finished and batch.finished_at is None:
+            batch.finished_at = time.time()
+        elapsed = max(1e-6, (batch.finished_at or time.time()) - batch.started_at)
+
+        # per-document fraction; chunk totals are only known after extraction
+        fractions = [
+            1.0
+            if j.status in (JobStatus.DONE, JobStatus.ERROR)
+            else (j.indexed_chunks / j.total_chunks if j.total_chunks else 0.0)
+            for j in jobs
+        ]
+
+        return {
+            "batch_id": batch.batch_id,
+            "status": "done" if finished else "processing",
+            "documents": {"total": len(jobs), **counts},
+            "skipped": batch.skipped,
+            "pages": pages,
+            "indexed_chunks": indexed,
+            "total_chunks": total,
+            "progress": int(100 * sum(fractions) / len(fractions)) if jobs else 100,
+            "elapsed_s": round(elapsed, 2),
+            "throughput": {
+                "docs_per_min": round(60 * counts["done"] / elapsed, 2),
+                "chunks_per_s": round(indexed / elapsed, 2),
+                "pages_per_s": round(pages / elapsed, 2),
+            },
+            "errors": [
+                {"doc_id": j.doc_id, "job_id": j.job_id, "error": j.error}
+                for j in jobs
+                if j.status == JobStatus.ERROR
+            ],
+        }
+
+
+batch_registry = BatchRegistry(settings.processed_dir / "batches.json")
@@ -0,0 +1,163 @@
+"""
+Local maintenance CLI (runs in-process, no API server needed).
+
+    python -m apps.api.cli ingest-dir path/to/guidelines --recursive --category who
+    python -m apps.api.cli reindex --all --chunk-size 1200 --overlap 200
+    python -m apps.api.cli serve-retrieval --socket data/processed/retrieval.sock
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+
+def cmd_ingest_dir(args: argparse.Namespace) -> int:
+    from apps.api.bulk import batch_registry
+    from apps.api.routers.ingest import BulkIntake
+
+    root = Path(args.directory)
+    if not root.is_dir():
+        print(f"Not a directory: {root}", file=sys.stderr)
+        return 2
+
+    pattern = "**/*.pdf" if args.recursive else "*.pdf"
+    intake = BulkIntake(source=args.source, category=args.category)
+    for path in sorted(root.glob(pattern)):
+        intake.add(path.name, path.read_bytes())
+    batch = intake.finish()
+    print(
+        f"{batch.batch_id}: {len(intake.accepted)} queued, "
+        f"{len(intake.skipped)} skipped"
+    )
+
+    while True:
+        p = batch_registry.progress(batch)
+        docs = p["documents"]
+        print(
+            f"[{p['progress']:3d}%] docs {docs['done']}/{docs['total']} "
+            f"(errors {docs['error']}) chunks {p['indexed_chunks']}/"
+            f"{p['total_chunks']} | {p['throughput']['chunks_per_s']} chunks/s",
+            flush=True,
+        )
+        if p["status"] == "done":
+            break
+        time.sleep(args.poll)
+
+    print(json.dumps(p, indent=2))
+    return 1 if docs["error"] else 0
+
+
+def cmd_reindex(args: argparse.Namespace) -> int:
+    from apps.api.routers.ingest import registry, reindex_document
+
+    doc_ids = [d.doc_id for d in registry.all()] if args.all else args.doc_ids
+    if not doc_ids:
+        print("Nothing to reindex: pass doc ids or --all.", file=sys.stderr)
+        return 2
+
+    failed = 0
+    for doc_id in doc_ids:
+        t0 = time.perf_counter()
+        try:
+            stats = reindex_document(
+                doc_id,
+                chunk_size=args.chunk_size,
+                overlap=args.overlap,
+                reembed=args.reembed,
+                chunker=args.chunker,
+            )
+        except KeyError:
+            print(f"{doc_id}: not registered", file=sys.stderr)
+            failed += 1
+            continue
+        except Exception as e:
+            print(f"{doc_id}: failed: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        stats["seconds"] = round(time.perf_counter() - t0, 2)
+        print(json.dumps(stats), flush=True)
+    return 1 if failed else 0
+
+
+def cmd_serve_retrieval(args: argparse.Namespace) -> int:
+    from apps.api.config import settings
+    from apps.api.warmup import warm_index
+    from core.retrieval.service import serve
+    from core.retrieval.sharding import open_store
+
+    socket_path = args.socket or settings.retrieval_socket
+    if not socket_path:
+        socket_path = str(settings.processed_dir / "retrieval.sock")
+    store = open_store(None, local=True)
+    print(json.dumps(warm_index(store), indent=2))
+    print(f"Retrieval service listening on {socket_path}", flush=True)
+    try:
+        serve(socket_path, store)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m apps.api.cli")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest-dir", help="Bulk-ingest every PDF in a directory.")
+    p.add_argument("directory")
+    p.add_argument("--recursive", action="store_true")
+    p.add_argument("--source", default=None)
+    p.add_argument("--category", default=None)
+    p.add_argument("--poll", type=float, default=2.0, help="Progress interval (s).")
+    p.set_defaults(func=cmd_ingest_dir)
+
+    p = sub.add_parser(
+        "reindex",
+        help="Re-chunk and re-index documents from the cached page text.",
+    )
+    p.add_argument("doc_ids", nargs="*")
+    p.add_argument("--all", action="store_true", help="Every registered document.")
+    p.add_argument(
+        "--chunker",
+        choices=["chars", "structure"],
+        default=None,
+        help="Default: CHUNKER.",
+    )
+    p.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Default: CHUNK_SIZE (chars) or CHUNK_TOKENS (structure).",
+    )
+    p.add_argument(
+        "--overlap",
+        type=int,
+        default=None,
+        help="Default: CHUNK_OVERLAP (chars) or CHUNK_OVERLAP_TOKENS (structure).",
+    )
+    p.add_argument(
+        "--reembed",
+        action="store_true",
+        help="Embed every chunk again (e.g. after changing OPENAI_EMBED_MODEL).",
+    )
+    p.set_defaults(func=cmd_reindex)
+
+    p = sub.add_parser(
+        "serve-retrieval",
+        help="Own the vector index and serve it to API workers over a Unix socket.",
+    )
+    p.add_argument("--socket", default=None, help="Default: RETRIEVAL_SOCKET.")
+    p.set_defaults(func=cmd_serve_retrieval)
+
+    args = ap.parse_args(argv)
+    from apps.api.config import settings
+
+    settings.ensure_dirs()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -16,6 +16,13 @@ def _get_env(name: str, default: str | None = None) -> str:
     return val
 
 
+def _env_bool(name: str, default: bool = False) -> bool:
+    val = os.getenv(name)
+    if val is None or val.strip() == "":
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+
 @dataclass(frozen=True)
 class Settings:
     app_name: str
@@ -28,12 +35,107 @@ class Settings:
     openai_api_key: str | None
     openai_chat_model: str
     openai_embed_model: str
+    # OpenAI-compatible endpoint, e.g. eval/fake_openai.py for offline runs
+    openai_base_url: str | None
 
     data_dir: Path
     raw_dir: Path
     processed_dir: Path
 
     max_upload_mb: int
+    max_zip_uncompressed_mb: int  # total PDF bytes one uploaded zip may expand to
+
+    # latency budget + hedging for upstream (embedding/chat) calls
+    request_timeout_s: float
+    hedging_enabled: bool
+    hedge_max_rate: float
+    hedge_min_samples: int
+
+    # rebuild the vector index once this share of entries are deletions
+    compaction_threshold: float
+    compaction_min_deleted: int
+
+    # global ingest budget shared by single, bulk and resumed jobs
+    ingest_concurrency: int
+    ingest_embed_rps: float
+    extract_workers: int
+    # in-flight memory budget of this process's ingest jobs (0 = unlimited);
+    # uploads get 429 once ingest_max_queued jobs wait for it
+    ingest_inflight_mb: int
+    ingest_inflight_pages: int
+    ingest_max_queued: int
+    # index a long PDF's first pages and table of contents first, so it is
+    # searchable ("partially_indexed") before its ingest finishes (0 = off)
+    ingest_priority_pages: int
+    # finished (done/failed) ingest jobs kept in jobs.json, newest first
+    jobs_keep_finished: int
+
+    # chunking of extracted page text (`cli reindex` re-chunks existing docs):
+    # "chars" = chunk_size/chunk_overlap character windows per page,
+    # "structure" = whole sentences up to chunk_tokens, across page breaks
+    chunker: str
+    chunk_size: int
+    chunk_overlap: int
+    chunk_tokens: int
+    chunk_overlap_tokens: int
+    # drop lines repeated on >= this share of a document's pages (running
+    # headers, footers, page numbers) before chunking
+    strip_boilerplate: bool
+    boilerplate_min_fraction: float
+    # collapse near-duplicate chunks of a document (MinHash estimated Jaccard)
+    dedup_chunks: bool
+    dedup_threshold: float
+
+    # parallel chat completions per /ask/batch request
+    ask_batch_concurrency: int
+
+    # adaptive concurrency limit of /ask* and /summarize (load shedding);
+    # admitted requests run in the 40-thread worker pool, hence the max
+    query_limiter_enabled: bool
+    query_concurrency: int
+    query_concurrency_max: int
+    query_queue_wait_ms: int
+
+    # /retrieve result cache (keyed by query + index version)
+    retrieve_cache_ttl_s: float
+    retrieve_cache_size: int
+
+    # unfiltered searches first pick this many documents by their profile
+    # vector, then search only their chunks (0 = flat search over all chunks)
+    doc_candidates: int
+
+    # blue/green re-embedding (POST /index/migrate): embedding calls per second
+    migration_embed_rps: float
+
+    # gzip responses of at least this many bytes for clients that accept it
+    # (0 disables; token streams are never compressed)
+    gzip_min_bytes: int
+
+    # HNSW index of newly created collections (and compaction rebuilds);
+    # ef_search is also applied to the existing active collection on open
+    hnsw_space: str
+    hnsw_m: int
+    hnsw_ef_construction: int
+    hnsw_ef_search: int
+
+    # split the index into several collections (none | hash | category | size)
+    shard_strategy: str
+    vector_shards: int
+    shard_fanout_workers: int
+
+    # talk to a separate retrieval service over this Unix socket ("" = in-process)
+    retrieval_socket: str
+    retrieval_pool_size: int
+    # per-call timeout of compaction / migration calls to the service
+    retrieval_maintenance_timeout_s: float
+
+    # warm imports, index and upstream connections before reporting ready
+    eager_warmup: bool
+
+    def ensure_dirs(self) -> None:
+        """Create the data directories (called at startup, not import time)."""
+        for d in (self.raw_dir, self.processed_dir, self.processed_dir / "chroma"):
+            d.mkdir(parents=True, exist_ok=True)
 
     @staticmethod
     def load() -> "Settings":
@@ -48,18 +150,95 @@ class Settings:
         openai_api_key = os.getenv("OPENAI_API_KEY")
         openai_chat_model = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
         openai_embed_model = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small")
+        openai_base_url = os.getenv("OPENAI_BASE_URL") or None
 
         data_dir = Path(os.getenv("DATA_DIR", "data")).resolve()
         raw_dir = data_dir / "raw"
         processed_dir = data_dir / "processed"
 
         max_upload_mb = int(os.getenv("MAX_UPLOAD_MB", "30"))
+        max_zip_uncompressed_mb = int(os.getenv("MAX_ZIP_UNCOMPRESSED_MB", "1024"))
+
+        request_timeout_s = float(os.getenv("REQUEST_TIMEOUT_S", "30"))
+        hedging_enabled = _env_bool("HEDGING_ENABLED", False)
+        hedge_max_rate = float(os.getenv("HEDGE_MAX_RATE", "0.1"))
+        hedge_min_samples = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+        compaction_threshold = float(os.getenv("COMPACTION_THRESHOLD", "0.2"))
+        compaction_min_deleted = int(os.getenv("COMPACTION_MIN_DELETED", "1000"))
+
+        ingest_concurrency = int(os.getenv("INGEST_CONCURRENCY", "4"))
+        ingest_embed_rps = float(os.getenv("INGEST_EMBED_RPS", "8"))
+        extract_workers = int(os.getenv("EXTRACT_WORKERS", "0"))
+        ingest_inflight_mb = int(os.getenv("INGEST_INFLIGHT_MB", "256"))
+        ingest_inflight_pages = int(os.getenv("INGEST_INFLIGHT_PAGES", "5000"))
+        ingest_max_queued = int(os.getenv("INGEST_MAX_QUEUED", "100"))
+        ingest_priority_pages = int(os.getenv("INGEST_PRIORITY_PAGES", "10"))
+        if ingest_priority_pages < 0:
+            raise ValueError("INGEST_PRIORITY_PAGES must be >= 0")
+        jobs_keep_finished = int(os.getenv("JOBS_KEEP_FINISHED", "500"))
+        if jobs_keep_finished < 0:
+            raise ValueError("JOBS_KEEP_FINISHED must be >= 0")
+        chunk_size = int(os.getenv("CHUNK_SIZE", "900"))
+        chunk_overlap = int(os.getenv("CHUNK_OVERLAP", "150"))
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("CHUNK_OVERLAP must be >= 0 and smaller than CHUNK_SIZE")
+        chunker = os.getenv("CHUNKER", "chars").strip().lower()
+        if chunker not in ("chars", "structure"):
+            raise ValueError(f"CHUNKER must be chars or structure (got {chunker})")
+        chunk_tokens = int(os.getenv("CHUNK_TOKENS", "256"))
+        chunk_overlap_tokens = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+        if not 0 <= chunk_overlap_tokens < chunk_tokens:
+            raise ValueError(
+                "CHUNK_OVERLAP_TOKENS must be >= 0 and smaller than CHUNK_TOKENS"
+            )
+        strip_boilerplate = _env_bool("STRIP_BOILERPLATE", True)
+        boilerplate_min_fraction = float(os.getenv("BOILERPLATE_MIN_FRACTION", "0.4"))
+        if not 0.0 < boilerplate_min_fraction <= 1.0:
+            raise ValueError("BOILERPLATE_MIN_FRACTION must be in (0, 1]")
+        dedup_chunks = _env_bool("DEDUP_CHUNKS", True)
+        dedup_threshold = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+        if not 0.0 < dedup_threshold <= 1.0:
+            raise ValueError("DEDUP_THRESHOLD must be in (0, 1]")
+
+        ask_batch_concurrency = int(os.getenv("ASK_BATCH_CONCURRENCY", "8"))
+        query_limiter_enabled = _env_bool("QUERY_LIMITER_ENABLED", True)
+        query_concurrency = int(os.getenv("QUERY_CONCURRENCY", "16"))
+        query_concurrency_max = int(os.getenv("QUERY_CONCURRENCY_MAX", "40"))
+        query_queue_wait_ms = int(os.getenv("QUERY_QUEUE_WAIT_MS", "2000"))
+
+        retrieve_cache_ttl_s = float(os.getenv("RETRIEVE_CACHE_TTL_S", "60"))
+        retrieve_cache_size = int(os.getenv("RETRIEVE_CACHE_SIZE", "1024"))
+        doc_candidates = int(os.getenv("DOC_CANDIDATES", "0"))
+        if doc_candidates < 0:
+            raise ValueError("DOC_CANDIDATES must be >= 0")
+        migration_embed_rps = float(os.getenv("MIGRATION_EMBED_RPS", "2"))
+        gzip_min_bytes = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+
+        shard_strategy = os.getenv("SHARD_STRATEGY", "none").strip().lower()
+        if shard_strategy not in ("none", "hash", "category", "size"):
+            raise ValueError(
+                f"SHARD_STRATEGY must be none, hash, category or size (got {shard_strategy})"
+            )
+        vector_shards = int(os.getenv("VECTOR_SHARDS", "8"))
+        shard_fanout_workers = int(os.getenv("SHARD_FANOUT_WORKERS", "8"))
+
+        retrieval_socket = os.getenv("RETRIEVAL_SOCKET", "").strip()
+        retrieval_pool_size = int(os.getenv("RETRIEVAL_POOL_SIZE", "8"))
+        retrieval_maintenance_timeout_s = float(
+            os.getenv("RETRIEVAL_MAINTENANCE_TIMEOUT_S", "3600")
+        )
+        if retrieval_maintenance_timeout_s <= 0:
+            raise ValueError("RETRIEVAL_MAINTENANCE_TIMEOUT_S must be > 0")
+
+        eager_warmup = _env_bool("EAGER_WARMUP", True)
 
-        # Make dirs
-        raw_dir.mkdir(parents=True, exist_ok=True)
-        processed_dir.mkdir(parents=True, exist_ok=True)
-        chroma_dir = processed_dir / "chroma"
-        chroma_dir.mkdir(parents=True, exist_ok=True)
+        hnsw_space = os.getenv("HNSW_SPACE", "l2").strip().lower()
+        if hnsw_space not in ("l2", "cosine", "ip"):
+            raise ValueError(f"HNSW_SPACE must be l2, cosine or ip (got {hnsw_space})")
+        hnsw_m = int(os.getenv("HNSW_M", "16"))
+        hnsw_ef_construction = int(os.getenv("HNSW_EF_CONSTRUCTION", "100"))
+        hnsw_ef_search = int(os.getenv("HNSW_EF_SEARCH", "100"))
 
         if model_provider == "openai" and (
             openai_api_key is None or openai_api_key.strip() == ""
@@ -67,7 +246,6 @@ class Settings:
             # We allow running without key for Day-1 skeleton (health endpoint),
             # but warn via logs later.
             openai_api_key = None
-        print("DEBUG OPENAI_API_KEY loaded:", bool(openai_api_key))
         return Settings(
             app_name=app_name,
             app_version=app_version,
@@ -77,10 +255,56 @@ class Settings:
             openai_api_key=openai_api_key,
             openai_chat_model=openai_chat_model,
             openai_embed_model=openai_embed_model,
+            openai_base_url=openai_base_url,
             data_dir=data_dir,
             raw_dir=raw_dir,
             processed_dir=processed_dir,
             max_upload_mb=max_upload_mb,
+            max_zip_uncompressed_mb=max_zip_uncompressed_mb,
+            request_timeout_s=request_timeout_s,
+            hedging_enabled=hedging_enabled,
+            hedge_max_rate=hedge_max_rate,
+            hedge_min_samples=hedge_min_samples,
+            compaction_threshold=compaction_threshold,
+            compaction_min_deleted=compaction_min_deleted,
+            ingest_concurrency=ingest_concurrency,
+            ingest_embed_rps=ingest_embed_rps,
+            extract_workers=extract_workers,
+            ingest_inflight_mb=ingest_inflight_mb,
+            ingest_inflight_pages=ingest_inflight_pages,
+            ingest_max_queued=ingest_max_queued,
+            ingest_priority_pages=ingest_priority_pages,
+            jobs_keep_finished=jobs_keep_finished,
+            chunker=chunker,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            chunk_tokens=chunk_tokens,
+            chunk_overlap_tokens=chunk_overlap_tokens,
+            strip_boilerplate=strip_boilerplate,
+            boilerplate_min_fraction=boilerplate_min_fraction,
+            dedup_chunks=dedup_chunks,
+            dedup_threshold=dedup_threshold,
+            ask_batch_concurrency=ask_batch_concurrency,
+            query_limiter_enabled=query_limiter_enabled,
+            query_concurrency=query_concurrency,
+            query_concurrency_max=query_concurrency_max,
+            query_queue_wait_ms=query_queue_wait_ms,
+            retrieve_cache_ttl_s=retrieve_cache_ttl_s,
+            retrieve_cache_size=retrieve_cache_size,
+            doc_candidates=doc_candidates,
+            migration_embed_rps=migration_embed_rps,
+            gzip_min_bytes=gzip_min_bytes,
+            hnsw_space=hnsw_space,
+            hnsw_m=hnsw_m,
+            hnsw_ef_construction=hnsw_ef_construction,
+            hnsw_ef_search=hnsw_ef_search,
+            shard_strategy=shard_strategy,
+            vector_shards=vector_shards,
+            shard_fanout_workers=shard_fanout_workers,
+            retrieval_socket=retrieval_socket,
+            retrieval_pool_size=retrieval_pool_size,
+            retrieval_maintenance_timeout_s=retrieval_maintenance_timeout_s,
+            eager_warmup=eager_warmup,
         )
 
 
@@ -1,54 +1,222 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field, fields
 from enum import Enum
+from pathlib import Path
 from threading import Lock
 from typing import Optional
 
+from apps.api.config import settings
+from core.registry.filelock import file_lock
+
 
 class JobStatus(str, Enum):
     PENDING = "pending"
+    QUEUED = "queued"  # waiting for the ingest memory budget
     PROCESSING = "processing"
+    # first pages / table of contents searchable, the rest still embedding
+    PARTIAL = "partially_indexed"
     DONE = "done"
     ERROR = "error"
 
 
+_FINISHED = (JobStatus.DONE, JobStatus.ERROR)
+
+
 @dataclass
 class IngestJob:
     job_id: str
     doc_id: str
+    kind: str = "ingest"  # "ingest" | "new_version"
     status: JobStatus = JobStatus.PENDING
     progress: int = 0  # 0-100
     total_chunks: int = 0
     indexed_chunks: int = 0
     pages: int = 0
+    indexed_pages: int = 0  # pages whose chunks are all searchable
     error: Optional[str] = None
     message: Optional[str] = None
+    # per-document ingest stats (e.g. near-duplicate chunks removed)
+    stats: dict = field(default_factory=dict)
+    # kept so an interrupted job can be resumed from data/raw/<doc_id>.pdf
+    title: Optional[str] = None
+    source: Optional[str] = None
+    category: Optional[str] = None
+    file_hash: Optional[str] = None
+
+
+_JOB_FIELDS = {f.name for f in fields(IngestJob)}
 
 
 class JobRegistry:
-    def __init__(self) -> None:
+    """
+    Thread-safe ingest job tracker.
+
+    With a `path`, job state is written to a JSON file so jobs survive a
+    process restart. Without one it is purely in-memory. Status changes are
+    written at once; per-batch progress at most every `save_interval_s`
+    (a resumed job re-plans from the index, so it needs no more than that).
+    Only the newest `keep_finished` done/failed jobs are kept.
+
+    Several API worker processes can share the file: each process only
+    writes the jobs it runs ("owned") and merges them into what is on disk,
+    and jobs run by other workers are re-read from the file on access.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        save_interval_s: float = 1.0,
+        keep_finished: int = 500,
+    ) -> None:
         self._jobs: dict[str, IngestJob] = {}
+        self._owned: set[str] = set()
         self._lock = Lock()
+        self.path = path
+        self.save_interval_s = save_interval_s
+        self.keep_finished = keep_finished
+        self._stamp: tuple[int, int] | None = None
+        self._saved_at = float("-inf")
+        self._refresh()
+
+    def _load(self) -> dict[str, IngestJob]:
+        jobs = {}
+        for d in json.loads(self.path.read_text() or "[]"):
+            d["status"] = JobStatus(d["status"])
+            # fields of older versions (e.g. per-chunk checkpoints) are dropped
+            job = IngestJob(**{k: v for k, v in d.items() if k in _JOB_FIELDS})
+            jobs[job.job_id] = job
+        return jobs
+
+    def _prune(self, jobs: dict[str, IngestJob]) -> None:
+        """Drop all but the newest `keep_finished` finished jobs (in place)."""
+        finished = [i for i, j in jobs.items() if j.status in _FINISHED]
+        for job_id in finished[: max(0, len(finished) - self.keep_finished)]:
+            del jobs[job_id]
+            self._jobs.pop(job_id, None)
+            self._owned.discard(job_id)
 
-    def create(self, job_id: str, doc_id: str) -> IngestJob:
-        job = IngestJob(job_id=job_id, doc_id=doc_id)
+    def _refresh(self) -> None:
+        """Pick up jobs created or advanced by other processes."""
+        if self.path is None:
+            return
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return
+        on_disk = self._load()
+        for job_id in [i for i in self._jobs if i not in on_disk]:
+            if job_id not in self._owned:
+                del self._jobs[job_id]  # pruned by another process
+        for job_id, job in on_disk.items():
+            if job_id not in self._owned:
+                self._jobs[job_id] = job
+        self._stamp = stamp
+
+    def _save(self, throttle: bool = False) -> None:
+        # caller holds self._lock
+        if self.path is None:
+            return
+        now = time.monotonic()
+        if throttle and now - self._saved_at < self.save_interval_s:
+            return  # written with the next save
+        self._saved_at = now
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.path.with_suffix(".lock")):
+            jobs = self._load() if self.path.exists() else {}
+            jobs.update({i: self._jobs[i] for i in self._owned})
+            self._prune(jobs)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps([asdict(j) for j in jobs.values()]))
+            os.replace(tmp, self.path)  # atomic: never leave a half-written file
+            st = self.path.stat()
+        self._jobs.update(jobs)
+        self._stamp = (st.st_mtime_ns, st.st_size)
+
+    def create(
+        self,
+        job_id: str,
+        doc_id: str,
+        title: str | None = None,
+        source: str | None = None,
+        category: str | None = None,
+        kind: str = "ingest",
+        file_hash: str | None = None,
+    ) -> IngestJob:
+        job = IngestJob(
+            job_id=job_id,
+            doc_id=doc_id,
+            kind=kind,
+            title=title,
+            source=source,
+            category=category,
+            file_hash=file_hash,
+        )
         with self._lock:
             self._jobs[job_id] = job
+            self._owned.add(job_id)
+            self._save()
         return job
 
     def get(self, job_id: str) -> IngestJob | None:
-        return self._jobs.get(job_id)
+        with self._lock:
+            self._refresh()
+            return self._jobs.get(job_id)
+
+    def active(self) -> list[IngestJob]:
+        """Unfinished jobs (at startup: the ones a restart interrupted)."""
+        with self._lock:
+            self._refresh()
+            return [
+                j
+                for j in self._jobs.values()
+                if j.status
+                in (
+                    JobStatus.PENDING,
+                    JobStatus.QUEUED,
+                    JobStatus.PROCESSING,
+                    JobStatus.PARTIAL,
+                )
+            ]
+
+    def active_for(self, doc_id: str) -> IngestJob | None:
+        for j in self.active():
+            if j.doc_id == doc_id:
+                return j
+        return None
 
     def update(self, job_id: str, **kwargs) -> None:
         with self._lock:
             job = self._jobs.get(job_id)
             if job:
+                self._owned.add(job_id)
                 for k, v in kwargs.items():
                     setattr(job, k, v)
                 # auto-calculate progress
                 if job.total_chunks > 0:
                     job.progress = int((job.indexed_chunks / job.total_chunks) * 100)
+                self._save()
+
+    def add_indexed(self, job_id: str, n_chunks: int, **kwargs) -> None:
+        """Count a batch of indexed chunks (plus other job fields); written
+        to disk at most every `save_interval_s`."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            self._owned.add(job_id)
+            for k, v in kwargs.items():
+                setattr(job, k, v)
+            job.indexed_chunks = min(job.indexed_chunks + n_chunks, job.total_chunks)
+            if job.total_chunks > 0:
+                job.progress = int((job.indexed_chunks / job.total_chunks) * 100)
+            self._save(throttle=True)
 
     def set_done(self, job_id: str, pages: int, chunks: int) -> None:
         self.update(
@@ -56,6 +224,7 @@ class JobRegistry:
             status=JobStatus.DONE,
             progress=100,
             pages=pages,
+            indexed_pages=pages,
             indexed_chunks=chunks,
             total_chunks=chunks,
         )
@@ -68,5 +237,7 @@ class JobRegistry:
         )
 
 
-# Singleton — shared across the whole API process
-job_registry = JobRegistry()
+# Singleton — shared across the whole API process, persisted next to the registry
+job_registry = JobRegistry(
+    settings.processed_dir / "jobs.json", keep_finished=settings.jobs_keep_finished
+)
@@ -1,17 +1,59 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from apps.api.config import settings
+from apps.api.responses import FastJSONResponse, GZipExceptStreams
 from apps.api.routers.health import router as health_router
+from apps.api.routers.index import router as index_router
+from apps.api.routers.ingest import resume_interrupted_jobs
 from apps.api.routers.ingest import router as ingest_router
 from apps.api.routers.ask import router as ask_router
+from apps.api.routers.retrieve import router as retrieve_router
 from apps.api.routers.summarize import router as summarize_router
+from apps.api.warmup import readiness
+from core.resilience.limiter import Overloaded
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings.ensure_dirs()
+    # Warm up in the background: /health answers immediately (liveness) while
+    # /ready stays 503 until imports, the index and upstream connections are warm.
+    threading.Thread(
+        target=readiness.run,
+        args=(settings.eager_warmup,),
+        name="warmup",
+        daemon=True,
+    ).start()
+    # pick up ingest jobs interrupted by a restart
+    resume_interrupted_jobs()
+    yield
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.app_name, version=settings.app_version)
+    app = FastAPI(
+        title=settings.app_name,
+        version=settings.app_version,
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
+    )
+
+    @app.exception_handler(Overloaded)
+    async def shed(request: Request, exc: Overloaded) -> FastJSONResponse:
+        # load shedding: fail fast so clients back off instead of timing out
+        return FastJSONResponse(
+            {"detail": str(exc)},
+            status_code=503,
+            headers={"Retry-After": str(exc.retry_after_s)},
+        )
+
+    if settings.gzip_min_bytes > 0:
+        app.add_middleware(GZipExceptStreams, minimum_size=settings.gzip_min_bytes)
 
     app.add_middleware(
         CORSMiddleware,
@@ -24,7 +66,9 @@ def create_app() -> FastAPI:
     app.include_router(health_router)
     app.include_router(ingest_router)
     app.include_router(ask_router)
+    app.include_router(retrieve_router)
     app.include_router(summarize_router)
+    app.include_router(index_router)
 
     return app
 
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.schemas.serialization import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson (when installed), compact output.
+
+    Routes on the hot path return it directly with plain dicts, which also
+    skips FastAPI's response_model validation/serialization pass; the
+    response_model stays on the route for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class GZipExceptStreams:
+    """GZipMiddleware for every route but token streams: gzip buffers its
+    output, which would hold streamed tokens back until the stream ends."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        skip_paths: tuple[str, ...] = ("/ask/stream",),
+    ) -> None:
+        self.app = app
+        # level 6: most of level 9's ratio at a fraction of the CPU
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=6)
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] not in self.skip_paths:
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -5,69 +5,164 @@ import uuid
 from fastapi import APIRouter, HTTPException
 
 from apps.api.config import settings
-from core.schemas.models import AskRequest, AskResponse, Meta, Citation
-from core.rag.pipeline import answer_question
+from apps.api.responses import FastJSONResponse
+from apps.api.routers.ingest import registry
+from core.schemas.models import (
+    AskBatchRequest,
+    AskBatchResponse,
+    AskRequest,
+    AskResponse,
+)
+from core.rag.pipeline import answer_question, answer_questions, query_limiter
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from core.rag.pipeline import stream_answer
-from core.schemas.utils import distance_to_score
+from core.resilience.deadline import DeadlineExceeded, request_deadline
+from core.schemas.utils import citation_payload
 
 router = APIRouter(tags=["rag"])
 
 
+def _model_name() -> str:
+    if settings.model_provider == "openai":
+        return settings.openai_chat_model
+    return settings.model_provider
+
+
+def _meta(request_id: str, latency_ms: int, scope: dict) -> dict:
+    return {
+        "request_id": request_id,
+        "latency_ms": latency_ms,
+        "model": _model_name(),
+        "prompt_version": "ask_v1",
+        **scope,
+    }
+
+
 @router.post("/ask", response_model=AskResponse)
-def ask(req: AskRequest) -> AskResponse:
+async def ask(req: AskRequest) -> FastJSONResponse:
     start = time.perf_counter()
     request_id = f"req_{uuid.uuid4().hex[:10]}"
+    deadline = request_deadline(req.timeout_ms, settings.request_timeout_s)
 
-    try:
-        out = answer_question(
-            question=req.question,
-            top_k=req.top_k,
-            doc_ids=req.doc_ids,  # list[str]
-            mode=req.mode,
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    citations: list[Citation] = []
-    for c in out.get("citations", []):
-        meta = c["meta"]
-        text = c["text"]
-        dist = float(c["distance"])
-
-        citations.append(
-            Citation(
-                doc_id=str(meta.get("doc_id", "")),
-                page=int(meta.get("page") or 0),
-                chunk_id=str(meta.get("chunk_id", "")),
-                snippet=text[:350],  # keep UI readable
-                score=distance_to_score(dist),
+    # admitted on the event loop; only admitted requests take a worker thread
+    async with query_limiter.aslot(deadline):
+        try:
+            out = await run_in_threadpool(
+                answer_question,
+                question=req.question,
+                top_k=req.top_k,
+                doc_ids=req.doc_ids,  # list[str]
+                mode=req.mode,
+                deadline=deadline,
             )
-        )
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
+    scope = await run_in_threadpool(registry.coverage, req.doc_ids)
     latency_ms = int((time.perf_counter() - start) * 1000)
-    meta = Meta(
-        request_id=request_id,
-        latency_ms=latency_ms,
-        model=settings.openai_chat_model
-        if settings.model_provider == "openai"
-        else settings.model_provider,
-        prompt_version="ask_v1",
+    return FastJSONResponse(
+        {
+            "answer": out["answer"],
+            **citation_payload(out.get("citations", []), req.citation_format),
+            "meta": _meta(request_id, latency_ms, scope),
+        }
     )
-    return AskResponse(answer=out["answer"], citations=citations, meta=meta)
 
 
-@router.post("/ask/stream")
-def ask_stream(req: AskRequest) -> StreamingResponse:
-    def generate():
+@router.post("/ask/batch", response_model=AskBatchResponse)
+async def ask_batch(req: AskBatchRequest) -> FastJSONResponse:
+    """Many questions over the same docs: one embedding call, one multi-query
+    vector search, chat completions fanned out with bounded concurrency."""
+    start = time.perf_counter()
+    batch_id = f"req_{uuid.uuid4().hex[:10]}"
+    deadline = request_deadline(req.timeout_ms, settings.request_timeout_s)
+
+    async with query_limiter.aslot(deadline):
         try:
-            yield from stream_answer(
-                question=req.question,
+            out = await run_in_threadpool(
+                answer_questions,
+                questions=req.questions,
                 top_k=req.top_k,
                 doc_ids=req.doc_ids,
                 mode=req.mode,
+                deadline=deadline,
+                max_concurrency=settings.ask_batch_concurrency,
             )
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    scope = await run_in_threadpool(registry.coverage, req.doc_ids)
+    items = [
+        {
+            "answer": item["answer"],
+            **citation_payload(item["citations"], req.citation_format),
+            # shared retrieval + this question's completion
+            "meta": _meta(
+                f"{batch_id}_{i}", out["retrieval_ms"] + item["latency_ms"], scope
+            ),
+            "error": item["error"],
+        }
+        for i, item in enumerate(out["items"])
+    ]
+    total_ms = int((time.perf_counter() - start) * 1000)
+    return FastJSONResponse(
+        {
+            "items": items,
+            "timing": {
+                "retrieval_ms": out["retrieval_ms"],
+                "generation_ms": out["generation_ms"],
+                "total_ms": total_ms,
+            },
+            "meta": _meta(batch_id, total_ms, scope),
+        }
+    )
+
+
+@router.post("/ask/stream")
+async def ask_stream(req: AskRequest) -> StreamingResponse:
+    """Answer tokens as plain text, then a `__CITATIONS__:` line.
+
+    The slot is held until the stream ends. When the client disconnects,
+    Starlette cancels the body iterator; closing the token generator then
+    closes the upstream chat stream instead of letting it run to the end.
+    """
+    deadline = request_deadline(req.timeout_ms, settings.request_timeout_s)
+    permit = await query_limiter.acquire_async(deadline)
+
+    async def generate():
+        tokens = stream_answer(
+            question=req.question,
+            top_k=req.top_k,
+            doc_ids=req.doc_ids,
+            mode=req.mode,
+            deadline=deadline,
+            citation_format=req.citation_format,
+        )
+        timed_out = False
+        try:
+            while True:
+                token = await run_in_threadpool(next, tokens, None)
+                if token is None:
+                    break
+                yield token
         except Exception as e:
+            timed_out = isinstance(e, TimeoutError)
             yield f"\n\n__ERROR__:{str(e)}"
+        finally:
+            tokens.close()
+            permit.release(timed_out=timed_out)
 
-    return StreamingResponse(generate(), media_type="text/plain")
+    scope = await run_in_threadpool(registry.coverage, req.doc_ids)
+    # the background task releases the slot if the body was never iterated
+    return StreamingResponse(
+        generate(),
+        media_type="text/plain",
+        background=BackgroundTask(permit.release),
+        headers={"X-Index-Coverage": scope["coverage"]},
+    )
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from core.schemas.models import HealthResponse
 from apps.api.config import settings
 
@@ -10,3 +11,26 @@ router = APIRouter(tags=["health"])
 @router.get("/health", response_model=HealthResponse)
 def health() -> HealthResponse:
     return HealthResponse(service=settings.app_name, version=settings.app_version)
+
+
+@router.get("/health/upstream")
+def upstream_latency() -> dict:
+    """Hedging + latency stats for the embedding and chat upstreams, and the
+    adaptive concurrency limit of the query endpoints."""
+    from core.rag.pipeline import chat_hedger, embed_hedger, query_limiter
+
+    return {
+        "embeddings": embed_hedger.snapshot(),
+        "chat": chat_hedger.snapshot(),
+        "query_limiter": query_limiter.snapshot(),
+    }
+
+
+@router.get("/ready")
+def ready() -> JSONResponse:
+    """Readiness for load balancers: 503 until the startup warm-up finished."""
+    from apps.api.warmup import readiness
+
+    return JSONResponse(
+        readiness.snapshot(), status_code=200 if readiness.ready else 503
+    )
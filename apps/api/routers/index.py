@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import time
+from threading import Lock
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from pydantic import BaseModel, Field
+
+from apps.api.config import settings
+from core.retrieval.maintenance import compact_store, dir_size_bytes
+from core.retrieval.migration import migration_action
+from core.retrieval.sharding import ShardedVectorStore, open_store
+from core.retrieval.vectorstore import ChromaVectorStore
+
+router = APIRouter(tags=["index"])
+
+_lock = Lock()
+_compaction: dict = {
+    "status": "idle",
+    "started_at": None,
+    "report": None,
+    "error": None,
+}
+
+
+def _store() -> ChromaVectorStore | ShardedVectorStore:
+    # maintenance never embeds, so no embedder (and no API key) is needed
+    return open_store(None)
+
+
+def _compaction_running() -> bool:
+    with _lock:
+        return _compaction["status"] == "running"
+
+
+def run_compaction() -> None:
+    """Background task: rebuild the active collection without tombstones."""
+    with _lock:
+        if _compaction["status"] == "running":
+            return
+        _compaction.update(status="running", started_at=time.time(), error=None)
+    try:
+        report = compact_store(_store())
+        with _lock:
+            _compaction.update(status="idle", report=report)
+    except Exception as e:
+        with _lock:
+            _compaction.update(status="error", error=str(e))
+
+
+def maybe_schedule_compaction(
+    background_tasks: BackgroundTasks, store: ChromaVectorStore | ShardedVectorStore
+) -> bool:
+    """Queue a compaction once deletions cross COMPACTION_THRESHOLD."""
+    if store.deleted_since_compaction() < settings.compaction_min_deleted:
+        return False
+    if store.deleted_fraction() < settings.compaction_threshold:
+        return False
+    if _compaction_running():
+        return False
+    background_tasks.add_task(run_compaction)
+    return True
+
+
+@router.get("/index/stats")
+def index_stats() -> dict:
+    store = _store()
+    with _lock:
+        compaction = dict(_compaction)
+    stats = {
+        "collection": store.collection_name,
+        "entries": store.count(),
+        "deleted_since_compaction": store.deleted_since_compaction(),
+        "deleted_fraction": store.deleted_fraction(),
+        "disk_bytes": dir_size_bytes(store.persist_dir),
+        "embed_model": store.embed_model,
+        "configured_embed_model": settings.openai_embed_model,
+        "compaction": compaction,
+    }
+    if isinstance(store, ShardedVectorStore):
+        stats["shards"] = {
+            key: {
+                "collection": shard.collection_name,
+                "entries": shard.count(),
+                "deleted_since_compaction": shard.deleted_since_compaction(),
+            }
+            for key, shard in store.shards().items()
+        }
+    return stats
+
+
+@router.post("/index/compact", status_code=202)
+def trigger_compaction(background_tasks: BackgroundTasks) -> dict:
+    if _compaction_running():
+        raise HTTPException(status_code=409, detail="Compaction already running.")
+    background_tasks.add_task(run_compaction)
+    return {"status": "scheduled", "message": "Poll /index/stats for the report."}
+
+
+class MigrateRequest(BaseModel):
+    embed_model: str = Field(min_length=1)
+    # eval questions: minimum mean share of today's top-k the new index returns
+    min_overlap: float = Field(default=0.5, ge=0.0, le=1.0)
+    questions: list[str] | None = None  # default: ask questions of the eval set
+
+
+def _migration(action: str, *args) -> dict:
+    try:
+        return migration_action(_store(), action, *args)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/index/migrate", status_code=202)
+def start_migration(req: MigrateRequest) -> dict:
+    """Re-embed the index with another model in the background (blue/green).
+
+    The current generation keeps serving until the new one is built and
+    validated; then the active collection and its embedding model switch
+    together. Poll /index/migrate for progress and the validation report.
+    """
+    if _compaction_running():
+        raise HTTPException(status_code=409, detail="Compaction is running.")
+    return _migration("start", req.embed_model, req.min_overlap, req.questions)
+
+
+@router.get("/index/migrate")
+def migration_status() -> dict:
+    return _migration("status")
+
+
+@router.post("/index/migrate/rollback")
+def rollback_migration() -> dict:
+    """Switch back to the generation the last migration replaced."""
+    return _migration("rollback")
+
+
+@router.post("/index/migrate/cleanup")
+def cleanup_migration() -> dict:
+    """Drop the kept previous generation (after which rollback is impossible)."""
+    return _migration("cleanup")
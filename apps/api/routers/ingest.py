@@ -2,27 +2,116 @@ from __future__ import annotations
 
 import hashlib
 import uuid
-from fastapi import APIRouter, BackgroundTasks, HTTPException, UploadFile, File, Form
+import zipfile
+from pathlib import Path
+from typing import Callable
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
 from fastapi.responses import JSONResponse
 
+from apps.api.bulk import (
+    admission,
+    batch_registry,
+    embed_rate_limiter,
+    iter_zip_pdfs,
+    load_page_pairs,
+    page_cache,
+    submit_ingest,
+)
 from apps.api.config import settings
 from apps.api.job_registry import JobStatus, job_registry
-from core.ingestion.chunker import chunk_pages
-from core.ingestion.pdf_loader import extract_pages
+from apps.api.routers.index import maybe_schedule_compaction
+from core.ingestion.boilerplate import strip_repeated_lines
+from core.ingestion.chunker import Chunk, chunk_pages, chunk_structured
+from core.ingestion.dedup import collapse_near_duplicates
+from core.ingestion.pdf_loader import extract_page_pairs, page_count
+from core.ingestion.priority import PageCoverage, prioritize, priority_pages
+from core.ingestion.versioning import ReindexPlan, plan_reindex
+from core.registry.filelock import try_claim
 from core.registry.registry import DocumentRegistry
+from core.retrieval.doc_index import doc_profile
 from core.retrieval.embedder import OpenAIEmbedder
-from core.retrieval.vectorstore import ChromaVectorStore
+from core.retrieval.sharding import open_store
 from core.schemas.models import DocInfo, DocList
 import asyncio
 
 router = APIRouter(tags=["ingestion"])
 
+ZIP_TYPES = ("application/zip", "application/x-zip-compressed")
+
 registry = DocumentRegistry(settings.processed_dir / "registry.json")
 
 
 @router.get("/documents", response_model=DocList)
-def list_docs() -> DocList:
-    return DocList(items=registry.all())
+def list_docs(
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    category: str | None = None,
+    source: str | None = None,
+    if_none_match: str | None = Header(default=None),
+):
+    """Registered documents by doc_id; pass `limit` to page (follow
+    `next_cursor`). The ETag is the registry version, so clients can
+    revalidate with If-None-Match and get a 304 until something changes."""
+    etag = f'W/"registry-{registry.version()}"'
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in (t.strip() for t in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers={"ETag": etag})
+    items, next_cursor = registry.page(cursor, limit, category, source)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return DocList(items=items, next_cursor=next_cursor)
+
+
+def _derived_paths(doc_id: str) -> list[Path]:
+    """Files owned by a document besides its vectors and registry entry."""
+    return [settings.raw_dir / f"{doc_id}.pdf", page_cache.path(doc_id)]
+
+
+@router.delete("/documents/{doc_id}")
+def delete_document(doc_id: str, background_tasks: BackgroundTasks) -> dict:
+    """Remove a document's vectors (in batches), derived files and registry entry.
+
+    Deleting leaves tombstones in the HNSW index; once they pass
+    COMPACTION_THRESHOLD a background compaction is scheduled.
+    """
+    if not registry.exists(doc_id):
+        raise HTTPException(status_code=404, detail="Document not found.")
+    if job_registry.active_for(doc_id):
+        raise HTTPException(
+            status_code=409, detail=f"doc_id '{doc_id}' is still being ingested."
+        )
+
+    # vectors first: if anything below fails, the delete can simply be retried
+    store = open_store(None)
+    vectors_deleted = store.delete_doc(doc_id)
+
+    files_removed: list[str] = []
+    for path in _derived_paths(doc_id):
+        if path.exists():
+            path.unlink()
+            files_removed.append(path.name)
+
+    registry.delete(doc_id)
+    return {
+        "doc_id": doc_id,
+        "vectors_deleted": vectors_deleted,
+        "files_removed": files_removed,
+        "compaction_scheduled": maybe_schedule_compaction(background_tasks, store),
+    }
 
 
 @router.get("/ingest/status/{job_id}")
@@ -36,78 +125,508 @@ def ingest_status(job_id: str):
         "status": job.status,
         "progress": job.progress,
         "pages": job.pages,
+        "indexed_pages": job.indexed_pages,
         "indexed_chunks": job.indexed_chunks,
         "total_chunks": job.total_chunks,
         "error": job.error,
         "message": job.message,
+        "stats": job.stats,
     }
 
 
-def _run_ingest(
+def _prepare(
+    page_pairs: list[tuple[int, str]],
+    chunk_size: int | None = None,
+    overlap: int | None = None,
+    chunker: str | None = None,
+) -> tuple[list[tuple[int, str]], list[Chunk], dict]:
+    """Page text without running headers/footers (STRIP_BOILERPLATE), its
+    chunks with near-duplicates collapsed (DEDUP_CHUNKS), and the stats of
+    both for the job and the version entry.
+
+    `chunk_size`/`overlap` override the CHUNKER's sizes: characters for
+    "chars", tokens for "structure".
+    """
+    stats: dict = {}
+    if settings.strip_boilerplate:
+        page_pairs, stats = strip_repeated_lines(
+            page_pairs, settings.boilerplate_min_fraction
+        )
+    if (chunker or settings.chunker) == "structure":
+        chunks = chunk_structured(
+            page_pairs,
+            chunk_size or settings.chunk_tokens,
+            settings.chunk_overlap_tokens if overlap is None else overlap,
+        )
+    else:
+        chunks = chunk_pages(
+            page_pairs,
+            chunk_size or settings.chunk_size,
+            settings.chunk_overlap if overlap is None else overlap,
+        )
+    if settings.dedup_chunks:
+        chunks, dedup_stats = collapse_near_duplicates(chunks, settings.dedup_threshold)
+        stats.update(dedup_stats)
+    return page_pairs, chunks, stats
+
+
+def _chunk_dict(c: Chunk) -> dict:
+    return {
+        "id": c.chunk_id,
+        "text": c.text,
+        "page": c.page,
+        "pages": c.pages,
+        "page_end": c.page_end,
+    }
+
+
+def _pdf_size(doc_id: str, data: bytes | None) -> int:
+    if data is not None:
+        return len(data)
+    path = settings.raw_dir / f"{doc_id}.pdf"
+    return path.stat().st_size if path.exists() else 0
+
+
+def _mark_partial(
+    job_id: str,
+    doc_id: str,
+    store,
+    title: str | None,
+    category: str | None,
+    page_pairs: list[tuple[int, str]],
+    indexed_pages: int,
+) -> None:
+    """First pages / TOC are indexed: the document is searchable (with partial
+    coverage) and, for two-stage retrieval, gets a profile from what's there."""
+    store.upsert_doc_profile(
+        doc_id, title, category, doc_profile(title, category, page_pairs)
+    )
+    registry.set_status(doc_id, "partially_indexed")
+    job_registry.update(job_id, status=JobStatus.PARTIAL, indexed_pages=indexed_pages)
+
+
+def _index_preview(
     job_id: str,
     doc_id: str,
     data: bytes,
+    store,
     title: str | None,
     source: str | None,
     category: str | None,
 ) -> None:
-    """Background worker — runs in a thread."""
+    """Extract, chunk and index only the first INGEST_PRIORITY_PAGES pages of
+    a long PDF, before the full extraction.
+
+    The full pass diffs against the index by content hash, so preview chunks
+    it chunks identically are kept and the others are replaced.
+    """
+    n_pages = page_count(data)
+    if n_pages <= 2 * settings.ingest_priority_pages:
+        return
+    # a few pages: extracted in this thread, not the EXTRACT_WORKERS pool
+    pairs = extract_page_pairs(data, settings.ingest_priority_pages)
+    pairs, chunks, _ = _prepare(pairs)
+    job_registry.update(job_id, pages=n_pages)
+    plan = plan_reindex(store.doc_index(doc_id), chunks)
+    plan.stale = []  # anything else indexed is left for the full pass to judge
+    _apply_plan(store, doc_id, chunks, plan, title, source, category)
+    _mark_partial(job_id, doc_id, store, title, category, pairs, len(pairs))
+
+
+def _run_ingest(
+    job_id: str,
+    doc_id: str,
+    data: bytes | None,
+    title: str | None,
+    source: str | None,
+    category: str | None,
+) -> None:
+    """Background worker — runs in a thread.
+
+    `data=None` re-reads the saved raw PDF (used when resuming after a restart).
+    With INGEST_PRIORITY_PAGES, the first pages and table of contents are
+    indexed first and the job and document turn "partially_indexed" (already
+    searchable) until the rest is in. The chunk set is diffed against the
+    index by content hash, so a resumed job never re-embeds work that was
+    already done.
+    """
     try:
-        job_registry.update(job_id, status=JobStatus.PROCESSING)
-
-        pages = extract_pages(data)
-        page_pairs = [(p.page, p.text) for p in pages]
-        chunks = chunk_pages(page_pairs)
-
-        job_registry.update(
-            job_id,
-            total_chunks=len(chunks),
-            pages=len(pages),
-        )
-
-        embedder = OpenAIEmbedder(
-            api_key=settings.openai_api_key,
-            model=settings.openai_embed_model,
-        )
-        store = ChromaVectorStore(
-            persist_dir=str(settings.processed_dir / "chroma"),
-            embedder=embedder,
-        )
-
-        # Batch embed with progress updates
-        BATCH_SIZE = 50
-        indexed = 0
-        for i in range(0, len(chunks), BATCH_SIZE):
-            batch = chunks[i : i + BATCH_SIZE]
-            store.upsert_chunks(
-                doc_id=doc_id,
-                title=title,
-                source=source,
-                category=category,
-                chunks=[
-                    {"id": c.chunk_id, "text": c.text, "page": c.page} for c in batch
-                ],
+        with admission.admit(job_id, _pdf_size(doc_id, data)) as use_pages:
+            job_registry.update(job_id, status=JobStatus.PROCESSING)
+
+            if data is None:
+                data = (settings.raw_dir / f"{doc_id}.pdf").read_bytes()
+
+            embedder = OpenAIEmbedder(
+                api_key=settings.openai_api_key,
+                model=settings.openai_embed_model,
+                rate_limiter=embed_rate_limiter,
+            )
+            store = open_store(embedder)
+
+            file_hash = hashlib.sha256(data).hexdigest()
+            page_pairs = page_cache.load(doc_id, file_hash)
+            if page_pairs is None:
+                if settings.ingest_priority_pages:
+                    _index_preview(job_id, doc_id, data, store, title, source, category)
+                page_pairs = load_page_pairs(doc_id, data, file_hash)
+            data = None  # only the page text is needed from here on
+            use_pages(len(page_pairs))
+            page_pairs, chunks, text_stats = _prepare(page_pairs)
+
+            first = priority_pages(page_pairs, settings.ingest_priority_pages)
+            chunks = prioritize(chunks, first)
+            job_registry.update(
+                job_id,
+                total_chunks=len(chunks),
+                indexed_chunks=0,  # counted again when resumed
+                pages=len(page_pairs),
+                stats=text_stats,
+            )
+
+            plan = plan_reindex(store.doc_index(doc_id), chunks)
+            coverage = PageCoverage(chunks, first)
+            partial = job_registry.get(job_id).status == JobStatus.PARTIAL
+
+            def on_batch(ids: list[str]) -> None:
+                nonlocal partial
+                coverage.done(ids)
+                job_registry.add_indexed(
+                    job_id, len(ids), indexed_pages=coverage.pages_indexed
+                )
+                if (
+                    settings.ingest_priority_pages
+                    and not partial
+                    and coverage.priority_indexed
+                    and not coverage.complete
+                ):
+                    _mark_partial(
+                        job_id,
+                        doc_id,
+                        store,
+                        title,
+                        category,
+                        [(p, t) for p, t in page_pairs if p in first],
+                        coverage.pages_indexed,
+                    )
+                    partial = True
+
+            on_batch([c.chunk_id for c in plan.unchanged])
+            _apply_plan(
+                store,
+                doc_id,
+                chunks,
+                plan,
+                title,
+                source,
+                category,
+                on_batch=on_batch,
+            )
+
+            store.upsert_doc_profile(
+                doc_id, title, category, doc_profile(title, category, page_pairs)
+            )
+            registry.record_stats(doc_id, text_stats)
+            registry.set_status(doc_id, "ready")
+            job_registry.set_done(job_id, pages=len(page_pairs), chunks=len(chunks))
+
+    except Exception as e:
+        # not "still loading" any more: /ask stops reporting partial coverage
+        registry.set_status(doc_id, "error")
+        job_registry.set_error(job_id, str(e))
+
+
+def _apply_plan(
+    store,
+    doc_id: str,
+    chunks: list,
+    plan: ReindexPlan,
+    title: str | None,
+    source: str | None,
+    category: str | None,
+    on_batch: Callable[[list[str]], None] | None = None,
+) -> None:
+    """Upsert moved chunks with their stored vectors and new text embedded,
+    in batches (`on_batch` gets each batch's ids), then drop stale chunk ids."""
+    # fetch reusable vectors before any upsert can overwrite their old ids
+    reused = store.get_embeddings(doc_id, sorted(set(plan.reuse.values())))
+    todo = [
+        {**_chunk_dict(c), "embedding": reused.get(plan.reuse[c.chunk_id])}
+        for c in chunks
+        if c.chunk_id in plan.reuse
+    ] + [_chunk_dict(c) for c in plan.embed]
+
+    BATCH_SIZE = 50
+    for i in range(0, len(todo), BATCH_SIZE):
+        batch = todo[i : i + BATCH_SIZE]
+        store.upsert_chunks(
+            doc_id=doc_id,
+            title=title,
+            source=source,
+            category=category,
+            chunks=batch,
+        )
+        if on_batch:
+            on_batch([c["id"] for c in batch])
+
+    store.delete_chunks(doc_id, plan.stale)
+
+
+def _run_new_version(
+    job_id: str,
+    doc_id: str,
+    data: bytes | None,
+    title: str | None,
+    source: str | None,
+    category: str | None,
+    file_hash: str,
+) -> None:
+    """Background worker for a new version of an existing document.
+
+    Diffs the new chunk set against the indexed one by content hash: unchanged
+    chunks are left alone, moved chunks reuse their stored vector, only new or
+    edited text is embedded, and chunk ids that no longer exist are deleted.
+    Safe to re-run after a crash — the diff is recomputed from the index.
+    """
+    try:
+        with admission.admit(job_id, _pdf_size(doc_id, data)) as use_pages:
+            job_registry.update(job_id, status=JobStatus.PROCESSING)
+
+            if data is None:
+                data = (settings.raw_dir / f"{doc_id}.pdf").read_bytes()
+
+            page_pairs = load_page_pairs(doc_id, data, file_hash)
+            data = None
+            use_pages(len(page_pairs))
+            page_pairs, chunks, text_stats = _prepare(page_pairs)
+            job_registry.update(
+                job_id,
+                total_chunks=len(chunks),
+                indexed_chunks=0,  # counted again when resumed
+                pages=len(page_pairs),
+                stats=text_stats,
+            )
+
+            embedder = OpenAIEmbedder(
+                api_key=settings.openai_api_key,
+                model=settings.openai_embed_model,
+                rate_limiter=embed_rate_limiter,
             )
-            indexed += len(batch)
-            job_registry.update(job_id, indexed_chunks=indexed)
+            store = open_store(embedder)
 
-        job_registry.set_done(job_id, pages=len(pages), chunks=indexed)
+            plan = plan_reindex(store.doc_index(doc_id), chunks)
+            unchanged_ids = [c.chunk_id for c in plan.unchanged]
+            current = registry.get(doc_id)
+            if current and (current.title, current.source, current.category) != (
+                title,
+                source,
+                category,
+            ):
+                store.update_metadata(doc_id, unchanged_ids, title, source, category)
+            job_registry.add_indexed(job_id, len(unchanged_ids))
+
+            _apply_plan(
+                store,
+                doc_id,
+                chunks,
+                plan,
+                title,
+                source,
+                category,
+                on_batch=lambda ids: job_registry.add_indexed(job_id, len(ids)),
+            )
+            store.upsert_doc_profile(
+                doc_id, title, category, doc_profile(title, category, page_pairs)
+            )
+
+            stats = {**plan.stats(), **text_stats}
+            # the registry names the new file only once it is fully indexed
+            version = registry.add_version(
+                doc_id, file_hash, stats, title=title, source=source, category=category
+            )
+            registry.set_status(doc_id, "ready")
+            job_registry.set_done(job_id, pages=len(page_pairs), chunks=len(chunks))
+            job_registry.update(
+                job_id,
+                message=(
+                    f"Version {version}: {stats['embedded']} embedded, "
+                    f"{stats['reused']} reused, {stats['unchanged']} unchanged, "
+                    f"{stats['removed']} removed."
+                ),
+            )
 
     except Exception as e:
+        # the index may hold a mix of both versions; the registry keeps the
+        # previous file_hash, so uploading the new file again is not deduped
+        registry.set_status(doc_id, "error")
         job_registry.set_error(job_id, str(e))
 
 
+def reindex_document(
+    doc_id: str,
+    chunk_size: int | None = None,
+    overlap: int | None = None,
+    reembed: bool = False,
+    chunker: str | None = None,
+) -> dict:
+    """Re-chunk a registered document from its cached page text and update
+    its vectors in place (used by `cli reindex`).
+
+    Only chunks whose text changed are embedded; `reembed` embeds every chunk
+    again (e.g. after switching OPENAI_EMBED_MODEL). The raw PDF is only
+    parsed when the page cache is missing or stale.
+    """
+    doc = registry.get(doc_id)
+    if doc is None:
+        raise KeyError(doc_id)
+    if job_registry.active_for(doc_id):
+        raise RuntimeError(f"doc_id '{doc_id}' is still being ingested.")
+    file_hash = registry.file_hash(doc_id)
+    pairs = page_cache.load(doc_id, file_hash)
+    from_cache = pairs is not None
+    if pairs is None:
+        data = (settings.raw_dir / f"{doc_id}.pdf").read_bytes()
+        pairs = load_page_pairs(doc_id, data, file_hash)
+    pairs, chunks, text_stats = _prepare(pairs, chunk_size, overlap, chunker)
+
+    embedder = OpenAIEmbedder(
+        api_key=settings.openai_api_key,
+        model=settings.openai_embed_model,
+        rate_limiter=embed_rate_limiter,
+    )
+    store = open_store(embedder)
+    indexed = store.doc_index(doc_id)
+    if reembed:
+        plan = plan_reindex({}, chunks)
+        new_ids = {c.chunk_id for c in chunks}
+        plan.stale = [cid for cid in indexed if cid not in new_ids]
+    else:
+        plan = plan_reindex(indexed, chunks)
+    _apply_plan(store, doc_id, chunks, plan, doc.title, doc.source, doc.category)
+    # also gives documents from before profiles existed their profile vector
+    profiled = store.upsert_doc_profile(
+        doc_id, doc.title, doc.category, doc_profile(doc.title, doc.category, pairs)
+    )
+    registry.record_stats(doc_id, text_stats)
+    return {
+        "doc_id": doc_id,
+        "pages": len(pairs),
+        "chunks": len(chunks),
+        "page_cache": "hit" if from_cache else "miss",
+        **plan.stats(),
+        **text_stats,
+        "profile_updated": profiled,
+    }
+
+
+def _worker_for(job) -> tuple:
+    """(target, args) to (re)run a job; `data=None` reads the saved raw PDF."""
+    if job.kind == "new_version":
+        return _run_new_version, (
+            job.job_id,
+            job.doc_id,
+            None,
+            job.title,
+            job.source,
+            job.category,
+            job.file_hash,
+        )
+    return _run_ingest, (
+        job.job_id,
+        job.doc_id,
+        None,
+        job.title,
+        job.source,
+        job.category,
+    )
+
+
+_resume_claim = None
+
+
+def resume_interrupted_jobs() -> list[str]:
+    """Restart ingest jobs left pending/processing by a previous process.
+
+    Called once at startup; jobs are queued on the shared ingest pool and resume
+    from the raw PDF saved under `raw_dir`, re-embedding only chunks the index
+    does not already hold. With several
+    API workers only the first one to start does this (it holds the claim for
+    its lifetime), so jobs are never resumed twice.
+    """
+    global _resume_claim
+    if _resume_claim is None:
+        _resume_claim = try_claim(settings.processed_dir / "resume.lock")
+        if _resume_claim is None:
+            return []
+    resumed: list[str] = []
+    for job in job_registry.active():
+        raw_path = settings.raw_dir / f"{job.doc_id}.pdf"
+        if not raw_path.exists():
+            job_registry.set_error(job.job_id, "Raw PDF missing; cannot resume.")
+            continue
+        job_registry.update(job.job_id, message="Resumed after restart.")
+        target, args = _worker_for(job)
+        submit_ingest(target, *args)
+        resumed.append(job.job_id)
+    return resumed
+
+
+def register_pdf(
+    data: bytes,
+    file_hash: str,
+    doc_id: str,
+    title: str | None,
+    source: str | None,
+    category: str | None,
+) -> str:
+    """Save the raw PDF, register the document and create its job; returns job_id."""
+    (settings.raw_dir / f"{doc_id}.pdf").write_bytes(data)
+    registry.add(
+        DocInfo(
+            doc_id=doc_id,
+            title=title,
+            source=source,
+            category=category,
+            status="indexing",
+        ),
+        file_hash,
+    )
+    job_id = f"job_{uuid.uuid4().hex[:8]}"
+    job_registry.create(
+        job_id=job_id,
+        doc_id=doc_id,
+        title=title,
+        source=source,
+        category=category,
+    )
+    return job_id
+
+
+def _check_admission() -> None:
+    """429 while the ingest queue is full, before an upload is read."""
+    if admission.full():
+        raise HTTPException(
+            status_code=429,
+            detail="Too many ingest jobs are waiting; retry later.",
+            headers={"Retry-After": str(admission.retry_after())},
+        )
+
+
 @router.post("/ingest", status_code=202)
 async def ingest_pdf(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     doc_id: str | None = Form(default=None),
     title: str | None = Form(default=None),
     source: str | None = Form(default=None),
     category: str | None = Form(default=None),
+    new_version: bool = Form(default=False),
 ) -> JSONResponse:
+    """Ingest a PDF. With `new_version=true` and an existing `doc_id`, the
+    upload replaces that document incrementally (only changed chunks are
+    embedded) and is recorded in its version history."""
     if file.content_type not in ("application/pdf",):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed.")
+    _check_admission()
 
     data = await file.read()
     file_hash = hashlib.sha256(data).hexdigest()
@@ -136,40 +655,190 @@ async def ingest_pdf(
     if not safe_doc_id or safe_doc_id.lower() == "string":
         safe_doc_id = f"doc_{uuid.uuid4().hex[:8]}"
 
+    if new_version:
+        return await _start_new_version(
+            safe_doc_id, data, file_hash, title, source, category
+        )
+
     if registry.exists(safe_doc_id):
         raise HTTPException(
             status_code=400,
             detail=f"doc_id '{safe_doc_id}' already exists.",
         )
 
-    # Save raw PDF
-    out_path = settings.raw_dir / f"{safe_doc_id}.pdf"
-    # out_path.write_bytes(data)
+    job_id = await asyncio.get_event_loop().run_in_executor(
+        None, register_pdf, data, file_hash, safe_doc_id, title, source, category
+    )
+    # the worker re-reads the saved PDF, so upload bytes are not held while queued
+    submit_ingest(_run_ingest, job_id, safe_doc_id, None, title, source, category)
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job_id,
+            "doc_id": safe_doc_id,
+            "deduped": False,
+            "message": "Ingest started. Poll /ingest/status/{job_id} for progress.",
+        },
+    )
+
+
+async def _start_new_version(
+    doc_id: str,
+    data: bytes,
+    file_hash: str,
+    title: str | None,
+    source: str | None,
+    category: str | None,
+) -> JSONResponse:
+    current = registry.get(doc_id)
+    if current is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"new_version requires an existing doc_id; '{doc_id}' not found.",
+        )
+    if job_registry.active_for(doc_id):
+        raise HTTPException(
+            status_code=409,
+            detail=f"doc_id '{doc_id}' is still being ingested.",
+        )
+
+    # unspecified fields keep the current document metadata
+    title = title or current.title
+    source = source or current.source
+    category = category or current.category
+
+    out_path = settings.raw_dir / f"{doc_id}.pdf"
     await asyncio.get_event_loop().run_in_executor(None, out_path.write_bytes, data)
 
-    # Register metadata immediately
-    doc_info = DocInfo(
-        doc_id=safe_doc_id,
+    job_id = f"job_{uuid.uuid4().hex[:8]}"
+    job_registry.create(
+        job_id=job_id,
+        doc_id=doc_id,
         title=title,
         source=source,
         category=category,
+        kind="new_version",
+        file_hash=file_hash,
     )
-    registry.add(doc_info, file_hash)
-
-    # Create job + kick off background task
-    job_id = f"job_{uuid.uuid4().hex[:8]}"
-    job_registry.create(job_id=job_id, doc_id=safe_doc_id)
-
-    background_tasks.add_task(
-        _run_ingest, job_id, safe_doc_id, data, title, source, category
+    submit_ingest(
+        _run_new_version, job_id, doc_id, None, title, source, category, file_hash
     )
 
     return JSONResponse(
         status_code=202,
         content={
             "job_id": job_id,
-            "doc_id": safe_doc_id,
+            "doc_id": doc_id,
             "deduped": False,
-            "message": "Ingest started. Poll /ingest/status/{job_id} for progress.",
+            "message": "New version ingest started. Poll /ingest/status/{job_id}.",
+        },
+    )
+
+
+@router.get("/documents/{doc_id}/versions")
+def document_versions(doc_id: str) -> dict:
+    if not registry.exists(doc_id):
+        raise HTTPException(status_code=404, detail="Document not found.")
+    return {"doc_id": doc_id, "versions": registry.versions(doc_id)}
+
+
+class BulkIntake:
+    """
+    Registers many PDFs as one batch: deduplicates by hash against the
+    registry (read once) and within the batch, then queues one ingest job per
+    new document on the shared ingest pool. Used by /ingest/bulk and the CLI.
+    """
+
+    def __init__(self, source: str | None = None, category: str | None = None):
+        self.source = source
+        self.category = category
+        self.known = registry.hash_index()
+        self.accepted: list[dict] = []
+        self.skipped: list[dict] = []
+        self.max_bytes = settings.max_upload_mb * 1024 * 1024
+
+    def skip(self, filename: str, reason: str, doc_id: str | None = None) -> None:
+        self.skipped.append({"filename": filename, "doc_id": doc_id, "reason": reason})
+
+    def add(self, filename: str, data: bytes) -> None:
+        file_hash = hashlib.sha256(data).hexdigest()
+        if file_hash in self.known:
+            self.skip(filename, "duplicate", doc_id=self.known[file_hash])
+            return
+        if len(data) > self.max_bytes:
+            self.skip(filename, f"larger than {settings.max_upload_mb} MB")
+            return
+
+        doc_id = f"doc_{uuid.uuid4().hex[:8]}"
+        title = Path(filename).stem
+        job_id = register_pdf(
+            data, file_hash, doc_id, title, self.source, self.category
+        )
+        self.known[file_hash] = doc_id
+        self.accepted.append({"filename": filename, "doc_id": doc_id, "job_id": job_id})
+        submit_ingest(
+            _run_ingest, job_id, doc_id, None, title, self.source, self.category
+        )
+
+    def add_zip(self, filename: str, data: bytes) -> None:
+        """add() every PDF in a zip, inflating one member at a time."""
+        members = iter_zip_pdfs(
+            data,
+            self.max_bytes,
+            settings.max_zip_uncompressed_mb * 1024 * 1024,
+            self.skip,
+        )
+        try:
+            for member_name, read in members:
+                try:
+                    member = read()
+                except zipfile.BadZipFile:
+                    self.skip(member_name, "corrupt zip member")
+                    continue
+                self.add(member_name, member)
+        except zipfile.BadZipFile:
+            self.skip(filename, "invalid zip archive")
+
+    def finish(self):
+        return batch_registry.create([a["job_id"] for a in self.accepted], self.skipped)
+
+
+@router.post("/ingest/bulk", status_code=202)
+async def ingest_bulk(
+    files: list[UploadFile] = File(...),
+    source: str | None = Form(default=None),
+    category: str | None = Form(default=None),
+) -> JSONResponse:
+    """Ingest many PDFs at once (several files and/or zip archives of PDFs)."""
+    _check_admission()
+    loop = asyncio.get_event_loop()
+    intake = BulkIntake(source=source, category=category)
+    for f in files:
+        data = await f.read()
+        name = f.filename or "upload"
+        if f.content_type in ZIP_TYPES or name.lower().endswith(".zip"):
+            await loop.run_in_executor(None, intake.add_zip, name, data)
+        elif f.content_type == "application/pdf":
+            await loop.run_in_executor(None, intake.add, name, data)
+        else:
+            intake.skip(name, "not a PDF or zip")
+
+    batch = intake.finish()
+    return JSONResponse(
+        status_code=202,
+        content={
+            "batch_id": batch.batch_id,
+            "accepted": intake.accepted,
+            "skipped": intake.skipped,
+            "message": "Bulk ingest started. Poll /ingest/batch/{batch_id}.",
         },
     )
+
+
+@router.get("/ingest/batch/{batch_id}")
+def ingest_batch_status(batch_id: str) -> dict:
+    batch = batch_registry.get(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    return batch_registry.progress(batch)
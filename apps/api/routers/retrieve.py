@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import time
+import uuid
+from fastapi import APIRouter, HTTPException
+
+from apps.api.config import settings
+from apps.api.responses import FastJSONResponse
+from apps.api.routers.ingest import registry
+from core.rag.pipeline import retrieve
+from core.resilience.deadline import DeadlineExceeded, request_deadline
+from core.schemas.models import RetrieveRequest, RetrieveResponse
+from core.schemas.utils import citation_payload
+
+router = APIRouter(tags=["rag"])
+
+
+@router.post("/retrieve", response_model=RetrieveResponse)
+def retrieve_chunks(req: RetrieveRequest) -> FastJSONResponse:
+    """Ranked evidence chunks for a question, without generating an answer."""
+    start = time.perf_counter()
+    request_id = f"req_{uuid.uuid4().hex[:10]}"
+
+    try:
+        out = retrieve(
+            question=req.question,
+            top_k=req.top_k,
+            doc_ids=req.doc_ids,
+            score_threshold=req.score_threshold,
+            deadline=request_deadline(req.timeout_ms, settings.request_timeout_s),
+        )
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    latency_ms = int((time.perf_counter() - start) * 1000)
+    return FastJSONResponse(
+        {
+            **citation_payload(out["citations"], req.citation_format),
+            "cached": out["cached"],
+            "meta": {
+                "request_id": request_id,
+                "latency_ms": latency_ms,
+                "model": settings.openai_embed_model,
+                "prompt_version": "retrieve_v1",
+                **registry.coverage(req.doc_ids),
+            },
+        }
+    )
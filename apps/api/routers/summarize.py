@@ -3,44 +3,42 @@ from __future__ import annotations
 import time
 import uuid
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 
 from apps.api.config import settings
-from core.schemas.models import SummarizeRequest, SummarizeResponse, Meta, Citation
-from core.rag.pipeline import summarize_guideline
-from core.schemas.utils import distance_to_score
+from core.schemas.models import SummarizeRequest, SummarizeResponse, Meta
+from core.rag.pipeline import query_limiter, summarize_guideline
+from apps.api.routers.ingest import registry
+from core.resilience.deadline import DeadlineExceeded, request_deadline
+from core.schemas.utils import citations_from_retrieved
 
 router = APIRouter(tags=["summarize"])
 
 
 @router.post("/summarize", response_model=SummarizeResponse)
-def summarize(req: SummarizeRequest) -> SummarizeResponse:
+async def summarize(req: SummarizeRequest) -> SummarizeResponse:
     start = time.perf_counter()
     request_id = f"req_{uuid.uuid4().hex[:10]}"
-
-    try:
-        out = summarize_guideline(
-            style=req.style,
-            doc_ids=req.doc_ids,
-            top_k=6,  # keep stable for now-> reduced to8 to 6 to reduce latency and cost, since we do an extra round of re-ranking in the prompt
-            mode="rag",  # stable Day-4 scope
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    citations: list[Citation] = []
-    for c in out.get("citations", []):
-        meta = c["meta"]
-        text = c["text"]
-        dist = float(c["distance"])
-        citations.append(
-            Citation(
-                doc_id=str(meta.get("doc_id", "")),
-                page=int(meta.get("page") or 0),
-                chunk_id=str(meta.get("chunk_id", "")),
-                snippet=text[:350],
-                score=distance_to_score(dist),
+    deadline = request_deadline(req.timeout_ms, settings.request_timeout_s)
+
+    # admitted on the event loop; only admitted requests take a worker thread
+    async with query_limiter.aslot(deadline):
+        try:
+            out = await run_in_threadpool(
+                summarize_guideline,
+                style=req.style,
+                doc_ids=req.doc_ids,
+                top_k=6,  # keep stable for now-> reduced to8 to 6 to reduce latency and cost, since we do an extra round of re-ranking in the prompt
+                mode="rag",  # stable Day-4 scope
+                deadline=deadline,
             )
-        )
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    citations = citations_from_retrieved(out.get("citations", []))
+    scope = await run_in_threadpool(registry.coverage, req.doc_ids)
 
     latency_ms = int((time.perf_counter() - start) * 1000)
     meta = Meta(
@@ -50,5 +48,6 @@ def summarize(req: SummarizeRequest) -> SummarizeResponse:
         if settings.model_provider == "openai"
         else settings.model_provider,
         prompt_version="summarize_v1",
+        **scope,
     )
     return SummarizeResponse(summary=out["summary"], citations=citations, meta=meta)
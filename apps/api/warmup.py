@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import importlib
+import time
+from threading import Lock
+from typing import Any, Callable, Dict
+
+from apps.api.config import settings
+
+# Imported lazily by core/ on first use; together they are most of a cold start.
+HEAVY_MODULES = ("chromadb", "openai", "pypdf")
+
+
+def warm_imports() -> Dict[str, float]:
+    """Import the heavy dependencies now; returns ms spent per module."""
+    timings: Dict[str, float] = {}
+    for name in HEAVY_MODULES:
+        t0 = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+    return timings
+
+
+def warm_index(store=None) -> Dict[str, Any]:
+    """Open the active collection(s) and run a few dummy queries so each HNSW
+    segment is loaded from disk before the first real search."""
+    from core.retrieval.maintenance import probe_query_latency
+    from core.retrieval.service import RemoteVectorStore
+    from core.retrieval.sharding import ShardedVectorStore, open_store
+
+    store = store or open_store(None)
+    if isinstance(store, RemoteVectorStore):
+        # the service warms its own index; open a pooled connection to it
+        return {store.socket_path: {"entries": store.count()}}
+    shards = store.shards() if isinstance(store, ShardedVectorStore) else {"": store}
+    return {
+        s.collection_name: {
+            "entries": s.count(),
+            "query_latency": probe_query_latency(s.col, n=3),
+        }
+        for s in shards.values()
+    }
+
+
+def warm_upstream() -> Dict[str, Any]:
+    """Open a pooled connection to the OpenAI API (TLS handshake included)."""
+    if not settings.openai_api_key:
+        return {"skipped": "OPENAI_API_KEY missing"}
+    from core.retrieval.embedder import openai_client
+
+    client = openai_client(settings.openai_api_key)
+    client.models.retrieve(settings.openai_chat_model, timeout=10)
+    return {"model": settings.openai_chat_model}
+
+
+class Readiness:
+    """
+    Warm-up progress reported by `/ready`.
+
+    The replica is ready once the index is warm. Upstream warm-up is best
+    effort: an OpenAI outage is recorded but doesn't hold readiness back,
+    since every replica would be equally affected.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.status = "starting"
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at = time.time()
+        self.ready_at: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def _step(self, name: str, fn: Callable[[], Any], required: bool) -> bool:
+        t0 = time.perf_counter()
+        entry: Dict[str, Any] = {}
+        try:
+            entry["result"] = fn()
+            ok = True
+        except Exception as e:
+            entry["error"] = str(e)
+            ok = not required
+        entry["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        with self._lock:
+            self.steps[name] = entry
+        return ok
+
+    def run(self, eager: bool = True) -> None:
+        with self._lock:
+            self.status = "warming"
+        ok = True
+        if eager:
+            ok = (
+                self._step("imports", warm_imports, required=True)
+                and self._step("index", warm_index, required=True)
+                and self._step("upstream", warm_upstream, required=False)
+            )
+        with self._lock:
+            self.status = "ready" if ok else "failed"
+            if ok:
+                self.ready_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": self.status,
+                "warmup_s": round(self.ready_at - self.started_at, 3)
+                if self.ready_at
+                else None,
+                "steps": dict(self.steps),
+            }
+
+
+readiness = Readiness()
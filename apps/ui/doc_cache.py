@@ -0,0 +1,29 @@
+"""
+Document list shared by the UI pages, revalidated with the API's ETag.
+
+Every Streamlit rerun used to download and render the full `/documents`
+list. The response is now kept in session state, and each rerun sends
+If-None-Match; the API answers 304 (no body) until the registry changes.
+"""
+
+from __future__ import annotations
+
+import requests
+import streamlit as st
+
+_KEY = "_documents_cache"
+
+
+def fetch_documents(api_base: str, timeout: float = 10) -> list[dict]:
+    """All registered documents (raises on API errors, like requests does)."""
+    cached = st.session_state.get(_KEY)
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
+    r = requests.get(f"{api_base}/documents", headers=headers, timeout=timeout)
+    if r.status_code == 304 and cached:
+        return cached["items"]
+    r.raise_for_status()
+    items = r.json().get("items", [])
+    etag = r.headers.get("ETag")
+    if etag:
+        st.session_state[_KEY] = {"etag": etag, "items": items}
+    return items
@@ -4,6 +4,8 @@ import requests
 import streamlit as st
 import pandas as pd
 
+from apps.ui.doc_cache import fetch_documents
+
 API_BASE = os.getenv("API_BASE", "http://localhost:8000")
 
 st.set_page_config(page_title="Upload", layout="wide")
@@ -61,7 +63,9 @@ if st.button("Ingest", type="primary", disabled=(uploaded is None)):
                 indexed = job["indexed_chunks"]
                 total = job["total_chunks"]
 
-                if total > 0:
+                if status == "queued":
+                    progress_bar.progress(0, text="Queued, waiting for capacity...")
+                elif total > 0:
                     progress_bar.progress(
                         progress, text=f"Embedding chunks... {indexed}/{total}"
                     )
@@ -85,17 +89,14 @@ st.markdown("---")
 st.subheader("Available docs")
 
 try:
-    r = requests.get(f"{API_BASE}/documents", timeout=10)
-    if not r.ok:
-        st.error(f"API error {r.status_code}")
-        st.code(r.text[:1500])
+    items = fetch_documents(API_BASE)
+    st.dataframe(pd.DataFrame(items))
+    if not items:
+        st.info("No documents ingested yet.")
     else:
-        data = r.json()
-        items = data.get("items", [])
-        st.dataframe(pd.DataFrame(items))
-        if not items:
-            st.info("No documents ingested yet.")
-        else:
-            st.json(items)
+        st.json(items)
+except requests.HTTPError as e:
+    st.error(f"API error {e.response.status_code}")
+    st.code(e.response.text[:1500])
 except Exception as e:
     st.error(f"Could not load available docs: {e}")
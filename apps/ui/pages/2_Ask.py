@@ -2,7 +2,7 @@ import os
 import requests
 import streamlit as st
 import pandas as pd
-from core.schemas.utils import distance_to_score
+from apps.ui.doc_cache import fetch_documents
 import time
 import json
 
@@ -25,9 +25,7 @@ with st.sidebar:
 #  Load documents for selection
 docs = []
 try:
-    r = requests.get(f"{API_BASE}/documents", timeout=10)
-    r.raise_for_status()
-    docs = r.json().get("items", [])
+    docs = fetch_documents(API_BASE)
 except Exception as e:
     st.error(f"Could not load documents: {e}")
 
@@ -70,12 +68,13 @@ if run:
         "doc_ids": selected,
         "top_k": top_k,
         "mode": mode,
+        "citation_format": "compact",
     }
 
     st.subheader("Answer")
     answer_placeholder = st.empty()
     full_answer = ""
-    citations_raw = []
+    citations_payload = {}
 
     start = time.perf_counter()
     with requests.post(
@@ -88,23 +87,15 @@ if run:
             if "__CITATIONS__:" in chunk:
                 parts = chunk.split("__CITATIONS__:")
                 full_answer += parts[0]
-                citations_raw = json.loads(parts[1])
+                citations_payload = json.loads(parts[1])
             else:
                 full_answer += chunk
             answer_placeholder.markdown(full_answer + "▌")
 
     answer_placeholder.markdown(full_answer)
 
-    cits = [
-        {
-            "doc_id": c["meta"].get("doc_id", ""),
-            "page": c["meta"].get("page", 0),
-            "chunk_id": c["meta"].get("chunk_id", ""),
-            "score": distance_to_score(c["distance"]),
-            "snippet": c["text"][:350],
-        }
-        for c in citations_raw
-    ]
+    # compact format: citations already scored, doc metadata under "documents"
+    cits = citations_payload.get("citations", [])
 
     # Store for Evidence page
     st.session_state["last_ask_payload"] = payload
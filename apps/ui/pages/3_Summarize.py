@@ -3,6 +3,8 @@ import requests
 import streamlit as st
 import pandas as pd
 
+from apps.ui.doc_cache import fetch_documents
+
 API_BASE = os.getenv("API_BASE", "http://localhost:8000")
 
 st.set_page_config(page_title="Summarize", layout="wide")
@@ -11,9 +13,7 @@ st.title("Summarize")
 # Load documents (DocList: {"items": [...]})
 docs = []
 try:
-    r = requests.get(f"{API_BASE}/documents", timeout=10)
-    r.raise_for_status()
-    docs = r.json().get("items", [])
+    docs = fetch_documents(API_BASE)
 except Exception as e:
     st.error(f"Could not load documents: {e}")
 
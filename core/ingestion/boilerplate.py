@@ -0,0 +1,113 @@
+"""
+Running header / footer removal after PDF extraction.
+
+`extract_text()` returns every page's running header, footer, page number
+and watermark along with the body, so they end up in nearly every chunk.
+A line is treated as boilerplate when it repeats on at least `min_fraction`
+of a document's pages:
+
+- anywhere on the page, compared as is (case and spacing folded), if it has
+  some letters: headers, footers, watermarks, copyright lines
+- short lines with numbers within the first/last `edge_lines` lines of a
+  page, compared with digits folded, if the numbers change from page to
+  page: "Page 3 of 40", bare page numbers
+
+Folding is limited to short, varying lines at page edges, so a dose that
+recurs in a table is kept. Counting runs once over the lines of all pages
+(numpy).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from core.ingestion.chunker import CHARS_PER_TOKEN
+
+MAX_FOLDED_CHARS = 40
+_DIGITS = re.compile(r"\d+")
+
+
+def _repeated(
+    keys: np.ndarray,
+    page: np.ndarray,
+    eligible: np.ndarray,
+    need: int,
+    variants: np.ndarray | None = None,
+) -> np.ndarray:
+    """Eligible lines whose key occurs on at least `need` distinct pages
+    (and, with `variants`, in at least `need` distinct variants)."""
+    if not eligible.any():
+        return eligible
+    _, inv = np.unique(keys[eligible], return_inverse=True)
+    n_keys = inv.max() + 1
+    key_pages = np.unique(np.stack([inv, page[eligible]], axis=1), axis=0)
+    ok = np.bincount(key_pages[:, 0], minlength=n_keys) >= need
+    if variants is not None:
+        _, var = np.unique(variants[eligible], return_inverse=True)
+        key_vars = np.unique(np.stack([inv, var], axis=1), axis=0)
+        ok &= np.bincount(key_vars[:, 0], minlength=n_keys) >= need
+    out = np.zeros_like(eligible)
+    out[eligible] = ok[inv]
+    return out
+
+
+def strip_repeated_lines(
+    page_pairs: List[tuple[int, str]],
+    min_fraction: float = 0.4,
+    min_pages: int = 3,
+    edge_lines: int = 2,
+) -> Tuple[List[tuple[int, str]], Dict[str, int]]:
+    """Page text without boilerplate lines, plus what was saved."""
+    lines: List[str] = []
+    page_idx: List[int] = []
+    edge: List[bool] = []
+    for i, (_, text) in enumerate(page_pairs):
+        rows = text.splitlines()
+        filled = [j for j, row in enumerate(rows) if row.strip()]
+        edges = set(filled[:edge_lines] + filled[-edge_lines:])
+        lines += rows
+        page_idx += [i] * len(rows)
+        edge += [j in edges for j in range(len(rows))]
+
+    chars_before = sum(len(t) for _, t in page_pairs)
+    stats = {
+        "chars_before_strip": chars_before,
+        "boilerplate_lines_removed": 0,
+        "chars_saved": 0,
+        "est_tokens_saved": 0,
+    }
+    n_pages = sum(1 for _, t in page_pairs if t.strip())
+    if n_pages < min_pages or not lines:
+        return page_pairs, stats
+
+    norm = np.array([" ".join(s.lower().split()) for s in lines], dtype=object)
+    folded = np.array([_DIGITS.sub("#", s) for s in norm], dtype=object)
+    page = np.array(page_idx)
+    filled = np.array([bool(s) for s in norm])
+    wordy = np.array([sum(c.isalpha() for c in s) >= 3 for s in norm])
+    need = max(min_pages, math.ceil(min_fraction * n_pages))
+    numbered = np.array(
+        [len(s) <= MAX_FOLDED_CHARS and "#" in s for s in folded], dtype=bool
+    )
+    drop = _repeated(norm, page, filled & wordy, need) | _repeated(
+        folded, page, numbered & np.array(edge), need, variants=norm
+    )
+    if not drop.any():
+        return page_pairs, stats
+
+    kept: List[List[str]] = [[] for _ in page_pairs]
+    for line, i, d in zip(lines, page_idx, drop):
+        if not d:
+            kept[i].append(line)
+    out = [(p, "\n".join(rows).strip()) for (p, _), rows in zip(page_pairs, kept)]
+    saved = chars_before - sum(len(t) for _, t in out)
+    stats.update(
+        boilerplate_lines_removed=int(drop.sum()),
+        chars_saved=saved,
+        est_tokens_saved=saved // CHARS_PER_TOKEN,
+    )
+    return out, stats
@@ -1,7 +1,30 @@
+"""
+Page text -> chunks.
+
+Two chunkers:
+
+- `chunk_pages` ("chars"): fixed character windows with overlap, page by
+  page. Cuts mid-sentence and leaves short tails at page ends.
+- `chunk_structured` ("structure"): packs whole sentences up to a token
+  budget, starts a new chunk at section headings, and lets a paragraph run
+  on across a page break; such chunks record the page they end on.
+
+Token counts are estimated from characters (no tokenizer dependency).
+"""
+
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List
+import bisect
+import re
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Iterator, List
+
+from core.retrieval.doc_index import is_heading
+
+CHARS_PER_TOKEN = 4  # rough English average
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
 
 
 @dataclass
@@ -9,6 +32,14 @@ class Chunk:
     chunk_id: str
     page: int
     text: str
+    # every page the text appears on, when near-duplicates were collapsed into it
+    pages: List[int] = field(default_factory=list)
+    # last page of a chunk that runs on across a page break
+    page_end: int | None = None
+
+
+def est_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
 
 
 def chunk_pages(
@@ -39,3 +70,151 @@ def chunk_pages(
             start = next_start
 
     return chunks
+
+
+@dataclass
+class _Unit:
+    page: int
+    page_end: int
+    text: str
+    heading: bool = False
+
+    @property
+    def tokens(self) -> int:
+        return est_tokens(self.text)
+
+
+def _tokens(units: List[_Unit]) -> int:
+    return sum(u.tokens for u in units)
+
+
+def _pieces(sentence: str, max_chars: int) -> Iterator[tuple[int, int]]:
+    """(start, end) spans of `sentence` of at most `max_chars`, cut between
+    words where possible."""
+    a = 0
+    while len(sentence) - a > max_chars:
+        b = sentence.rfind(" ", a, a + max_chars + 1)
+        if b <= a:
+            b = a + max_chars
+        yield a, b
+        a = b + 1 if sentence[b] == " " else b
+    yield a, len(sentence)
+
+
+def _sentences(lines: List[tuple[int, str]], max_chars: int) -> Iterator[_Unit]:
+    """A paragraph's (page, line) pairs -> sentences, each with the pages it
+    starts and ends on."""
+    text = " ".join(line for _, line in lines)
+    starts = list(accumulate((len(line) + 1 for _, line in lines[:-1]), initial=0))
+
+    def page_at(offset: int) -> int:
+        return lines[bisect.bisect_right(starts, offset) - 1][0]
+
+    pos = 0
+    for sentence in _SENTENCE_END.split(text):
+        begin = text.index(sentence, pos)
+        pos = begin + len(sentence)
+        for a, b in _pieces(sentence, max_chars):
+            yield _Unit(page_at(begin + a), page_at(begin + b - 1), sentence[a:b])
+
+
+def _units(pages: list[tuple[int, str]], max_chars: int) -> Iterator[_Unit]:
+    """Headings and sentences in reading order. Blank lines and headings end
+    a paragraph; page breaks do not."""
+    para: List[tuple[int, str]] = []
+    for page_num, text in pages:
+        for line in text.splitlines():
+            line = " ".join(line.split())
+            if line and not is_heading(line):
+                para.append((page_num, line))
+                continue
+            if para:
+                yield from _sentences(para, max_chars)
+                para = []
+            if line:
+                yield _Unit(page_num, page_num, line, heading=True)
+    if para:
+        yield from _sentences(para, max_chars)
+
+
+def _overlap(units: List[_Unit], max_tokens: int) -> List[_Unit]:
+    """Trailing sentences of `units` within `max_tokens`."""
+    out: List[_Unit] = []
+    for u in reversed(units):
+        if u.heading or _tokens(out) + u.tokens > max_tokens:
+            break
+        out.insert(0, u)
+    return out
+
+
+def chunk_structured(
+    pages: list[tuple[int, str]],
+    target_tokens: int = 256,
+    overlap_tokens: int = 32,
+) -> List[Chunk]:
+    """
+    Whole sentences packed up to `target_tokens` per chunk.
+
+    A heading starts a new chunk (once the current one holds at least a
+    quarter of the budget) and never ends one. Within a section, consecutive
+    chunks share trailing sentences of up to `overlap_tokens`. A chunk's
+    `page` is the page its first sentence starts on; `page_end` is set when
+    it ends on a later page. Ids are `p{page}_s{idx}`.
+    """
+    min_tokens = target_tokens // 4
+    chunks: List[Chunk] = []
+    per_page: dict[int, int] = {}
+
+    def emit(units: List[_Unit]) -> None:
+        page = units[0].page
+        end = max(u.page_end for u in units)
+        idx = per_page.get(page, 0)
+        per_page[page] = idx + 1
+        chunks.append(
+            Chunk(
+                chunk_id=f"p{page}_s{idx}",
+                page=page,
+                text="\n".join(u.text for u in units),
+                page_end=end if end > page else None,
+            )
+        )
+
+    cur: List[_Unit] = []
+    kept = 0  # leading units of `cur` already in the previous chunk
+    for unit in _units(pages, target_tokens * CHARS_PER_TOKEN):
+        fresh = _tokens(cur[kept:])
+        if unit.heading and fresh >= min_tokens:
+            emit(cur)
+            cur, kept = [], 0
+        elif fresh and _tokens(cur) + unit.tokens > target_tokens:
+            # trailing headings move on with the text they introduce
+            split = len(cur)
+            while split > kept and cur[split - 1].heading:
+                split -= 1
+            body, carried = cur[:split], cur[split:]
+            overlap: List[_Unit] = []
+            if split > kept:
+                emit(body)
+                if not carried:
+                    budget = min(overlap_tokens, target_tokens - unit.tokens)
+                    overlap = _overlap(body, budget)
+            cur, kept = overlap + carried, len(overlap)
+        cur.append(unit)
+
+    fresh_units = cur[kept:]
+    if not fresh_units:
+        return chunks
+    if (
+        chunks
+        and _tokens(fresh_units) < min_tokens
+        and not any(u.heading for u in fresh_units)
+    ):
+        # short tail at the end of the document: append it to the last chunk
+        last = chunks[-1]
+        last.text += "\n" + "\n".join(u.text for u in fresh_units)
+        end = max(u.page_end for u in fresh_units)
+        if end > (last.page_end or last.page):
+            last.page_end = end
+    else:
+        emit(cur)
+    return chunks
@@ -0,0 +1,94 @@
+"""
+Near-duplicate chunk collapsing (MinHash + LSH banding).
+
+Guidelines repeat disclaimers, copyright notices and boilerplate on many
+pages. Before embedding, chunks of a document whose word shingles are nearly
+identical (estimated Jaccard similarity >= threshold) are collapsed into the
+first occurrence, which keeps one vector and lists every page the text
+appears on. Candidate pairs come from LSH buckets (bands of the MinHash
+signature), so the cost stays linear in the number of chunks.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from dataclasses import replace
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from core.ingestion.chunker import Chunk
+
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"\w+")
+
+
+class MinHasher:
+    """MinHash signatures of word k-shingles, `num_perm` hash functions."""
+
+    def __init__(self, num_perm: int = 64, shingle: int = 5, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _PRIME, num_perm, dtype=np.int64)
+        self.b = rng.integers(0, _PRIME, num_perm, dtype=np.int64)
+        self.shingle = shingle
+
+    def signature(self, text: str) -> np.ndarray:
+        words = _WORD.findall(text.lower())
+        k = self.shingle
+        grams = {" ".join(words[i : i + k]) for i in range(max(1, len(words) - k + 1))}
+        h = np.fromiter(
+            (zlib.crc32(g.encode()) % _PRIME for g in grams),
+            dtype=np.int64,
+            count=len(grams),
+        )
+        return ((np.outer(self.a, h) + self.b[:, None]) % _PRIME).min(axis=1)
+
+
+def collapse_near_duplicates(
+    chunks: List[Chunk],
+    threshold: float = 0.9,
+    num_perm: int = 64,
+    bands: int = 16,
+) -> Tuple[List[Chunk], Dict[str, int]]:
+    """
+    Drop chunks that nearly duplicate an earlier one.
+
+    The kept (canonical) chunk of a group gets `pages`: every page its text
+    appears on. Returns the kept chunks, in order, and stats.
+    """
+    hasher = MinHasher(num_perm)
+    rows = num_perm // bands
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    kept: List[Chunk] = []
+    sigs: List[np.ndarray] = []
+    pages: List[set[int]] = []
+    copies: List[int] = []
+    for c in chunks:
+        sig = hasher.signature(c.text)
+        keys = [(b, sig[b * rows : (b + 1) * rows].tobytes()) for b in range(bands)]
+        candidates = dict.fromkeys(j for key in keys for j in buckets.get(key, ()))
+        match = next(
+            (j for j in candidates if np.mean(sigs[j] == sig) >= threshold), None
+        )
+        if match is not None:
+            pages[match].add(c.page)
+            copies[match] += 1
+            continue
+        for key in keys:
+            buckets.setdefault(key, []).append(len(kept))
+        kept.append(c)
+        sigs.append(sig)
+        pages.append({c.page})
+        copies.append(1)
+
+    out = [
+        replace(c, pages=sorted(p)) if n > 1 else c
+        for c, p, n in zip(kept, pages, copies)
+    ]
+    stats = {
+        "chunks_before_dedup": len(chunks),
+        "duplicates_removed": len(chunks) - len(kept),
+        "chunks_with_duplicates": sum(1 for n in copies if n > 1),
+    }
+    return out, stats
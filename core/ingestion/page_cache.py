@@ -0,0 +1,106 @@
+"""
+Extracted page text, persisted per document so documents can be re-chunked
+and re-indexed without parsing the PDF again (extraction is the slowest CPU
+step of ingestion).
+
+One zip per document: a deflated member per page (random access to a single
+page without reading the rest) plus a manifest with the source file hash and
+the extractor version. A cache whose hash or extractor doesn't match is a
+miss, so a new document version or a pypdf upgrade re-extracts.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import zipfile
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from typing import List
+
+# bump when extract_pages() changes what it produces
+EXTRACTOR_REVISION = 1
+
+_MANIFEST = "manifest.json"
+
+
+@lru_cache(maxsize=1)
+def extractor_version() -> str:
+    try:
+        pypdf = metadata.version("pypdf")
+    except metadata.PackageNotFoundError:
+        pypdf = "unknown"
+    return f"pypdf-{pypdf}.r{EXTRACTOR_REVISION}"
+
+
+def _member(page: int) -> str:
+    return f"p{page:05d}.txt"
+
+
+class PageCache:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, doc_id: str) -> Path:
+        return self.root / f"{doc_id}.zip"
+
+    def _manifest(self, zf: zipfile.ZipFile) -> dict:
+        return json.loads(zf.read(_MANIFEST))
+
+    def _valid(self, manifest: dict, file_hash: str | None) -> bool:
+        return manifest.get("extractor") == extractor_version() and (
+            file_hash is None or manifest.get("file_hash") == file_hash
+        )
+
+    def load(
+        self, doc_id: str, file_hash: str | None = None
+    ) -> List[tuple[int, str]] | None:
+        """(page, text) pairs, or None if missing or stale (`file_hash`
+        None accepts whichever version is cached)."""
+        try:
+            with zipfile.ZipFile(self.path(doc_id)) as zf:
+                manifest = self._manifest(zf)
+                if not self._valid(manifest, file_hash):
+                    return None
+                return [
+                    (p, zf.read(_member(p)).decode("utf-8")) for p in manifest["pages"]
+                ]
+        except (FileNotFoundError, KeyError, zipfile.BadZipFile):
+            return None
+
+    def page(self, doc_id: str, page: int) -> str | None:
+        """Text of one page, without decompressing the others."""
+        try:
+            with zipfile.ZipFile(self.path(doc_id)) as zf:
+                if not self._valid(self._manifest(zf), None):
+                    return None
+                return zf.read(_member(page)).decode("utf-8")
+        except (FileNotFoundError, KeyError, zipfile.BadZipFile):
+            return None
+
+    def file_hash(self, doc_id: str) -> str | None:
+        try:
+            with zipfile.ZipFile(self.path(doc_id)) as zf:
+                return self._manifest(zf).get("file_hash")
+        except (FileNotFoundError, KeyError, zipfile.BadZipFile):
+            return None
+
+    def save(self, doc_id: str, file_hash: str, pages: List[tuple[int, str]]) -> None:
+        path = self.path(doc_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+            for page, text in pages:
+                zf.writestr(_member(page), text)
+            zf.writestr(
+                _MANIFEST,
+                json.dumps(
+                    {
+                        "file_hash": file_hash,
+                        "extractor": extractor_version(),
+                        "pages": [p for p, _ in pages],
+                    }
+                ),
+            )
+        os.replace(tmp, path)
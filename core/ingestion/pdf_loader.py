@@ -2,10 +2,9 @@ from __future__ import annotations
 
 import io
 from dataclasses import dataclass
+from itertools import islice
 from typing import List
 
-from pypdf import PdfReader
-
 
 @dataclass
 class PageText:
@@ -13,10 +12,26 @@ class PageText:
     text: str
 
 
-def extract_pages(pdf_bytes: bytes) -> List[PageText]:
+def extract_pages(pdf_bytes: bytes, max_pages: int | None = None) -> List[PageText]:
+    from pypdf import PdfReader
+
     reader = PdfReader(io.BytesIO(pdf_bytes))
     pages: List[PageText] = []
-    for i, page in enumerate(reader.pages):
+    for i, page in enumerate(islice(reader.pages, max_pages)):
         txt = page.extract_text() or ""
         pages.append(PageText(page=i + 1, text=txt.strip()))
     return pages
+
+
+def extract_page_pairs(
+    pdf_bytes: bytes, max_pages: int | None = None
+) -> List[tuple[int, str]]:
+    """(page, text) pairs, of the first `max_pages` pages if given; plain
+    tuples so it can run in a worker process."""
+    return [(p.page, p.text) for p in extract_pages(pdf_bytes, max_pages)]
+
+
+def page_count(pdf_bytes: bytes) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
@@ -0,0 +1,75 @@
+"""
+Indexing order for progressive availability.
+
+A long guideline becomes searchable before its ingest finishes: chunks of
+its first pages and its table of contents are embedded first (scope,
+definitions, key recommendations, where everything else is), then the rest
+in page order. `PageCoverage` tracks which pages are fully indexed as
+batches land, for the job's "partially indexed" state.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, List, Set
+
+from core.ingestion.chunker import Chunk
+
+# "2.1 Dosing ........ 14", "Annex 3   87"
+_TOC_ENTRY = re.compile(r"(?=.*[A-Za-z]{3}).*?(\.{3,}|…+|\s)\s*\d{1,4}$")
+_TOC_TITLE = re.compile(r"^(table of )?contents$", re.IGNORECASE)
+MIN_TOC_ENTRIES = 5
+
+
+def is_toc_page(text: str) -> bool:
+    """Page titled "Contents", or whose lines mostly end in page numbers."""
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    if any(_TOC_TITLE.match(line) for line in lines[:3]):
+        return True
+    entries = sum(1 for line in lines if _TOC_ENTRY.match(line))
+    return entries >= MIN_TOC_ENTRIES and entries >= 0.6 * len(lines)
+
+
+def priority_pages(page_pairs: List[tuple[int, str]], first_pages: int) -> Set[int]:
+    """The first `first_pages` pages with text, plus table-of-contents pages."""
+    filled = [p for p, text in page_pairs if text.strip()]
+    return set(filled[:first_pages]) | {
+        p for p, text in page_pairs if text.strip() and is_toc_page(text)
+    }
+
+
+def prioritize(chunks: List[Chunk], pages: Set[int]) -> List[Chunk]:
+    """Chunks starting on `pages` first, each group in document order."""
+    return [c for c in chunks if c.page in pages] + [
+        c for c in chunks if c.page not in pages
+    ]
+
+
+class PageCoverage:
+    """Pages whose chunks are all indexed, updated batch by batch."""
+
+    def __init__(self, chunks: List[Chunk], priority: Set[int]) -> None:
+        self._page_of = {c.chunk_id: c.page for c in chunks}
+        self._left: dict[int, int] = {}
+        for c in chunks:
+            self._left[c.page] = self._left.get(c.page, 0) + 1
+        self._priority = {p for p in priority if p in self._left}
+
+    def done(self, chunk_ids: Iterable[str]) -> None:
+        for cid in chunk_ids:
+            page = self._page_of.pop(cid, None)
+            if page is not None:
+                self._left[page] -= 1
+
+    @property
+    def pages_indexed(self) -> int:
+        return sum(1 for n in self._left.values() if n == 0)
+
+    @property
+    def priority_indexed(self) -> bool:
+        return all(self._left[p] == 0 for p in self._priority)
+
+    @property
+    def complete(self) -> bool:
+        return not self._page_of
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from core.ingestion.chunker import Chunk
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a chunk's text, stored in Chroma metadata."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ReindexPlan:
+    """What a new version of a document needs, relative to what is indexed."""
+
+    unchanged: List[Chunk] = field(default_factory=list)  # same id, same text
+    reuse: Dict[str, str] = field(default_factory=dict)  # new id -> old id (same text)
+    embed: List[Chunk] = field(default_factory=list)  # new/changed text
+    stale: List[str] = field(default_factory=list)  # old ids to delete
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "unchanged": len(self.unchanged),
+            "reused": len(self.reuse),
+            "embedded": len(self.embed),
+            "removed": len(self.stale),
+        }
+
+
+def plan_reindex(indexed: Dict[str, str], chunks: List[Chunk]) -> ReindexPlan:
+    """
+    Diff a new chunk set against the indexed one by content hash.
+
+    indexed: {chunk_id: content_hash} currently in the vector store.
+
+    Chunk ids are positional (p{page}_c{idx}), so an edit on page 3 shifts ids
+    on later pages without changing their text; those vectors are reused
+    instead of re-embedded.
+    """
+    plan = ReindexPlan()
+    by_hash: Dict[str, str] = {}
+    for cid, h in indexed.items():
+        by_hash.setdefault(h, cid)
+
+    new_ids = set()
+    for c in chunks:
+        new_ids.add(c.chunk_id)
+        h = content_hash(c.text)
+        if indexed.get(c.chunk_id) == h:
+            plan.unchanged.append(c)
+        elif h in by_hash:
+            plan.reuse[c.chunk_id] = by_hash[h]
+        else:
+            plan.embed.append(c)
+
+    plan.stale = [cid for cid in indexed if cid not in new_ids]
+    return plan
@@ -1,15 +1,84 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
-
-from openai import OpenAI
+from typing import TYPE_CHECKING, Any, Dict, List
 
 from apps.api.config import settings
 from core.rag.prompts import ASK_SYSTEM
-from core.retrieval.embedder import OpenAIEmbedder
+from core.resilience.deadline import Deadline
+from core.resilience.hedging import Hedger
+from core.resilience.limiter import AdaptiveLimiter
+from core.retrieval.cache import TTLCache
+from core.retrieval.doc_index import two_stage_query
+from core.retrieval.embedder import OpenAIEmbedder, deadline_client, openai_client
+from core.retrieval.index_state import IndexState
+from core.retrieval.sharding import ShardedVectorStore, open_store
 from core.retrieval.vectorstore import ChromaVectorStore
+from core.schemas.serialization import dumps_str
+from core.schemas.utils import citation_payload, distance_to_score
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 from typing import Generator
-import json
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+# Shared across requests so the learned p95 reflects recent upstream latency.
+embed_hedger = Hedger(
+    "embeddings",
+    enabled=settings.hedging_enabled,
+    max_hedge_rate=settings.hedge_max_rate,
+    min_samples=settings.hedge_min_samples,
+)
+chat_hedger = Hedger(
+    "chat",
+    enabled=settings.hedging_enabled,
+    max_hedge_rate=settings.hedge_max_rate,
+    min_samples=settings.hedge_min_samples,
+)
+# Admission for the LLM-backed endpoints (ask, batch, stream, summarize).
+query_limiter = AdaptiveLimiter(
+    "query",
+    enabled=settings.query_limiter_enabled,
+    initial=settings.query_concurrency,
+    max_limit=settings.query_concurrency_max,
+    max_queue_wait_s=settings.query_queue_wait_ms / 1000.0,
+)
+
+retrieval_cache = TTLCache(
+    maxsize=settings.retrieve_cache_size, ttl_s=settings.retrieve_cache_ttl_s
+)
+_index_state = IndexState(settings.processed_dir / "chroma")
+
+
+def _chat_client(deadline: Deadline | None = None) -> OpenAI:
+    # shared client: openai is imported on first use, connections are reused;
+    # deadline-bound calls get the copy without SDK retries
+    if deadline is not None:
+        return deadline_client(settings.openai_api_key)
+    return openai_client(settings.openai_api_key)
+
+
+def _chat_completion(
+    client: OpenAI,
+    system_prompt: str,
+    user_prompt: str,
+    deadline: Deadline | None = None,
+) -> str:
+    from openai import NOT_GIVEN
+
+    def _call(timeout: float | None):
+        return client.chat.completions.create(
+            model=settings.openai_chat_model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0.2,
+            timeout=NOT_GIVEN if timeout is None else timeout,
+        )
+
+    resp = chat_hedger.call(_call, deadline)
+    return resp.choices[0].message.content.strip()
 
 
 def _build_context(citations: List[Dict[str, Any]]) -> str:
@@ -18,6 +87,8 @@ def _build_context(citations: List[Dict[str, Any]]) -> str:
         meta = c["meta"]
         doc_id = meta.get("doc_id")
         page = meta.get("page")
+        if meta.get("page_end"):
+            page = f"{page}-{meta['page_end']}"
         text = c["text"]
         blocks.append(f"[{i}] ({doc_id} p.{page})\n{text}")
     return "\n\n".join(blocks)
@@ -36,16 +107,17 @@ def answer_question(
     top_k: int = 5,
     doc_ids: list[str] | None = None,
     mode: str = "rag",
+    deadline: Deadline | None = None,
 ) -> Dict[str, Any]:
     if not settings.openai_api_key:
         raise ValueError("OPENAI_API_KEY missing. Set it in .env.")
 
     embedder = OpenAIEmbedder(
-        api_key=settings.openai_api_key, model=settings.openai_embed_model
-    )
-    store = ChromaVectorStore(
-        persist_dir=str(settings.processed_dir / "chroma"), embedder=embedder
+        api_key=settings.openai_api_key,
+        model=settings.openai_embed_model,
+        hedger=embed_hedger,
     )
+    store = open_store(embedder)
 
     # --- NEW: retrieval logic ---
     retrieved: list[dict] = []
@@ -57,17 +129,7 @@ def answer_question(
         retrieved = []
     else:
         system_prompt = ASK_SYSTEM
-        doc_ids = doc_ids or []
-        if len(doc_ids) == 0:
-            retrieved = store.query(question=question, top_k=top_k, doc_id=None)
-        elif len(doc_ids) == 1:
-            retrieved = store.query(question=question, top_k=top_k, doc_id=doc_ids[0])
-        else:
-            per_doc = [
-                store.query(question=question, top_k=top_k, doc_id=did)
-                for did in doc_ids
-            ]
-            retrieved = _merge_and_topk(per_doc, top_k=top_k)
+        retrieved = retrieve_many(store, [question], top_k, doc_ids, deadline)[0]
 
     context = _build_context(retrieved)
     user_prompt = f"""Question: {question}
@@ -76,18 +138,159 @@ Guideline excerpts:
 {context}
 """
 
-    client = OpenAI(api_key=settings.openai_api_key)
-    resp = client.chat.completions.create(
-        model=settings.openai_chat_model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.2,
+    client = _chat_client(deadline)
+    answer = _chat_completion(client, system_prompt, user_prompt, deadline=deadline)
+    return {"answer": answer, "citations": retrieved}
+
+
+def retrieve_many(
+    store: ChromaVectorStore | ShardedVectorStore,
+    questions: list[str],
+    top_k: int = 5,
+    doc_ids: list[str] | None = None,
+    deadline: Deadline | None = None,
+) -> list[list[dict]]:
+    """Retrieval for many questions: one embedding call, one Chroma query per doc.
+
+    Without `doc_ids` and with DOC_CANDIDATES set, each question first picks
+    its candidate documents by profile vector (two-stage retrieval).
+    """
+    embeddings = store.embedder.embed(
+        questions, deadline=deadline, model=store.embed_model
     )
+    if deadline is not None:
+        deadline.check("vector search")
+    doc_ids = doc_ids or []
+    if not doc_ids and settings.doc_candidates > 0:
+        return two_stage_query(store, embeddings, top_k, settings.doc_candidates)
+    if len(doc_ids) <= 1:
+        return store.query_embeddings(
+            embeddings, top_k=top_k, doc_id=doc_ids[0] if doc_ids else None
+        )
+    per_doc = [
+        store.query_embeddings(embeddings, top_k=top_k, doc_id=did) for did in doc_ids
+    ]
+    return [
+        _merge_and_topk([results[i] for results in per_doc], top_k=top_k)
+        for i in range(len(questions))
+    ]
 
-    answer = resp.choices[0].message.content.strip()
-    return {"answer": answer, "citations": retrieved}
+
+def retrieve(
+    question: str,
+    top_k: int = 5,
+    doc_ids: list[str] | None = None,
+    score_threshold: float | None = None,
+    deadline: Deadline | None = None,
+) -> Dict[str, Any]:
+    """
+    Retrieval only (no chat completion), with a short-TTL result cache.
+
+    The cache key includes the index version, which every upsert/delete and
+    collection switch changes, so results never outlive the data they came
+    from; the TTL only bounds memory and staleness across processes.
+    """
+    key = (
+        _index_state.version_key(),
+        question.strip(),
+        tuple(sorted(doc_ids or [])),
+        top_k,
+    )
+    retrieved = retrieval_cache.get(key)
+    cached = retrieved is not None
+    if not cached:
+        if not settings.openai_api_key:
+            raise ValueError("OPENAI_API_KEY missing. Set it in .env.")
+        embedder = OpenAIEmbedder(
+            api_key=settings.openai_api_key,
+            model=settings.openai_embed_model,
+            hedger=embed_hedger,
+        )
+        store = open_store(embedder)
+        retrieved = retrieve_many(store, [question], top_k, doc_ids, deadline)[0]
+        retrieval_cache.set(key, retrieved)
+
+    if score_threshold is not None:
+        retrieved = [
+            c
+            for c in retrieved
+            if distance_to_score(c["distance"], c.get("space", "l2")) >= score_threshold
+        ]
+    return {"citations": retrieved, "cached": cached}
+
+
+def answer_questions(
+    questions: list[str],
+    top_k: int = 5,
+    doc_ids: list[str] | None = None,
+    mode: str = "rag",
+    deadline: Deadline | None = None,
+    max_concurrency: int = 8,
+) -> Dict[str, Any]:
+    """
+    Batch version of answer_question: shared retrieval, then the chat
+    completions fan out on at most `max_concurrency` threads. A failing
+    question gets an "error" instead of failing the whole batch.
+    """
+    if not settings.openai_api_key:
+        raise ValueError("OPENAI_API_KEY missing. Set it in .env.")
+
+    t0 = time.perf_counter()
+    if mode == "no_rag":
+        retrieved = [[] for _ in questions]
+    else:
+        embedder = OpenAIEmbedder(
+            api_key=settings.openai_api_key,
+            model=settings.openai_embed_model,
+            hedger=embed_hedger,
+        )
+        store = open_store(embedder)
+        retrieved = retrieve_many(store, questions, top_k, doc_ids, deadline)
+    retrieval_ms = int((time.perf_counter() - t0) * 1000)
+
+    client = _chat_client(deadline)
+
+    def _one(i: int) -> Dict[str, Any]:
+        start = time.perf_counter()
+        if mode == "no_rag":
+            system_prompt = (
+                "You are a helpful medical assistant. "
+                "Answer from your general knowledge."
+            )
+            user_prompt = questions[i]
+        else:
+            system_prompt = ASK_SYSTEM
+            context = _build_context(retrieved[i])
+            user_prompt = (
+                f"Question: {questions[i]}\n\nGuideline excerpts:\n{context}\n"
+            )
+        try:
+            answer = _chat_completion(
+                client, system_prompt, user_prompt, deadline=deadline
+            )
+            error = None
+        except Exception as e:
+            answer, error = "", str(e)
+        return {
+            "answer": answer,
+            "citations": retrieved[i],
+            "error": error,
+            "latency_ms": int((time.perf_counter() - start) * 1000),
+        }
+
+    t1 = time.perf_counter()
+    workers = max(1, min(max_concurrency, len(questions)))
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="ask-batch"
+    ) as pool:
+        items = list(pool.map(_one, range(len(questions))))
+    generation_ms = int((time.perf_counter() - t1) * 1000)
+
+    return {
+        "items": items,
+        "retrieval_ms": retrieval_ms,
+        "generation_ms": generation_ms,
+    }
 
 
 def stream_answer(
@@ -95,32 +298,25 @@ def stream_answer(
     top_k: int = 5,
     doc_ids: list[str] | None = None,
     mode: str = "rag",
+    deadline: Deadline | None = None,
+    citation_format: str = "full",
 ) -> Generator[str, None, None]:
-    """Yields answer tokens one by one, then yields citations as a JSON line."""
+    """Yields answer tokens one by one, then yields citations as a JSON line:
+    the raw retrieved chunks ("full") or `citation_payload` ("compact")."""
 
     if not settings.openai_api_key:
         raise ValueError("OPENAI_API_KEY missing.")
 
     embedder = OpenAIEmbedder(
-        api_key=settings.openai_api_key, model=settings.openai_embed_model
-    )
-    store = ChromaVectorStore(
-        persist_dir=str(settings.processed_dir / "chroma"), embedder=embedder
+        api_key=settings.openai_api_key,
+        model=settings.openai_embed_model,
+        hedger=embed_hedger,
     )
+    store = open_store(embedder)
 
     retrieved: list[dict] = []
     if mode != "no_rag":
-        doc_ids = doc_ids or []
-        if len(doc_ids) == 0:
-            retrieved = store.query(question=question, top_k=top_k, doc_id=None)
-        elif len(doc_ids) == 1:
-            retrieved = store.query(question=question, top_k=top_k, doc_id=doc_ids[0])
-        else:
-            per_doc = [
-                store.query(question=question, top_k=top_k, doc_id=did)
-                for did in doc_ids
-            ]
-            retrieved = _merge_and_topk(per_doc, top_k=top_k)
+        retrieved = retrieve_many(store, [question], top_k, doc_ids, deadline)[0]
 
     context = _build_context(retrieved)
 
@@ -133,7 +329,9 @@ def stream_answer(
         system_prompt = ASK_SYSTEM
         user_prompt = f"Question: {question}\n\nGuideline excerpts:\n{context}"
 
-    client = OpenAI(api_key=settings.openai_api_key)
+    from openai import NOT_GIVEN
+
+    client = _chat_client(deadline)
     resp = client.chat.completions.create(
         model=settings.openai_chat_model,
         messages=[
@@ -142,16 +340,26 @@ def stream_answer(
         ],
         temperature=0.2,
         stream=True,  # enable streaming
+        # streams are not hedged; the deadline bounds connect + first byte
+        timeout=deadline.timeout("chat stream") if deadline else NOT_GIVEN,
     )
 
-    # Stream answer tokens
-    for chunk in resp:
-        delta = chunk.choices[0].delta.content
-        if delta:
-            yield delta
+    # Stream answer tokens; closing this generator early (client gone)
+    # closes the upstream response, so the model stops generating
+    try:
+        for chunk in resp:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        resp.close()
 
     # After stream ends, yield citations as a single JSON line
-    yield "\n\n__CITATIONS__:" + json.dumps(retrieved)
+    if citation_format == "compact":
+        payload = dumps_str(citation_payload(retrieved, "compact"))
+    else:
+        payload = dumps_str(retrieved)
+    yield "\n\n__CITATIONS__:" + payload
 
 
 # def _summarize_retrieval_query(style: str) -> str:
@@ -216,6 +424,7 @@ def summarize_guideline(
     doc_ids: list[str] | None = None,
     top_k: int = 8,
     mode: str = "rag",
+    deadline: Deadline | None = None,
 ) -> Dict[str, Any]:
     """
     Returns: {"summary": <text>, "citations": <retrieved chunks list>}
@@ -224,11 +433,11 @@ def summarize_guideline(
         raise ValueError("OPENAI_API_KEY missing. Set it in .env.")
 
     embedder = OpenAIEmbedder(
-        api_key=settings.openai_api_key, model=settings.openai_embed_model
-    )
-    store = ChromaVectorStore(
-        persist_dir=str(settings.processed_dir / "chroma"), embedder=embedder
+        api_key=settings.openai_api_key,
+        model=settings.openai_embed_model,
+        hedger=embed_hedger,
     )
+    store = open_store(embedder)
 
     retrieved: list[dict] = []
     if mode == "no_rag":
@@ -238,19 +447,27 @@ def summarize_guideline(
         doc_title = None
         if doc_ids and len(doc_ids) == 1:
             temp_results = store.query(
-                question="title purpose scope", top_k=1, doc_id=doc_ids[0]
+                question="title purpose scope",
+                top_k=1,
+                doc_id=doc_ids[0],
+                deadline=deadline,
             )
             if temp_results:
                 doc_title = temp_results[0]["meta"].get("title")
         query = _summarize_retrieval_query(style, title=doc_title)
         doc_ids = doc_ids or []
         if len(doc_ids) == 0:
-            retrieved = store.query(question=query, top_k=top_k, doc_id=None)
+            retrieved = store.query(
+                question=query, top_k=top_k, doc_id=None, deadline=deadline
+            )
         elif len(doc_ids) == 1:
-            retrieved = store.query(question=query, top_k=top_k, doc_id=doc_ids[0])
+            retrieved = store.query(
+                question=query, top_k=top_k, doc_id=doc_ids[0], deadline=deadline
+            )
         else:
             per_doc = [
-                store.query(question=query, top_k=top_k, doc_id=did) for did in doc_ids
+                store.query(question=query, top_k=top_k, doc_id=did, deadline=deadline)
+                for did in doc_ids
             ]
             retrieved = _merge_and_topk(per_doc, top_k=top_k)
 
@@ -263,15 +480,6 @@ def summarize_guideline(
     )
     user_prompt = _summarize_user_prompt(style=style, context=context)
 
-    client = OpenAI(api_key=settings.openai_api_key)
-    resp = client.chat.completions.create(
-        model=settings.openai_chat_model,
-        messages=[
-            {"role": "system", "content": summarize_system},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.2,
-    )
-
-    summary = resp.choices[0].message.content.strip()
+    client = _chat_client(deadline)
+    summary = _chat_completion(client, summarize_system, user_prompt, deadline=deadline)
     return {"summary": summary, "citations": retrieved}
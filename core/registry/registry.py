@@ -1,32 +1,99 @@
 from __future__ import annotations
 
+import copy
 import json
+import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from threading import Lock
+from typing import Any, Iterator
+from threading import RLock
 
+from core.registry.filelock import file_lock
 from core.schemas.models import DocInfo
 
-_lock = Lock()
+_lock = RLock()
 
 
 class DocumentRegistry:
+    """
+    Documents in registry.json, with a version counter bumped on every write
+    (`/documents` exposes it as the ETag).
+
+    The parsed file is cached and only re-read when its stat changes (another
+    API worker wrote it), so listing doesn't re-parse the JSON per request.
+    """
+
     def __init__(self, registry_path: Path):
         self.path = registry_path
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        if not self.path.exists():
-            self.path.write_text("[]")
+        self._cache: tuple[tuple[int, int], int, list[dict]] | None = None
+        self._indexing: tuple[int, list[str]] | None = None
 
-    def _read(self) -> list[dict]:
+    def _load(self) -> tuple[int, list[dict]]:
         with _lock:
-            return json.loads(self.path.read_text())
+            try:
+                st = self.path.stat()
+            except FileNotFoundError:
+                return 0, []
+            stamp = (st.st_mtime_ns, st.st_size)
+            if self._cache is None or self._cache[0] != stamp:
+                data = json.loads(self.path.read_text())
+                if isinstance(data, list):  # written before the version counter
+                    data = {"version": 0, "docs": data}
+                self._cache = (stamp, int(data["version"]), data["docs"])
+            return self._cache[1], self._cache[2]
+
+    def _read(self) -> list[dict]:
+        # shared with the cache: callers must not modify the entries
+        return self._load()[1]
 
     def _write(self, docs: list[dict]) -> None:
         with _lock:
-            self.path.write_text(json.dumps(docs, indent=2))
+            version = self._load()[0] + 1
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"version": version, "docs": docs}, indent=2))
+            os.replace(tmp, self.path)
+            st = self.path.stat()
+            self._cache = ((st.st_mtime_ns, st.st_size), version, docs)
+
+    @contextmanager
+    def _mutating(self) -> Iterator[None]:
+        # read-modify-write, serialized across threads and API worker processes
+        with _lock, file_lock(self.path.with_suffix(".lock")):
+            yield
+
+    def version(self) -> int:
+        return self._load()[0]
 
     def all(self) -> list[DocInfo]:
         return [DocInfo(**d) for d in self._read()]
 
+    def page(
+        self,
+        cursor: str | None = None,
+        limit: int | None = None,
+        category: str | None = None,
+        source: str | None = None,
+    ) -> tuple[list[DocInfo], str | None]:
+        """Documents ordered by doc_id, after `cursor` (the last doc_id of the
+        previous page); returns the page and the next cursor (None at the end).
+        Keyset paging, so inserts and deletes never shift later pages."""
+        docs = sorted(
+            (
+                d
+                for d in self._read()
+                if (category is None or d.get("category") == category)
+                and (source is None or d.get("source") == source)
+                and (cursor is None or d["doc_id"] > cursor)
+            ),
+            key=lambda d: d["doc_id"],
+        )
+        if limit is None or len(docs) <= limit:
+            return [DocInfo(**d) for d in docs], None
+        items = [DocInfo(**d) for d in docs[:limit]]
+        return items, items[-1].doc_id
+
     def get(self, doc_id: str) -> DocInfo | None:
         for d in self._read():
             if d["doc_id"] == doc_id:
@@ -36,21 +103,144 @@ class DocumentRegistry:
     def exists(self, doc_id: str) -> bool:
         return self.get(doc_id) is not None
 
+    def indexing(self, doc_ids: list[str] | None = None) -> list[str]:
+        """Documents (among `doc_ids`, default all) whose ingest is still
+        running; recomputed only when the registry version changes."""
+        version, docs = self._load()
+        if self._indexing is None or self._indexing[0] != version:
+            self._indexing = (
+                version,
+                sorted(
+                    d["doc_id"]
+                    for d in docs
+                    if d.get("status", "ready") in ("indexing", "partially_indexed")
+                ),
+            )
+        pending = self._indexing[1]
+        if doc_ids:
+            wanted = set(doc_ids)
+            pending = [d for d in pending if d in wanted]
+        return pending
+
+    def coverage(self, doc_ids: list[str] | None) -> dict[str, Any]:
+        """Meta fields flagging searched documents whose ingest is still
+        running (all documents when `doc_ids` is empty): answers can only cite
+        what is already indexed. Takes the file lock, so async routes call it
+        in the threadpool."""
+        pending = self.indexing(doc_ids)
+        return {
+            "coverage": "partial" if pending else "full",
+            "indexing_doc_ids": pending,
+        }
+
     def get_by_hash(self, file_hash: str) -> str | None:
         for d in self._read():
             if d.get("file_hash") == file_hash:
                 return d["doc_id"]
         return None
 
+    def file_hash(self, doc_id: str) -> str | None:
+        """Hash of the document's current version."""
+        for d in self._read():
+            if d["doc_id"] == doc_id:
+                return d.get("file_hash")
+        return None
+
+    def hash_index(self) -> dict[str, str]:
+        """{file_hash: doc_id} in one read, for deduplicating many files."""
+        return {d["file_hash"]: d["doc_id"] for d in self._read() if d.get("file_hash")}
+
     def add(self, doc: DocInfo, file_hash: str) -> None:
-        docs = self._read()
-        docs.append({**doc.model_dump(), "file_hash": file_hash})
-        self._write(docs)
+        with self._mutating():
+            docs = copy.deepcopy(self._read())
+            docs.append(
+                {
+                    **doc.model_dump(),
+                    "file_hash": file_hash,
+                    "versions": [_version_entry(1, file_hash, {})],
+                }
+            )
+            self._write(docs)
+
+    def add_version(
+        self,
+        doc_id: str,
+        file_hash: str,
+        stats: dict[str, Any],
+        title: str | None = None,
+        source: str | None = None,
+        category: str | None = None,
+    ) -> int:
+        """Make `file_hash` the current version of `doc_id`; returns its number."""
+        with self._mutating():
+            docs = copy.deepcopy(self._read())
+            for d in docs:
+                if d["doc_id"] != doc_id:
+                    continue
+                versions = d.setdefault(
+                    "versions", [_version_entry(1, d.get("file_hash"), {})]
+                )
+                version = int(d.get("version") or len(versions)) + 1
+                versions.append(_version_entry(version, file_hash, stats))
+                d["version"] = version
+                d["file_hash"] = file_hash
+                for k, v in (
+                    ("title", title),
+                    ("source", source),
+                    ("category", category),
+                ):
+                    if v:
+                        d[k] = v
+                self._write(docs)
+                return version
+        raise KeyError(doc_id)
+
+    def record_stats(self, doc_id: str, stats: dict[str, Any]) -> None:
+        """Merge ingest stats into the document's current version entry."""
+        with self._mutating():
+            docs = copy.deepcopy(self._read())
+            for d in docs:
+                if d["doc_id"] == doc_id:
+                    versions = d.setdefault(
+                        "versions", [_version_entry(1, d.get("file_hash"), {})]
+                    )
+                    versions[-1].update(stats)
+                    self._write(docs)
+                    return
+
+    def set_status(self, doc_id: str, status: str) -> None:
+        """Indexing state shown in /documents: indexing, partially_indexed,
+        ready or error."""
+        with self._mutating():
+            docs = copy.deepcopy(self._read())
+            for d in docs:
+                if d["doc_id"] == doc_id:
+                    if d.get("status", "ready") == status:
+                        return
+                    d["status"] = status
+                    self._write(docs)
+                    return
+
+    def versions(self, doc_id: str) -> list[dict[str, Any]]:
+        for d in self._read():
+            if d["doc_id"] == doc_id:
+                return d.get("versions", [])
+        return []
 
     def delete(self, doc_id: str) -> bool:
-        docs = self._read()
-        new_docs = [d for d in docs if d["doc_id"] != doc_id]
-        if len(new_docs) == len(docs):
-            return False
-        self._write(new_docs)
-        return True
+        with self._mutating():
+            docs = self._read()
+            new_docs = [d for d in docs if d["doc_id"] != doc_id]
+            if len(new_docs) == len(docs):
+                return False
+            self._write(new_docs)
+            return True
+
+
+def _version_entry(version: int, file_hash: str | None, stats: dict) -> dict:
+    return {
+        "version": version,
+        "file_hash": file_hash,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        **stats,
+    }
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request runs out of its latency budget."""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Absolute point in (monotonic) time by which a request must finish.
+
+    Created once in the router and passed down through the pipeline so every
+    upstream call (embeddings, chat) only gets the budget that is left.
+    """
+
+    expires_at: float
+
+    @staticmethod
+    def after(seconds: float | None) -> Deadline | None:
+        if seconds is None or seconds <= 0:
+            return None
+        return Deadline(expires_at=time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def check(self, what: str = "request") -> None:
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline exceeded before {what}.")
+
+    def timeout(self, what: str = "upstream call") -> float:
+        """Remaining budget, usable as a per-call HTTP timeout."""
+        self.check(what)
+        return self.remaining()
+
+
+def request_deadline(timeout_ms: int | None, default_s: float) -> Deadline | None:
+    """Deadline for a request: client-provided budget, else `default_s`
+    (REQUEST_TIMEOUT_S in the API)."""
+    if timeout_ms is not None:
+        return Deadline.after(timeout_ms / 1000.0)
+    return Deadline.after(default_s)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from threading import Lock
+from typing import Any, Callable, Dict, TypeVar
+
+from core.resilience.deadline import Deadline, DeadlineExceeded
+
+T = TypeVar("T")
+
+
+def _percentile(xs: list[float], p: float) -> float:
+    """p in [0, 100], linear interpolation (same as eval.metrics.percentile)."""
+    if not xs:
+        return 0.0
+    xs_sorted = sorted(xs)
+    k = (len(xs_sorted) - 1) * (p / 100.0)
+    f = int(k)
+    c = min(f + 1, len(xs_sorted) - 1)
+    return float(xs_sorted[f] + (xs_sorted[c] - xs_sorted[f]) * (k - f))
+
+
+class LatencyWindow:
+    """Rolling window of the most recent latencies (seconds)."""
+
+    def __init__(self, size: int = 500) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> float:
+        with self._lock:
+            samples = list(self._samples)
+        return _percentile(samples, p)
+
+
+class Hedger:
+    """
+    Issues a duplicate ("hedged") request when the first one is slower than
+    the learned p95 of the upstream, and returns whichever finishes first.
+
+    - `fn` receives the per-attempt timeout in seconds (None = no deadline).
+    - Hedges are capped at `max_hedge_rate` of all calls so a slow upstream
+      never sees more than (1 + rate)x the traffic.
+    - With `enabled=False` calls run inline; latency is still recorded so
+      the p95 is warm when hedging is switched on.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = False,
+        max_hedge_rate: float = 0.1,
+        min_samples: int = 20,
+        quantile: float = 95.0,
+        window: int = 500,
+        max_workers: int = 32,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.quantile = quantile
+
+        self.upstream = LatencyWindow(window)  # per-attempt latency
+        self.observed = LatencyWindow(window)  # latency seen by callers
+
+        self._lock = Lock()
+        self._calls = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._timeouts = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._max_workers = max_workers
+
+    # -------- public --------
+
+    def hedge_delay(self) -> float | None:
+        """Seconds to wait before hedging, or None while p95 is still unknown."""
+        if len(self.upstream) < self.min_samples:
+            return None
+        return self.upstream.percentile(self.quantile)
+
+    def call(self, fn: Callable[[float | None], T], deadline: Deadline | None) -> T:
+        start = time.perf_counter()
+        with self._lock:
+            self._calls += 1
+        try:
+            if not self.enabled:
+                result = self._attempt(
+                    fn, deadline.timeout(self.name) if deadline else None
+                )
+            else:
+                result = self._hedged_call(fn, deadline)
+        except DeadlineExceeded:
+            with self._lock:
+                self._timeouts += 1
+            raise
+        self.observed.add(time.perf_counter() - start)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            calls, hedged = self._calls, self._hedged
+            wins, timeouts = self._hedge_wins, self._timeouts
+        delay = self.hedge_delay()
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "calls": calls,
+            "hedged": hedged,
+            "hedge_rate": hedged / calls if calls else 0.0,
+            "hedge_wins": wins,
+            "timeouts": timeouts,
+            "hedge_delay_ms": None if delay is None else delay * 1000.0,
+            "latency_ms": {
+                "p50": self.observed.percentile(50) * 1000.0,
+                "p95": self.observed.percentile(95) * 1000.0,
+                "p99": self.observed.percentile(99) * 1000.0,
+            },
+        }
+
+    # -------- internals --------
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix=f"hedge-{self.name}",
+                )
+            return self._executor
+
+    def _attempt(self, fn: Callable[[float | None], T], timeout: float | None) -> T:
+        t0 = time.perf_counter()
+        try:
+            result = fn(timeout)
+        except Exception as e:
+            if timeout is not None and _is_timeout(e):
+                raise DeadlineExceeded(f"{self.name} call timed out.") from e
+            raise
+        self.upstream.add(time.perf_counter() - t0)
+        return result
+
+    def _allow_hedge(self) -> bool:
+        with self._lock:
+            if self._hedged + 1 > self.max_hedge_rate * self._calls:
+                return False
+            self._hedged += 1
+            return True
+
+    def _hedged_call(
+        self, fn: Callable[[float | None], T], deadline: Deadline | None
+    ) -> T:
+        def _timeout() -> float | None:
+            return deadline.timeout(self.name) if deadline else None
+
+        pool = self._pool()
+        primary = pool.submit(self._attempt, fn, _timeout())
+        pending: set[Future] = {primary}
+
+        delay = self.hedge_delay()
+        if delay is not None and (deadline is None or deadline.remaining() > delay):
+            done, _ = wait(pending, timeout=delay)
+            if not done and self._allow_hedge():
+                pending.add(pool.submit(self._attempt, fn, _timeout()))
+
+        first_error: BaseException | None = None
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=deadline.remaining() if deadline else None,
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                raise DeadlineExceeded(f"{self.name} call exceeded its deadline.")
+            for fut in done:
+                err = fut.exception()
+                if err is None:
+                    if fut is not primary:
+                        with self._lock:
+                            self._hedge_wins += 1
+                    return fut.result()
+                first_error = first_error or err
+        assert first_error is not None
+        raise first_error
+
+
+def _is_timeout(e: Exception) -> bool:
+    if isinstance(e, TimeoutError):
+        return True
+    return "timeout" in type(e).__name__.lower()
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from threading import Condition
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+from core.resilience.deadline import Deadline
+
+
+class Overloaded(RuntimeError):
+    """Raised when a request is shed instead of queued."""
+
+    def __init__(self, message: str, retry_after_s: int) -> None:
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+def _timed_out(e: BaseException) -> bool:
+    return isinstance(e, TimeoutError) or isinstance(e.__context__, TimeoutError)
+
+
+def _wake(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class Permit:
+    """One admitted request; `release` is idempotent."""
+
+    def __init__(self, limiter: AdaptiveLimiter) -> None:
+        self._limiter = limiter
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self, timed_out: bool = False) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._limiter._release(time.monotonic() - self._started, timed_out)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that adapts to upstream latency (AIMD).
+
+    Each finished request feeds a short and a long moving average of its
+    latency. While the short one stays within `tolerance` x the long one the
+    limit grows by about one per limit's worth of requests; once latency
+    climbs (or a request times out) it is cut by `backoff`, at most once per
+    average latency so one slow burst does not collapse it. Requests beyond
+    the limit wait, unless their expected queue wait (queue position / limit
+    x average latency) exceeds `max_queue_wait_s` or their deadline, in which
+    case they are rejected at once with a Retry-After estimate rather than
+    queued until the client gave up. With `enabled=False` every request is
+    admitted; latency is still recorded.
+
+    `acquire_async`/`aslot` wait on the event loop, so async routes queue
+    requests without tying up a threadpool worker each.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = True,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        max_queue_wait_s: float = 2.0,
+        tolerance: float = 2.0,
+        backoff: float = 0.9,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.max_queue_wait_s = max_queue_wait_s
+        self.tolerance = tolerance
+        self.backoff = backoff
+
+        self.inflight = 0
+        self.queued = 0
+        self._short_s: float | None = None
+        self._long_s: float | None = None
+        self._last_cut = float("-inf")
+        self._admitted = 0
+        self._rejected = 0
+        self._cond = Condition()
+        # (loop, future) of requests queued in acquire_async
+        self._waiters: List[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def _expected_wait(self, position: int) -> float:
+        # caller holds self._cond
+        return position / self.limit * (self._long_s or 1.0)
+
+    def _free(self) -> bool:
+        return self.inflight < int(self.limit)
+
+    def _shed(self, wait_s: float) -> Overloaded:
+        self._rejected += 1
+        return Overloaded(
+            f"Too many {self.name} requests in flight; retry later.",
+            retry_after_s=max(1, math.ceil(wait_s)),
+        )
+
+    def _admit(self) -> Permit:
+        # caller holds self._cond
+        self.inflight += 1
+        self._admitted += 1
+        return Permit(self)
+
+    def _budget(self, deadline: Deadline | None) -> float:
+        if deadline is None:
+            return self.max_queue_wait_s
+        return min(self.max_queue_wait_s, deadline.remaining())
+
+    def acquire(self, deadline: Deadline | None = None) -> Permit:
+        budget = self._budget(deadline)
+        with self._cond:
+            if not self.enabled or (self.queued == 0 and self._free()):
+                return self._admit()
+            wait_s = self._expected_wait(self.queued + 1)
+            if wait_s > budget:
+                raise self._shed(wait_s)
+            self.queued += 1
+            try:
+                admitted = self._cond.wait_for(self._free, timeout=budget)
+            finally:
+                self.queued -= 1
+            if not admitted:
+                raise self._shed(self._expected_wait(self.queued + 1))
+            return self._admit()
+
+    async def acquire_async(self, deadline: Deadline | None = None) -> Permit:
+        """acquire() for the event loop: a queued request awaits a release
+        instead of blocking a thread."""
+        budget = self._budget(deadline)
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if not self.enabled or (self.queued == 0 and self._free()):
+                return self._admit()
+            wait_s = self._expected_wait(self.queued + 1)
+            if wait_s > budget:
+                raise self._shed(wait_s)
+            self.queued += 1
+        end = time.monotonic() + budget
+        try:
+            while True:
+                with self._cond:
+                    if self._free():
+                        return self._admit()
+                    remaining = end - time.monotonic()
+                    if remaining <= 0:
+                        raise self._shed(self._expected_wait(self.queued))
+                    waiter = (loop, loop.create_future())
+                    self._waiters.append(waiter)
+                try:
+                    await asyncio.wait_for(waiter[1], remaining)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with self._cond:
+                        if waiter in self._waiters:
+                            self._waiters.remove(waiter)
+        finally:
+            with self._cond:
+                self.queued -= 1
+
+    def _release(self, latency_s: float, timed_out: bool) -> None:
+        with self._cond:
+            self.inflight -= 1
+            if self._short_s is None:
+                self._short_s = self._long_s = latency_s
+            else:
+                self._short_s = 0.8 * self._short_s + 0.2 * latency_s
+                self._long_s = 0.98 * self._long_s + 0.02 * latency_s
+            now = time.monotonic()
+            if timed_out or self._short_s > self.tolerance * self._long_s:
+                if now - self._last_cut >= self._short_s:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_cut = now
+            elif self.inflight + 1 >= int(self.limit) / 2:
+                # only grow while the limit is actually being used
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+            for loop, fut in self._waiters:
+                try:
+                    loop.call_soon_threadsafe(_wake, fut)
+                except RuntimeError:
+                    pass  # loop already closed
+            self._waiters.clear()
+
+    @contextmanager
+    def slot(self, deadline: Deadline | None = None) -> Iterator[Permit]:
+        """Hold a permit for the block; timeouts count as congestion."""
+        permit = self.acquire(deadline)
+        try:
+            yield permit
+        except BaseException as e:
+            permit.release(timed_out=_timed_out(e))
+            raise
+        finally:
+            permit.release()
+
+    @asynccontextmanager
+    async def aslot(self, deadline: Deadline | None = None) -> AsyncIterator[Permit]:
+        """slot() for async routes; the wait for a permit happens on the loop."""
+        permit = await self.acquire_async(deadline)
+        try:
+            yield permit
+        except BaseException as e:
+            permit.release(timed_out=_timed_out(e))
+            raise
+        finally:
+            permit.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "limit": round(self.limit, 2),
+                "inflight": self.inflight,
+                "queued": self.queued,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "latency_short_ms": round((self._short_s or 0.0) * 1000, 1),
+                "latency_long_ms": round((self._long_s or 0.0) * 1000, 1),
+            }
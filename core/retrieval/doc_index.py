@@ -0,0 +1,76 @@
+"""
+Document-level index for two-stage retrieval.
+
+Every document gets one "profile" vector next to its chunks: the embedding
+of its title, category, opening text and section headings. A search without
+a document filter can then first pick the closest few documents by profile
+(a small index: one entry per document) and search only their chunks,
+instead of every chunk in the library.
+
+The candidate count trades recall for latency; `eval/bench_two_stage.py`
+measures both against flat search.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List
+
+MAX_PROFILE_CHARS = 2000
+OPENING_CHARS = 400
+
+_NUMBERED = re.compile(r"^\d+(\.\d+)*\.?\s+[A-Z]")
+_KEYWORD = re.compile(r"^(section|chapter|part|annex|appendix)\b", re.IGNORECASE)
+
+
+def is_heading(line: str) -> bool:
+    """Short line that looks like a (numbered, keyword or all-caps) heading
+    rather than running text."""
+    line = line.strip()
+    if not 3 <= len(line) <= 100 or line[-1] in ".,;:":
+        return False
+    if _KEYWORD.match(line) or _NUMBERED.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 4 and line.isupper()
+
+
+def doc_profile(
+    title: str | None,
+    category: str | None,
+    page_pairs: List[tuple[int, str]],
+    max_chars: int = MAX_PROFILE_CHARS,
+) -> str:
+    """Text embedded as the document's profile vector."""
+    opening = next((text for _, text in page_pairs if text.strip()), "")
+    lines = [p for p in (title, category) if p]
+    lines.append(" ".join(opening.split())[:OPENING_CHARS])
+    seen = set()
+    for _, text in page_pairs:
+        for line in text.splitlines():
+            line = " ".join(line.split())
+            if is_heading(line) and line.lower() not in seen:
+                seen.add(line.lower())
+                lines.append(line)
+    return "\n".join(lines)[:max_chars]
+
+
+def two_stage_query(
+    store,
+    embeddings: List[List[float]],
+    top_k: int,
+    n_docs: int,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Chunk search restricted to the `n_docs` documents whose profiles are
+    closest to each query vector.
+
+    Falls back to flat search when fewer than `n_docs` documents have a
+    profile: the candidate set would be the whole (profiled) library anyway.
+    """
+    candidates = store.doc_candidates(embeddings, n_docs)
+    results: List[List[Dict[str, Any]]] = []
+    for emb, docs in zip(embeddings, candidates):
+        doc_ids = [d["doc_id"] for d in docs] if len(docs) >= n_docs else None
+        results.append(store.query_embeddings([emb], top_k, doc_ids=doc_ids)[0])
+    return results
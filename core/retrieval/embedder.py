@@ -1,18 +1,91 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from threading import Lock
+from typing import Any, Dict, List, Optional
 
-from openai import OpenAI
+from core.resilience.deadline import Deadline
+from core.resilience.hedging import Hedger
+from core.resilience.ratelimit import RateLimiter
+
+_clients: Dict[tuple[str, str | None, int | None], Any] = {}
+_clients_lock = Lock()
+
+
+def openai_client(
+    api_key: str, base_url: str | None = None, max_retries: int | None = None
+):
+    """Process-wide OpenAI client per key (and endpoint), so its connection
+    pool is reused across requests (and can be pre-connected at startup).
+    `base_url` defaults to OPENAI_BASE_URL.
+
+    `max_retries` overrides the SDK default (2) on a copy sharing the same
+    connection pool. Calls bound by a Deadline use `max_retries=0`: the SDK
+    would give every retry the full per-call timeout, so one call could take
+    about 3x the remaining budget."""
+    from apps.api.config import settings
+
+    base_url = base_url or settings.openai_base_url
+    with _clients_lock:
+        client = _clients.get((api_key, base_url, max_retries))
+        if client is None:
+            base = _clients.get((api_key, base_url, None))
+            if base is None:
+                from openai import OpenAI
+
+                base = OpenAI(api_key=api_key, base_url=base_url)
+                _clients[(api_key, base_url, None)] = base
+            client = base
+            if max_retries is not None:
+                client = base.with_options(max_retries=max_retries)
+            _clients[(api_key, base_url, max_retries)] = client
+        return client
+
+
+def deadline_client(api_key: str):
+    """The shared client for calls bound by a Deadline: no SDK retries."""
+    return openai_client(api_key, max_retries=0)
 
 
 class OpenAIEmbedder:
-    def __init__(self, api_key: Optional[str], model: str):
+    def __init__(
+        self,
+        api_key: Optional[str],
+        model: str,
+        hedger: Hedger | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
         if not api_key:
             raise ValueError("OPENAI_API_KEY is required for embeddings.")
-        self.client = OpenAI(api_key=api_key)
+        self.client = openai_client(api_key)
+        self.deadline_client = deadline_client(api_key)
         self.model = model
+        self.hedger = hedger
+        self.rate_limiter = rate_limiter
+
+    def embed(
+        self,
+        texts: List[str],
+        deadline: Deadline | None = None,
+        model: str | None = None,
+    ) -> List[List[float]]:
+        """`model` overrides self.model (stores embed with the model their
+        index was built with, see ChromaVectorStore.embed_model)."""
+        from openai import NOT_GIVEN
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        def _call(timeout: float | None):
+            # OpenAI embeddings endpoint; no SDK retries past a deadline
+            client = self.client if timeout is None else self.deadline_client
+            return client.embeddings.create(
+                model=model or self.model,
+                input=texts,
+                timeout=NOT_GIVEN if timeout is None else timeout,
+            )
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
-        # OpenAI embeddings endpoint
-        resp = self.client.embeddings.create(model=self.model, input=texts)
+        if self.hedger is not None:
+            resp = self.hedger.call(_call, deadline)
+        else:
+            resp = _call(deadline.timeout("embedding") if deadline else None)
         return [d.embedding for d in resp.data]
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from threading import RLock
+from typing import Any, Dict, Iterator
+
+from core.registry.filelock import file_lock
+
+DEFAULT_COLLECTION = "guidelines"
+
+_lock = RLock()
+_held: set[Path] = set()  # state files whose file lock this process holds
+
+# every write bumps "seq", written first so readers check it without parsing
+_SEQ = re.compile(rb'^\{\s*"seq":\s*(\d+)')
+
+
+class IndexState:
+    """
+    Small JSON file next to the Chroma data that records which collection is
+    active plus bookkeeping for index maintenance.
+
+    Switching `active_collection` is a single atomic file replace, so every
+    ChromaVectorStore (in any process sharing the directory) moves to the new
+    collection on its next operation. Read-modify-writes hold a file lock, so
+    concurrent API workers never lose each other's updates.
+    """
+
+    def __init__(
+        self,
+        persist_dir: Path,
+        name: str = "index_state",
+        default_collection: str = DEFAULT_COLLECTION,
+    ):
+        self.path = Path(persist_dir) / f"{name}.json"
+        self.default_collection = default_collection
+        self._cache: Dict[str, Any] | None = None
+
+    @contextmanager
+    def _mutating(self) -> Iterator[None]:
+        # read-modify-write, serialized across threads and processes;
+        # re-entrant (update() runs inside bump_version() etc.)
+        with _lock:
+            if self.path in _held:
+                yield
+                return
+            _held.add(self.path)
+            try:
+                with file_lock(self.path.with_suffix(".lock")):
+                    yield
+            finally:
+                _held.discard(self.path)
+
+    def _seq_on_disk(self) -> int | None:
+        with open(self.path, "rb") as f:
+            m = _SEQ.match(f.read(64))
+        return int(m.group(1)) if m else None
+
+    def read(self) -> Dict[str, Any]:
+        try:
+            seq = self._seq_on_disk()
+        except FileNotFoundError:
+            return {"active_collection": self.default_collection}
+        # files written before the counter (no seq) are parsed every time
+        if self._cache is None or seq is None or seq != self._cache.get("seq"):
+            self._cache = json.loads(self.path.read_text() or "{}")
+        return dict(self._cache)
+
+    def update(self, **changes: Any) -> Dict[str, Any]:
+        with self._mutating():
+            state = self.read()
+            state.update(changes)
+            state = {"seq": int(state.pop("seq", 0)) + 1, **state}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(state, indent=2))
+            os.replace(tmp, self.path)
+            self._cache = state
+            return dict(state)
+
+    def active_collection(self) -> str:
+        return str(self.read().get("active_collection") or self.default_collection)
+
+    def embed_model(self) -> str | None:
+        """Embedding model of the active collection's vectors, once recorded."""
+        return self.read().get("embed_model")
+
+    def adopt_embed_model(self, model: str) -> str:
+        """The recorded embedding model; records `model` if there is none yet."""
+        with self._mutating():
+            recorded = self.embed_model()
+            if recorded is None:
+                self.update(embed_model=model)
+                recorded = model
+            return recorded
+
+    def deleted_since_compaction(self) -> int:
+        return int(self.read().get("deleted_since_compaction", 0))
+
+    def record_deletes(self, n: int) -> None:
+        if n > 0:
+            with self._mutating():
+                self.update(
+                    deleted_since_compaction=self.deleted_since_compaction() + n
+                )
+
+    def bump_version(self) -> None:
+        """Called after every index write; invalidates cached query results."""
+        with self._mutating():
+            self.update(version=int(self.read().get("version", 0)) + 1)
+
+    def version_key(self) -> str:
+        """Identifies the exact index contents: active collection + write count."""
+        state = self.read()
+        active = state.get("active_collection") or self.default_collection
+        return f"{active}:{state.get('version', 0)}"
+
+    # doc -> shard assignments (only used by ShardedVectorStore)
+    def shard_map(self) -> Dict[str, str]:
+        return dict(self.read().get("shard_map") or {})
+
+    def assign_shard(self, doc_id: str, shard: str) -> None:
+        with self._mutating():
+            self.update(shard_map={**self.shard_map(), doc_id: shard})
+
+    def unassign_shard(self, doc_id: str) -> None:
+        with self._mutating():
+            shards = self.shard_map()
+            if shards.pop(doc_id, None) is not None:
+                self.update(shard_map=shards)
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from core.ingestion.versioning import content_hash
+from core.retrieval.vectorstore import (
+    ChromaVectorStore,
+    doc_collection_name,
+    hnsw_configuration,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def dir_size_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def _random_unit_vectors(dim: int, n: int, seed: int = 0) -> List[List[float]]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        v = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+        norm = sum(x * x for x in v) ** 0.5 or 1.0
+        out.append([x / norm for x in v])
+    return out
+
+
+def probe_query_latency(col, n: int = 20, top_k: int = 5) -> Dict[str, float]:
+    """Median / max latency (ms) of unfiltered queries with random vectors."""
+    sample = col.peek(1)
+    embs = sample.get("embeddings")
+    if embs is None or len(embs) == 0:
+        return {"p50_ms": 0.0, "max_ms": 0.0}
+    lat = []
+    for v in _random_unit_vectors(len(embs[0]), n):
+        t0 = time.perf_counter()
+        col.query(query_embeddings=[v], n_results=top_k, include=["distances"])
+        lat.append((time.perf_counter() - t0) * 1000.0)
+    lat.sort()
+    return {"p50_ms": lat[len(lat) // 2], "max_ms": lat[-1]}
+
+
+def _next_generation_name(current: str) -> str:
+    """guidelines -> guidelines__g2 -> guidelines__g3 ..."""
+    m = re.fullmatch(r"(.+)__g(\d+)", current)
+    if m:
+        return f"{m.group(1)}__g{int(m.group(2)) + 1}"
+    return f"{current}__g2"
+
+
+def next_generation(store: ChromaVectorStore) -> str:
+    """Name for the next generation of the active collection, skipping the
+    previous generation a re-embedding migration keeps for rollback."""
+    name = _next_generation_name(store.collection_name)
+    while name == store.state.read().get("previous_collection"):
+        name = _next_generation_name(name)
+    return name
+
+
+def _hnsw_configuration(col) -> Dict[str, Any] | None:
+    cfg = getattr(col, "configuration", None) or {}
+    hnsw = cfg.get("hnsw") if isinstance(cfg, dict) else None
+    if not hnsw:
+        return None
+    keep = ("space", "ef_construction", "ef_search", "max_neighbors")
+    return {"hnsw": {k: hnsw[k] for k in keep if k in hnsw}}
+
+
+def create_generation(store: ChromaVectorStore, name: str):
+    """Empty collection `name` with the active collection's metadata and the
+    configured HNSW parameters (a leftover from a failed run is dropped)."""
+    old = store.client.get_collection(store.collection_name)
+    _drop_collection(store, name)
+    # legacy "hnsw:*" metadata keys would conflict with the configuration
+    meta = {k: v for k, v in (old.metadata or {}).items() if not k.startswith("hnsw:")}
+    return store.client.create_collection(
+        name=name,
+        metadata=meta or None,
+        configuration=hnsw_configuration(),
+    )
+
+
+def docs_generation(store: ChromaVectorStore, name: str):
+    """Empty document-profile companion for generation `name`."""
+    docs_name = doc_collection_name(name)
+    _drop_collection(store, docs_name)
+    return store.client.create_collection(
+        name=docs_name, configuration=hnsw_configuration()
+    )
+
+
+def drop_docs(store: ChromaVectorStore, name: str) -> None:
+    """Drop the document-profile companion of generation `name`, if any."""
+    _drop_collection(store, doc_collection_name(name))
+
+
+def _drop_collection(store: ChromaVectorStore, name: str) -> None:
+    """Delete collection `name`; a missing one is fine, other failures are
+    logged (creating a collection of that name then fails loudly)."""
+    from chromadb.errors import NotFoundError
+
+    try:
+        store.client.delete_collection(name)
+    except NotFoundError:
+        pass
+    except Exception:
+        logger.exception("Could not drop collection %s", name)
+
+
+def _copy_ids(src, dst, ids: List[str], batch_size: int) -> None:
+    for i in range(0, len(ids), batch_size):
+        res = src.get(
+            ids=ids[i : i + batch_size],
+            include=["embeddings", "documents", "metadatas"],
+        )
+        if res["ids"]:
+            dst.upsert(
+                ids=res["ids"],
+                embeddings=res["embeddings"],
+                documents=res["documents"],
+                metadatas=res["metadatas"],
+            )
+
+
+def _fingerprints(col, batch_size: int) -> Dict[str, str]:
+    """{id: hash of the stored text and metadata}; re-upserted chunks and
+    metadata-only updates change it."""
+    out: Dict[str, str] = {}
+    offset = 0
+    while True:
+        res = col.get(
+            limit=batch_size, offset=offset, include=["metadatas", "documents"]
+        )
+        if not res["ids"]:
+            return out
+        for i, meta, doc in zip(res["ids"], res["metadatas"], res["documents"]):
+            out[i] = content_hash(
+                (doc or "") + "\0" + json.dumps(meta or {}, sort_keys=True)
+            )
+        offset += len(res["ids"])
+
+
+def sync_copy(src, dst, batch_size: int) -> Dict[str, int]:
+    """Make `dst` hold exactly the entries of `src`, copying (vectors
+    included) only those that are missing or changed."""
+    want = _fingerprints(src, batch_size)
+    have = _fingerprints(dst, batch_size)
+    todo = [i for i, h in want.items() if have.get(i) != h]
+    gone = [i for i in have if i not in want]
+    _copy_ids(src, dst, todo, batch_size)
+    for i in range(0, len(gone), batch_size):
+        dst.delete(ids=gone[i : i + batch_size])
+    return {"copied": len(todo), "removed": len(gone)}
+
+
+def all_ids(col, batch_size: int) -> List[str]:
+    ids: List[str] = []
+    offset = 0
+    while True:
+        res = col.get(limit=batch_size, offset=offset, include=[])
+        if not res["ids"]:
+            return ids
+        ids.extend(res["ids"])
+        offset += len(res["ids"])
+
+
+def compact(store: ChromaVectorStore, batch_size: int = 500) -> Dict[str, Any]:
+    """
+    Rebuild the active collection without tombstones and switch to it.
+
+    Chroma's HNSW index only marks deleted entries, so after many document
+    deletions every search still walks them. Compaction copies the live
+    entries (vectors included, no re-embedding) into a fresh generation
+    while writes continue, then holds the store's writer lock to catch up on
+    writes made during the copy (by content hash, so re-upserted chunks are
+    refreshed too) and flip the active-collection pointer, and finally drops
+    the old generation.
+
+    The new generation is built with the configured HNSW parameters
+    (HNSW_SPACE / HNSW_M / HNSW_EF_*), so this is also how an existing index
+    picks up changed settings.
+    """
+    old_name = store.collection_name
+    old = store.client.get_collection(old_name)
+    before = {
+        "collection": old_name,
+        "entries": old.count(),
+        "hnsw": _hnsw_configuration(old),
+        "deleted_since_compaction": store.state.deleted_since_compaction(),
+        "disk_bytes": dir_size_bytes(store.persist_dir),
+        "query_latency": probe_query_latency(old),
+    }
+
+    new_name = next_generation(store)
+    new = create_generation(store, new_name)
+    old_docs, new_docs = store.docs_col, docs_generation(store, new_name)
+
+    t0 = time.perf_counter()
+    sync_copy(old, new, batch_size)
+    sync_copy(old_docs, new_docs, batch_size)
+    copy_s = time.perf_counter() - t0
+
+    # writers wait from here to the switch, then write to the new generation
+    with store.writing():
+        t1 = time.perf_counter()
+        caught_up = sync_copy(old, new, batch_size)
+        sync_copy(old_docs, new_docs, batch_size)
+        store.state.update(active_collection=new_name, deleted_since_compaction=0)
+        switch_s = time.perf_counter() - t1
+    store.client.delete_collection(old_name)
+    drop_docs(store, old_name)
+
+    after = {
+        "collection": new_name,
+        "entries": new.count(),
+        "hnsw": _hnsw_configuration(new),
+        "disk_bytes": dir_size_bytes(store.persist_dir),
+        "query_latency": probe_query_latency(new),
+    }
+    return {
+        "before": before,
+        "after": after,
+        "copy_seconds": round(copy_s, 3),
+        "caught_up": caught_up,
+        "switch_seconds": round(switch_s, 3),
+    }
+
+
+def compact_store(store) -> Dict[str, Any]:
+    """compact() for a single collection, or every non-empty shard."""
+    from core.retrieval.migration import migration
+    from core.retrieval.service import RemoteVectorStore
+    from core.retrieval.sharding import ShardedVectorStore
+
+    if isinstance(store, RemoteVectorStore):
+        return store.compact()  # runs inside the retrieval service
+    if migration.running():
+        raise RuntimeError("A re-embedding migration is running; compact later.")
+    if not isinstance(store, ShardedVectorStore):
+        return compact(store)
+    return {
+        "shards": {
+            key: compact(shard)
+            for key, shard in store.shards().items()
+            if shard.count() or shard.deleted_since_compaction()
+        }
+    }
@@ -0,0 +1,517 @@
+"""
+Blue/green re-embedding: move the index to another embedding model while the
+current generation keeps serving.
+
+A migration builds the next generation of the active collection (of every
+shard, when sharded) from the stored chunk texts, embedding them with the
+target model at a throttled rate. It then catches up on writes made in the
+meantime, validates the new generation, and switches every shard's
+IndexState to it together, or none of them. Each switch changes the active
+collection and the recorded embedding model in one atomic file replace, so a
+query vector is never searched against vectors of another model. The previous generation is kept for `rollback`
+until `cleanup` drops it.
+
+Validation gates the switch:
+- coverage: the new generation holds (almost) every live chunk
+- self-recall@1: sampled stored vectors find themselves (index sanity)
+- eval overlap@k: for the eval questions, the share of the current top-k
+  chunks the new generation also returns (the models should broadly agree)
+- eval documents: an eval question labelled with its document(s) must find
+  one of them in the new top-k (when the document is indexed at all)
+
+The eval questions default to the "ask" questions of eval/dataset.jsonl, with
+their `doc_id`/`doc_ids` labels; the report says when that file is missing
+and the eval checks were skipped.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from apps.api.config import settings
+from core.ingestion.versioning import content_hash
+from core.resilience.ratelimit import RateLimiter
+from core.retrieval.embedder import OpenAIEmbedder
+from core.retrieval.maintenance import (
+    all_ids,
+    create_generation,
+    docs_generation,
+    drop_docs,
+    next_generation,
+)
+from core.retrieval.vectorstore import ChromaVectorStore, doc_collection_name
+
+MIN_SELF_RECALL = 0.95
+MIN_COVERAGE = 0.99  # writes landing during validation are caught up at switch
+
+# resolved from the source tree, not the working directory
+EVAL_DATASET = Path(__file__).resolve().parents[2] / "eval" / "dataset.jsonl"
+
+
+def eval_questions(path: Path | None = None) -> List[tuple[str, List[str]]] | None:
+    """(question, expected doc ids) for the "ask" rows of the eval set; None
+    when the file is missing. Rows without a label expect no document."""
+    path = path or EVAL_DATASET
+    if not path.exists():
+        return None
+    rows = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+    return [
+        (r["question"], r.get("doc_ids") or ([r["doc_id"]] if r.get("doc_id") else []))
+        for r in rows
+        if r.get("type", "ask") == "ask" and r.get("question")
+    ]
+
+
+def _collections(store) -> Dict[str, ChromaVectorStore]:
+    from core.retrieval.sharding import ShardedVectorStore
+
+    if isinstance(store, ShardedVectorStore):
+        return store.shards()
+    return {"": store}
+
+
+def _embedder(model: str) -> OpenAIEmbedder:
+    return OpenAIEmbedder(
+        api_key=settings.openai_api_key,
+        model=model,
+        rate_limiter=RateLimiter(settings.migration_embed_rps),
+    )
+
+
+def _content_hashes(col, batch_size: int = 1000) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    offset = 0
+    while True:
+        res = col.get(
+            limit=batch_size, offset=offset, include=["metadatas", "documents"]
+        )
+        if not res["ids"]:
+            return out
+        for i, meta, doc in zip(res["ids"], res["metadatas"], res["documents"]):
+            out[i] = (meta or {}).get("content_hash") or content_hash(doc or "")
+        offset += len(res["ids"])
+
+
+def sync_collection(
+    src,
+    dst,
+    embedder: OpenAIEmbedder,
+    model: str,
+    batch_size: int = 50,
+    on_progress: Callable[[int], None] | None = None,
+) -> Dict[str, int]:
+    """Make `dst` hold exactly the chunks of `src` (by id and content hash),
+    embedding their stored text with `model`; vectors are never copied."""
+    want = _content_hashes(src)
+    have = _content_hashes(dst)
+    todo = [i for i, h in want.items() if have.get(i) != h]
+    gone = [i for i in have if i not in want]
+    for i in range(0, len(todo), batch_size):
+        res = src.get(ids=todo[i : i + batch_size], include=["documents", "metadatas"])
+        if res["ids"]:
+            dst.upsert(
+                ids=res["ids"],
+                documents=res["documents"],
+                metadatas=res["metadatas"],
+                embeddings=embedder.embed(res["documents"], model=model),
+            )
+        if on_progress:
+            on_progress(len(res["ids"]))
+    for i in range(0, len(gone), 500):
+        dst.delete(ids=gone[i : i + 500])
+    return {"embedded": len(todo), "removed": len(gone)}
+
+
+def self_recall(col, sample: int = 50, seed: int = 0) -> float:
+    ids = all_ids(col, 1000)
+    if not ids:
+        return 1.0
+    picked = random.Random(seed).sample(ids, min(sample, len(ids)))
+    res = col.get(ids=picked, include=["embeddings"])
+    found = col.query(query_embeddings=res["embeddings"], n_results=1, include=[])
+    hits = sum(1 for i, top in zip(res["ids"], found["ids"]) if top and top[0] == i)
+    return hits / len(res["ids"])
+
+
+def _top(cols: List[Any], embedding: List[float], k: int) -> List[tuple[str, str]]:
+    """(chunk id, doc_id) of the k nearest chunks across `cols`."""
+    hits: List[tuple[float, str, str]] = []
+    for col in cols:
+        if col.count() == 0:
+            continue
+        res = col.query(
+            query_embeddings=[embedding],
+            n_results=k,
+            include=["distances", "metadatas"],
+        )
+        for dist, i, meta in zip(
+            res["distances"][0], res["ids"][0], res["metadatas"][0]
+        ):
+            hits.append((dist, i, (meta or {}).get("doc_id", "")))
+    return [(i, doc_id) for _, i, doc_id in sorted(hits)[:k]]
+
+
+def eval_overlap(
+    current: List[Any],
+    new: List[Any],
+    questions: List[str],
+    embedder: OpenAIEmbedder,
+    current_model: str,
+    new_model: str,
+    k: int = 5,
+) -> float | None:
+    """Mean share of each question's current top-k found in the new top-k."""
+    if not questions:
+        return None
+    before_q = embedder.embed(questions, model=current_model)
+    after_q = embedder.embed(questions, model=new_model)
+    scores = []
+    for qb, qa in zip(before_q, after_q):
+        before = {i for i, _ in _top(current, qb, k)}
+        if before:
+            after = {i for i, _ in _top(new, qa, k)}
+            scores.append(len(after & before) / len(before))
+    return round(sum(scores) / len(scores), 4) if scores else None
+
+
+def eval_documents(
+    current: List[Any],
+    new: List[Any],
+    labelled: List[tuple[str, List[str]]],
+    embedder: OpenAIEmbedder,
+    new_model: str,
+    k: int = 5,
+) -> Dict[str, Any]:
+    """Labelled eval questions whose expected documents are indexed, and the
+    ones among them whose new top-k holds none of those documents."""
+    indexed = {
+        doc_id
+        for _, doc_ids in labelled
+        for doc_id in doc_ids
+        if any(c.get(where={"doc_id": doc_id}, limit=1)["ids"] for c in current)
+    }
+    checked = [
+        (q, [d for d in doc_ids if d in indexed])
+        for q, doc_ids in labelled
+        if indexed.intersection(doc_ids)
+    ]
+    missed = []
+    if checked:
+        vectors = embedder.embed([q for q, _ in checked], model=new_model)
+        for (q, doc_ids), vector in zip(checked, vectors):
+            if not {d for _, d in _top(new, vector, k)}.intersection(doc_ids):
+                missed.append(q)
+    return {"checked": len(checked), "missed": missed}
+
+
+def migrate(
+    store,
+    embed_model: str,
+    min_overlap: float,
+    questions: List[str] | None,
+    on_phase: Callable[[str], None] = lambda phase: None,
+    on_progress: Callable[[int], None] | None = None,
+) -> Dict[str, Any]:
+    """Build, validate and (if it passes) switch to a re-embedded generation.
+    `questions=None` uses the eval set, with its document labels."""
+    t0 = time.perf_counter()
+    warnings: List[str] = []
+    if questions is None:
+        labelled = eval_questions()
+        if labelled is None:
+            warnings.append(
+                f"Eval dataset {EVAL_DATASET} not found: eval checks skipped."
+            )
+            labelled = []
+    else:
+        labelled = [(q, []) for q in questions]
+    questions = [q for q, _ in labelled]
+    shards = _collections(store)
+    current_model = store.embed_model or settings.openai_embed_model
+    embedder = _embedder(embed_model)
+
+    names = {key: (s.collection_name, next_generation(s)) for key, s in shards.items()}
+    new_cols = {key: create_generation(s, names[key][1]) for key, s in shards.items()}
+    new_docs = {key: docs_generation(s, names[key][1]) for key, s in shards.items()}
+
+    on_phase("building")
+    built = {
+        key: sync_collection(
+            s.col, new_cols[key], embedder, embed_model, on_progress=on_progress
+        )
+        for key, s in shards.items()
+    }
+    # catch up on ingests/deletes made while building
+    for key, s in shards.items():
+        sync_collection(
+            s.col, new_cols[key], embedder, embed_model, on_progress=on_progress
+        )
+        sync_collection(s.docs_col, new_docs[key], embedder, embed_model)
+
+    on_phase("validating")
+    live = sum(s.count() for s in shards.values())
+    rebuilt = sum(c.count() for c in new_cols.values())
+    checks: Dict[str, Any] = {
+        "entries": {"current": live, "new": rebuilt},
+        "coverage": round(rebuilt / live, 4) if live else 1.0,
+        "self_recall_at_1": min(
+            (self_recall(c) for c in new_cols.values() if c.count()), default=1.0
+        ),
+        "eval_overlap_at_k": eval_overlap(
+            [s.col for s in shards.values()],
+            list(new_cols.values()),
+            questions,
+            embedder,
+            current_model,
+            embed_model,
+        ),
+        "eval_questions": len(questions),
+        "eval_documents": eval_documents(
+            [s.col for s in shards.values()],
+            list(new_cols.values()),
+            [(q, doc_ids) for q, doc_ids in labelled if doc_ids],
+            embedder,
+            embed_model,
+        ),
+    }
+    passed = (
+        checks["coverage"] >= MIN_COVERAGE
+        and checks["self_recall_at_1"] >= MIN_SELF_RECALL
+        and not checks["eval_documents"]["missed"]
+        and (
+            checks["eval_overlap_at_k"] is None
+            or checks["eval_overlap_at_k"] >= min_overlap
+        )
+    )
+    report: Dict[str, Any] = {
+        "from_model": current_model,
+        "to_model": embed_model,
+        "collections": {
+            key: {"from": old, "to": new} for key, (old, new) in names.items()
+        },
+        "built": built,
+        "checks": checks,
+        "min_overlap": min_overlap,
+        "switched": False,
+        "warnings": warnings,
+    }
+    if not passed:
+        for key, s in shards.items():
+            s.client.delete_collection(names[key][1])
+            drop_docs(s, names[key][1])
+        report["seconds"] = round(time.perf_counter() - t0, 2)
+        return report
+
+    on_phase("switching")
+    _switch(shards, names, new_cols, new_docs, embedder, embed_model, current_model)
+    report["switched"] = True
+    report["seconds"] = round(time.perf_counter() - t0, 2)
+    return report
+
+
+_SWITCHED_FIELDS = (
+    "active_collection",
+    "embed_model",
+    "previous_collection",
+    "previous_embed_model",
+)
+
+
+def _switch(
+    shards: Dict[str, ChromaVectorStore],
+    names: Dict[str, tuple[str, str]],
+    new_cols: Dict[str, Any],
+    new_docs: Dict[str, Any],
+    embedder: OpenAIEmbedder,
+    embed_model: str,
+    current_model: str,
+) -> None:
+    """Switch every shard or none: the final catch-ups all run under every
+    shard's writer lock (no write may land in an old generation after its
+    catch-up), then the state pointers are written together, and restored
+    if any step fails. A half-switched index would embed queries for one
+    shard with the other shards' model."""
+    before: Dict[str, Dict[str, Any]] = {}
+    try:
+        with ExitStack() as held:
+            for s in shards.values():
+                held.enter_context(s.writing())
+            for key, s in shards.items():
+                sync_collection(s.col, new_cols[key], embedder, embed_model)
+                sync_collection(s.docs_col, new_docs[key], embedder, embed_model)
+            for key, s in shards.items():
+                old_name, new_name = names[key]
+                state = s.state.read()
+                before[key] = {f: state.get(f) for f in _SWITCHED_FIELDS}
+                s.state.update(
+                    active_collection=new_name,
+                    embed_model=embed_model,
+                    previous_collection=old_name,
+                    previous_embed_model=current_model,
+                )
+    except BaseException:
+        for key, fields in before.items():
+            shards[key].state.update(**fields)
+        for key, s in shards.items():
+            s.client.delete_collection(names[key][1])
+            drop_docs(s, names[key][1])
+        raise
+    for s in shards.values():
+        s.state.bump_version()
+
+
+def rollback(store) -> Dict[str, Any]:
+    """Switch back to the kept previous generation (catching it up on writes
+    made since the switch); the newer one becomes the kept generation."""
+    out: Dict[str, Any] = {}
+    for key, s in _collections(store).items():
+        state = s.state.read()
+        previous = state.get("previous_collection")
+        if not previous:
+            continue
+        model = state.get("previous_embed_model") or settings.openai_embed_model
+        with s.writing():
+            synced = sync_collection(
+                s.col, s.client.get_collection(previous), _embedder(model), model
+            )
+            sync_collection(
+                s.docs_col,
+                s.client.get_or_create_collection(doc_collection_name(previous)),
+                _embedder(model),
+                model,
+            )
+            current = s.collection_name
+            s.state.update(
+                active_collection=previous,
+                embed_model=model,
+                previous_collection=current,
+                previous_embed_model=state.get("embed_model"),
+            )
+        s.state.bump_version()
+        out[key] = {"from": current, "to": previous, "caught_up": synced}
+    if not out:
+        raise RuntimeError("No previous generation to roll back to.")
+    return out
+
+
+def cleanup(store) -> Dict[str, Any]:
+    """Drop the previous generation kept by the last migration or rollback."""
+    dropped: Dict[str, Any] = {}
+    for key, s in _collections(store).items():
+        previous = s.state.read().get("previous_collection")
+        if previous:
+            s.client.delete_collection(previous)
+            drop_docs(s, previous)
+            s.state.update(previous_collection=None, previous_embed_model=None)
+            dropped[key] = previous
+    return {"dropped": dropped}
+
+
+class Migration:
+    """The background migration of this process (one at a time)."""
+
+    _ACTIVE = ("building", "validating", "switching")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._info: Dict[str, Any] = {"status": "idle"}
+
+    def running(self) -> bool:
+        with self._lock:
+            return self._info["status"] in self._ACTIVE
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._info)
+
+    def _set(self, **changes: Any) -> None:
+        with self._lock:
+            self._info.update(changes)
+
+    def _progress(self, n: int) -> None:
+        with self._lock:
+            self._info["embedded"] = self._info.get("embedded", 0) + n
+
+    def start(
+        self,
+        store,
+        embed_model: str,
+        min_overlap: float,
+        questions: List[str] | None,
+    ) -> Dict[str, Any]:
+        kept = [
+            s.state.read().get("previous_collection")
+            for s in _collections(store).values()
+        ]
+        with self._lock:
+            if self._info["status"] in self._ACTIVE:
+                raise RuntimeError("A re-embedding migration is already running.")
+            if any(kept):
+                raise RuntimeError(
+                    "A previous generation is still kept; roll back or clean up first."
+                )
+            self._info = {
+                "status": "building",
+                "embed_model": embed_model,
+                "started_at": time.time(),
+                "total": store.count(),
+                "embedded": 0,
+            }
+        threading.Thread(
+            target=self._run,
+            args=(store, embed_model, min_overlap, questions),
+            name="reembed",
+            daemon=True,
+        ).start()
+        return self.snapshot()
+
+    def _run(self, store, embed_model: str, min_overlap: float, questions) -> None:
+        try:
+            report = migrate(
+                store,
+                embed_model,
+                min_overlap,
+                questions,
+                on_phase=lambda phase: self._set(status=phase),
+                on_progress=self._progress,
+            )
+            self._set(
+                status="done" if report["switched"] else "failed_validation",
+                report=report,
+            )
+        except Exception as e:
+            self._set(status="error", error=str(e))
+
+
+migration = Migration()
+
+
+def migration_action(store, action: str, *args: Any) -> Dict[str, Any]:
+    """start | status | rollback | cleanup, for the index API; with a remote
+    store it runs inside the retrieval service that owns the index."""
+    from core.retrieval.service import RemoteVectorStore
+
+    if isinstance(store, RemoteVectorStore):
+        return store.migration(action, *args)
+    if action == "start":
+        return migration.start(store, *args)
+    if action == "status":
+        kept = {
+            key: s.state.read().get("previous_collection")
+            for key, s in _collections(store).items()
+        }
+        return {
+            **migration.snapshot(),
+            "previous_collections": {k: v for k, v in kept.items() if v},
+        }
+    if action in ("rollback", "cleanup"):
+        if migration.running():
+            raise RuntimeError("A re-embedding migration is running.")
+        return rollback(store) if action == "rollback" else cleanup(store)
+    raise ValueError(f"Unknown migration action: {action}")
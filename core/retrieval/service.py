@@ -0,0 +1,433 @@
+"""
+Retrieval service: one process owns the Chroma index, API workers query it.
+
+Chroma's PersistentClient is not safe with several writer processes on one
+directory and every process would load its own copy of the HNSW index. With
+RETRIEVAL_SOCKET set, the API talks to a single `serve()` process instead
+(single writer, many concurrent readers) through RemoteVectorStore, which has
+the ChromaVectorStore interface. Embeddings are computed by the callers, so
+the service never needs an OpenAI key.
+
+Wire format: 4-byte big-endian length + JSON, request/response pairs over a
+persistent Unix-socket connection; clients keep a small pool of connections.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import socket
+import socketserver
+import struct
+from pathlib import Path
+from threading import BoundedSemaphore, Lock
+from typing import Any, Dict, List, Optional
+
+from core.ingestion.versioning import content_hash
+from core.resilience.deadline import Deadline
+from core.retrieval.embedder import OpenAIEmbedder
+
+_FRAME = struct.Struct(">I")
+
+_READS = {
+    "existing_chunk_ids",
+    "doc_index",
+    "get_embeddings",
+    "index_version",
+    "count",
+    "deleted_since_compaction",
+    "deleted_fraction",
+    "query_embeddings",
+    "doc_profile_hash",
+    "doc_count",
+    "doc_candidates",
+}
+# answered from the store's state alone: safe to resend
+_IDEMPOTENT = _READS | {"ping", "space", "collection_name", "embed_model"}
+_WRITES = {
+    "upsert_chunks",
+    "update_metadata",
+    "delete_chunks",
+    "delete_doc",
+    "adopt_embed_model",
+    "upsert_doc_profile",
+}
+
+
+class RemoteStoreError(RuntimeError):
+    """An error raised inside the retrieval service."""
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("retrieval socket closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def send_msg(sock: socket.socket, obj: Any) -> None:
+    data = json.dumps(obj).encode()
+    sock.sendall(_FRAME.pack(len(data)) + data)
+
+
+def recv_msg(sock: socket.socket) -> Any:
+    (n,) = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    return json.loads(_recv_exact(sock, n))
+
+
+# -- server ----------------------------------------------------------------
+
+
+class RetrievalService:
+    """Dispatches requests to the local store; writes are serialized.
+
+    Compaction and migration only take the store's writer lock for their
+    final catch-up and switch, so reads and writes keep flowing while they
+    copy; `_maintenance_lock` just keeps two of them from overlapping.
+    """
+
+    def __init__(self, store) -> None:
+        self.store = store
+        self._write_lock = Lock()
+        self._maintenance_lock = Lock()
+
+    def dispatch(self, method: str, args: list, kwargs: dict) -> Any:
+        if method == "ping":
+            return "pong"
+        if method in ("space", "collection_name", "embed_model"):
+            return getattr(self.store, method)
+        if method == "compact":
+            from core.retrieval.maintenance import compact_store
+
+            with self._maintenance_lock:
+                return compact_store(self.store)
+        if method == "migration":
+            from core.retrieval.migration import migration_action
+
+            if args and args[0] == "status":
+                return migration_action(self.store, *args)
+            with self._maintenance_lock:
+                return migration_action(self.store, *args)
+        if method in _WRITES:
+            with self._write_lock:
+                result = getattr(self.store, method)(*args, **kwargs)
+        elif method in _READS:
+            result = getattr(self.store, method)(*args, **kwargs)
+        else:
+            raise ValueError(f"Unknown retrieval method: {method}")
+        return sorted(result) if isinstance(result, set) else result
+
+
+def serve(socket_path: str, store) -> None:
+    """Serve `store` on a Unix socket until interrupted."""
+    service = RetrievalService(store)
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self) -> None:
+            while True:
+                try:
+                    req = recv_msg(self.request)
+                except ConnectionError:
+                    return
+                try:
+                    result = service.dispatch(
+                        req["method"], req.get("args", []), req.get("kwargs", {})
+                    )
+                    resp = {"ok": True, "result": result}
+                except Exception as e:
+                    resp = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                send_msg(self.request, resp)
+
+    path = Path(socket_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()  # stale socket from a previous run
+    socketserver.ThreadingUnixStreamServer.daemon_threads = True
+    with socketserver.ThreadingUnixStreamServer(str(path), Handler) as server:
+        try:
+            server.serve_forever()
+        finally:
+            path.unlink(missing_ok=True)
+
+
+# -- client ----------------------------------------------------------------
+
+
+class _NotSent(ConnectionError):
+    """The request never reached the service, so it is safe to resend."""
+
+
+def _closed_by_peer(sock: socket.socket) -> bool:
+    """An idle connection the service has closed (e.g. it restarted)."""
+    sock.setblocking(False)  # callers set their timeout again afterwards
+    try:
+        return sock.recv(1, socket.MSG_PEEK) == b""
+    except BlockingIOError:
+        return False  # open, nothing to read
+    except OSError:
+        return True
+
+
+class _ConnectionPool:
+    def __init__(self, socket_path: str, size: int, timeout_s: float) -> None:
+        self.socket_path = socket_path
+        self.timeout_s = timeout_s
+        self._idle: "queue.LifoQueue[socket.socket]" = queue.LifoQueue()
+        self._slots = BoundedSemaphore(max(1, size))
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout_s)
+        sock.connect(self.socket_path)
+        return sock
+
+    @staticmethod
+    def _roundtrip(sock: socket.socket, payload: Dict[str, Any]) -> Any:
+        try:
+            send_msg(sock, payload)
+        except OSError as e:
+            sock.close()
+            raise _NotSent(str(e)) from e
+        try:
+            return recv_msg(sock)
+        except BaseException:
+            sock.close()
+            raise
+
+    def request(
+        self,
+        payload: Dict[str, Any],
+        idempotent: bool = False,
+        timeout_s: float | None = None,
+    ) -> Any:
+        """Send `payload` and wait up to `timeout_s` (default: the pool's) for
+        the answer. A stale pooled connection is replaced; a request that may
+        have reached the service is only resent when `idempotent`."""
+        with self._slots:
+            try:
+                sock: socket.socket | None = self._idle.get_nowait()
+            except queue.Empty:
+                sock = None
+            if sock is not None and _closed_by_peer(sock):
+                sock.close()
+                sock = None
+            if sock is not None:
+                sock.settimeout(timeout_s or self.timeout_s)
+                try:
+                    resp = self._roundtrip(sock, payload)
+                except _NotSent:
+                    sock = None
+                except ConnectionError:
+                    if not idempotent:
+                        raise
+                    sock = None  # lost the answer of a read: ask again
+            if sock is None:
+                sock = self._connect()
+                sock.settimeout(timeout_s or self.timeout_s)
+                resp = self._roundtrip(sock, payload)
+            self._idle.put(sock)
+        return resp
+
+
+_pools: Dict[str, _ConnectionPool] = {}
+_pools_lock = Lock()
+
+
+def _pool_for(socket_path: str, size: int, timeout_s: float) -> _ConnectionPool:
+    with _pools_lock:
+        pool = _pools.get(socket_path)
+        if pool is None:
+            pool = _pools[socket_path] = _ConnectionPool(socket_path, size, timeout_s)
+        return pool
+
+
+class RemoteVectorStore:
+    """ChromaVectorStore interface backed by the retrieval service."""
+
+    def __init__(
+        self,
+        socket_path: str,
+        embedder: OpenAIEmbedder | None,
+        persist_dir: str,
+        pool_size: int = 8,
+        timeout_s: float = 60.0,
+        maintenance_timeout_s: float = 3600.0,
+    ):
+        self.socket_path = socket_path
+        self.embedder = embedder
+        self.persist_dir = Path(persist_dir)
+        self.maintenance_timeout_s = maintenance_timeout_s
+        self._pool = _pool_for(socket_path, pool_size, timeout_s)
+        self._embed_model: tuple[str, str | None] | None = None
+
+    def _call(
+        self, method: str, *args: Any, timeout_s: float | None = None, **kwargs: Any
+    ) -> Any:
+        resp = self._pool.request(
+            {"method": method, "args": args, "kwargs": kwargs},
+            idempotent=method in _IDEMPOTENT,
+            timeout_s=timeout_s,
+        )
+        if not resp["ok"]:
+            raise RemoteStoreError(resp["error"])
+        return resp["result"]
+
+    def ping(self) -> bool:
+        return self._call("ping") == "pong"
+
+    @property
+    def collection_name(self) -> str:
+        return self._call("collection_name")
+
+    @property
+    def space(self) -> str:
+        return self._call("space")
+
+    def adopt_embed_model(self, model: str) -> str:
+        return self._call("adopt_embed_model", model)
+
+    @property
+    def embed_model(self) -> str | None:
+        # a plain read of the recorded model, cached until the index changes;
+        # adopting (a write) happens at most once per client
+        if self.embedder is None:
+            return self._call("embed_model")
+        version = self.index_version()
+        cached = self._embed_model
+        if cached is None or cached[0] != version:
+            model = self._call("embed_model")
+            if model is None:
+                model = self.adopt_embed_model(self.embedder.model)
+            cached = self._embed_model = (version, model)
+        return cached[1]
+
+    def upsert_chunks(
+        self,
+        doc_id: str,
+        title: str | None,
+        source: str | None,
+        category: str | None,
+        chunks: List[Dict[str, Any]],
+        batch_size: int = 50,
+    ) -> int:
+        # embed here, batch by batch, so the service only stores vectors
+        total = 0
+        for i in range(0, len(chunks), batch_size):
+            batch = [dict(c) for c in chunks[i : i + batch_size]]
+            missing = [c for c in batch if c.get("embedding") is None]
+            if missing:
+                fresh = self.embedder.embed(
+                    [c["text"] for c in missing], model=self.embed_model
+                )
+                for c, emb in zip(missing, fresh):
+                    c["embedding"] = emb
+            total += self._call(
+                "upsert_chunks", doc_id, title, source, category, batch, batch_size
+            )
+        return total
+
+    def upsert_doc_profile(
+        self,
+        doc_id: str,
+        title: str | None,
+        category: str | None,
+        text: str,
+        embedding: List[float] | None = None,
+    ) -> bool:
+        if self.doc_profile_hash(doc_id) == content_hash(text):
+            return False
+        if embedding is None:
+            embedding = self.embedder.embed([text], model=self.embed_model)[0]
+        return self._call(
+            "upsert_doc_profile", doc_id, title, category, text, embedding
+        )
+
+    def doc_profile_hash(self, doc_id: str) -> str | None:
+        return self._call("doc_profile_hash", doc_id)
+
+    def doc_count(self) -> int:
+        return self._call("doc_count")
+
+    def doc_candidates(
+        self, embeddings: List[List[float]], n: int
+    ) -> List[List[Dict[str, Any]]]:
+        return self._call("doc_candidates", embeddings, n)
+
+    def existing_chunk_ids(self, doc_id: str) -> set[str]:
+        return set(self._call("existing_chunk_ids", doc_id))
+
+    def doc_index(self, doc_id: str) -> Dict[str, str]:
+        return self._call("doc_index", doc_id)
+
+    def get_embeddings(
+        self, doc_id: str, chunk_ids: List[str]
+    ) -> Dict[str, List[float]]:
+        return self._call("get_embeddings", doc_id, chunk_ids)
+
+    def update_metadata(
+        self,
+        doc_id: str,
+        chunk_ids: List[str],
+        title: str | None,
+        source: str | None,
+        category: str | None,
+        batch_size: int = 500,
+    ) -> None:
+        self._call(
+            "update_metadata", doc_id, chunk_ids, title, source, category, batch_size
+        )
+
+    def delete_chunks(
+        self, doc_id: str, chunk_ids: List[str], batch_size: int = 500
+    ) -> int:
+        return self._call("delete_chunks", doc_id, chunk_ids, batch_size)
+
+    def delete_doc(self, doc_id: str, batch_size: int = 500) -> int:
+        return self._call("delete_doc", doc_id, batch_size)
+
+    def index_version(self) -> str:
+        return self._call("index_version")
+
+    def count(self) -> int:
+        return self._call("count")
+
+    def deleted_since_compaction(self) -> int:
+        return self._call("deleted_since_compaction")
+
+    def deleted_fraction(self) -> float:
+        return self._call("deleted_fraction")
+
+    # maintenance rebuilds whole collections: not bound by the request timeout
+    def compact(self) -> Dict[str, Any]:
+        return self._call("compact", timeout_s=self.maintenance_timeout_s)
+
+    def migration(self, action: str, *args: Any) -> Dict[str, Any]:
+        return self._call(
+            "migration", action, *args, timeout_s=self.maintenance_timeout_s
+        )
+
+    def query(
+        self,
+        question: str,
+        top_k: int = 5,
+        doc_id: Optional[str] = None,
+        deadline: Deadline | None = None,
+    ) -> List[Dict[str, Any]]:
+        q_emb = self.embedder.embed(
+            [question], deadline=deadline, model=self.embed_model
+        )[0]
+        if deadline is not None:
+            deadline.check("vector search")
+        return self.query_embeddings([q_emb], top_k=top_k, doc_id=doc_id)[0]
+
+    def query_embeddings(
+        self,
+        embeddings: List[List[float]],
+        top_k: int = 5,
+        doc_id: Optional[str] = None,
+        doc_ids: Optional[List[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        return self._call("query_embeddings", embeddings, top_k, doc_id, doc_ids)
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from apps.api.config import settings
+from core.resilience.deadline import Deadline
+from core.retrieval.embedder import OpenAIEmbedder
+from core.retrieval.index_state import DEFAULT_COLLECTION, IndexState
+from core.retrieval.vectorstore import ChromaVectorStore
+
+# Documents indexed before sharding was enabled live in the unsharded
+# collection; it stays a regular (searched) shard under this key.
+DEFAULT_SHARD = "default"
+
+_pool_lock = Lock()
+_fanout_pool: ThreadPoolExecutor | None = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _fanout_pool
+    with _pool_lock:
+        if _fanout_pool is None:
+            _fanout_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.shard_fanout_workers),
+                thread_name_prefix="shard-query",
+            )
+    return _fanout_pool
+
+
+def _slug(value: str | None) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", (value or "").lower()).strip("-")[:40]
+    return slug or "uncategorized"
+
+
+class ShardedVectorStore:
+    """
+    Same interface as ChromaVectorStore, over several collections.
+
+    Each document lives in exactly one shard, chosen on its first upsert by
+    `strategy` and persisted in index_state.json, so changing the strategy or
+    the shard count later never moves (or loses) existing documents:
+
+    - hash: `num_shards` buckets by a stable hash of the doc id
+    - category: one shard per document category
+    - size: the currently smallest of `num_shards` shards
+
+    Queries filtered to a document go straight to its shard; unfiltered
+    queries fan out to every shard in parallel and are merged into a global
+    top-k by distance. Every shard is a pinned ChromaVectorStore with its own
+    state file, so compaction and HNSW settings work per shard unchanged.
+    """
+
+    def __init__(
+        self,
+        persist_dir: str,
+        embedder: OpenAIEmbedder | None,
+        strategy: str = "hash",
+        num_shards: int = 8,
+    ):
+        self.persist_dir = Path(persist_dir)
+        self.embedder = embedder
+        self.strategy = strategy
+        self.num_shards = max(1, num_shards)
+        self.state = IndexState(self.persist_dir)
+        self._stores: Dict[str, ChromaVectorStore] = {}
+        self._lock = Lock()
+
+    # -- shard bookkeeping -------------------------------------------------
+
+    @property
+    def collection_name(self) -> str:
+        return f"{DEFAULT_COLLECTION} ({self.strategy} shards)"
+
+    def shard(self, key: str) -> ChromaVectorStore:
+        with self._lock:
+            store = self._stores.get(key)
+            if store is None:
+                if key == DEFAULT_SHARD:
+                    state = self.state
+                else:
+                    state = IndexState(
+                        self.persist_dir,
+                        name=f"index_state.{key}",
+                        default_collection=f"{DEFAULT_COLLECTION}__{key}",
+                    )
+                    # a new shard uses the index's model, not the configured one
+                    root_model = self.state.embed_model()
+                    if root_model and not state.path.exists():
+                        state.update(embed_model=root_model)
+                store = ChromaVectorStore(
+                    persist_dir=str(self.persist_dir),
+                    embedder=self.embedder,
+                    state=state,
+                )
+                self._stores[key] = store
+            return store
+
+    def shards(self) -> Dict[str, ChromaVectorStore]:
+        """Every shard that holds (or held) documents, default included."""
+        keys = {DEFAULT_SHARD, *self.state.shard_map().values()}
+        return {k: self.shard(k) for k in sorted(keys)}
+
+    def _new_shard_key(self, doc_id: str, category: str | None) -> str:
+        if self.strategy == "category":
+            return f"c-{_slug(category)}"
+        if self.strategy == "size":
+            keys = [f"s{i:02d}" for i in range(self.num_shards)]
+            return min(keys, key=lambda k: self.shard(k).count())
+        bucket = int(hashlib.sha1(doc_id.encode()).hexdigest()[:8], 16)
+        return f"h{bucket % self.num_shards:02d}"
+
+    def _for_doc(self, doc_id: str) -> ChromaVectorStore:
+        return self.shard(self.state.shard_map().get(doc_id, DEFAULT_SHARD))
+
+    def _assign(self, doc_id: str, category: str | None) -> ChromaVectorStore:
+        key = self.state.shard_map().get(doc_id)
+        if key is None:
+            # a document from before sharding keeps its vectors where they are
+            if self.shard(DEFAULT_SHARD).existing_chunk_ids(doc_id):
+                key = DEFAULT_SHARD
+            else:
+                key = self._new_shard_key(doc_id, category)
+            self.state.assign_shard(doc_id, key)
+        return self.shard(key)
+
+    def _written(self, store: ChromaVectorStore) -> None:
+        # the default shard bumps the shared state itself
+        if store.state is not self.state:
+            self.state.bump_version()
+
+    # -- ChromaVectorStore interface --------------------------------------
+
+    @property
+    def space(self) -> str:
+        return self.shard(DEFAULT_SHARD).space
+
+    def adopt_embed_model(self, model: str) -> str:
+        return self.shard(DEFAULT_SHARD).adopt_embed_model(model)
+
+    @property
+    def embed_model(self) -> str | None:
+        return self.shard(DEFAULT_SHARD).embed_model
+
+    def upsert_chunks(
+        self,
+        doc_id: str,
+        title: str | None,
+        source: str | None,
+        category: str | None,
+        chunks: List[Dict[str, Any]],
+        batch_size: int = 50,
+    ) -> int:
+        store = self._assign(doc_id, category)
+        n = store.upsert_chunks(doc_id, title, source, category, chunks, batch_size)
+        self._written(store)
+        return n
+
+    def upsert_doc_profile(
+        self,
+        doc_id: str,
+        title: str | None,
+        category: str | None,
+        text: str,
+        embedding: List[float] | None = None,
+    ) -> bool:
+        # the profile lives in the document's shard, next to its chunks
+        store = self._assign(doc_id, category)
+        written = store.upsert_doc_profile(doc_id, title, category, text, embedding)
+        if written:
+            self._written(store)
+        return written
+
+    def doc_profile_hash(self, doc_id: str) -> str | None:
+        return self._for_doc(doc_id).doc_profile_hash(doc_id)
+
+    def doc_count(self) -> int:
+        return sum(s.doc_count() for s in self.shards().values())
+
+    def doc_candidates(
+        self, embeddings: List[List[float]], n: int
+    ) -> List[List[Dict[str, Any]]]:
+        """Each shard's top-`n` documents, merged into a global top-`n`."""
+        return self._fan_out(
+            [(s.doc_candidates, (embeddings, n)) for s in self.shards().values()],
+            len(embeddings),
+            n,
+        )
+
+    def existing_chunk_ids(self, doc_id: str) -> set[str]:
+        return self._for_doc(doc_id).existing_chunk_ids(doc_id)
+
+    def doc_index(self, doc_id: str) -> Dict[str, str]:
+        return self._for_doc(doc_id).doc_index(doc_id)
+
+    def get_embeddings(
+        self, doc_id: str, chunk_ids: List[str]
+    ) -> Dict[str, List[float]]:
+        return self._for_doc(doc_id).get_embeddings(doc_id, chunk_ids)
+
+    def update_metadata(
+        self,
+        doc_id: str,
+        chunk_ids: List[str],
+        title: str | None,
+        source: str | None,
+        category: str | None,
+        batch_size: int = 500,
+    ) -> None:
+        # a changed category does not move the document to another shard
+        store = self._for_doc(doc_id)
+        store.update_metadata(doc_id, chunk_ids, title, source, category, batch_size)
+        self._written(store)
+
+    def delete_chunks(
+        self, doc_id: str, chunk_ids: List[str], batch_size: int = 500
+    ) -> int:
+        store = self._for_doc(doc_id)
+        n = store.delete_chunks(doc_id, chunk_ids, batch_size=batch_size)
+        if n:
+            self._written(store)
+        return n
+
+    def delete_doc(self, doc_id: str, batch_size: int = 500) -> int:
+        store = self._for_doc(doc_id)
+        n = store.delete_doc(doc_id, batch_size=batch_size)
+        if n:
+            self._written(store)
+        self.state.unassign_shard(doc_id)
+        return n
+
+    def index_version(self) -> str:
+        return self.state.version_key()
+
+    def count(self) -> int:
+        return sum(s.count() for s in self.shards().values())
+
+    def deleted_since_compaction(self) -> int:
+        return sum(s.deleted_since_compaction() for s in self.shards().values())
+
+    def deleted_fraction(self) -> float:
+        deleted = self.deleted_since_compaction()
+        total = self.count() + deleted
+        return deleted / total if total else 0.0
+
+    def query(
+        self,
+        question: str,
+        top_k: int = 5,
+        doc_id: Optional[str] = None,
+        deadline: Deadline | None = None,
+    ) -> List[Dict[str, Any]]:
+        q_emb = self.embedder.embed(
+            [question], deadline=deadline, model=self.embed_model
+        )[0]
+        if deadline is not None:
+            deadline.check("vector search")
+        return self.query_embeddings([q_emb], top_k=top_k, doc_id=doc_id)[0]
+
+    def query_embeddings(
+        self,
+        embeddings: List[List[float]],
+        top_k: int = 5,
+        doc_id: Optional[str] = None,
+        doc_ids: Optional[List[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Filtered: one shard. Unfiltered: all shards in parallel + merge.
+        `doc_ids`: only the shards holding those documents."""
+        if doc_id:
+            return self._for_doc(doc_id).query_embeddings(embeddings, top_k, doc_id)
+        if doc_ids:
+            assigned = self.state.shard_map()
+            by_shard: Dict[str, List[str]] = {}
+            for d in doc_ids:
+                by_shard.setdefault(assigned.get(d, DEFAULT_SHARD), []).append(d)
+            calls = [
+                (self.shard(key).query_embeddings, (embeddings, top_k, None, ids))
+                for key, ids in by_shard.items()
+            ]
+        else:
+            calls = [
+                (s.query_embeddings, (embeddings, top_k, None))
+                for s in self.shards().values()
+            ]
+        return self._fan_out(calls, len(embeddings), top_k)
+
+    @staticmethod
+    def _fan_out(calls: list, n_queries: int, top_k: int) -> List[List[Dict]]:
+        """Run per-shard searches in parallel; merge each query's hits into
+        the `top_k` smallest distances."""
+        futures = [_pool().submit(fn, *args) for fn, args in calls]
+        per_shard = [f.result() for f in futures]
+        return [
+            heapq.nsmallest(
+                top_k,
+                (hit for results in per_shard for hit in results[i]),
+                key=lambda h: h["distance"],
+            )
+            for i in range(n_queries)
+        ]
+
+
+def open_store(
+    embedder: OpenAIEmbedder | None,
+    persist_dir: str | None = None,
+    local: bool = False,
+):
+    """The configured vector store over the data dir's Chroma index.
+
+    With RETRIEVAL_SOCKET set this is a client of the retrieval service,
+    unless `local` (the service itself opens the index that way).
+    """
+    persist_dir = persist_dir or str(settings.processed_dir / "chroma")
+    if settings.retrieval_socket and not local:
+        from core.retrieval.service import RemoteVectorStore
+
+        return RemoteVectorStore(
+            settings.retrieval_socket,
+            embedder,
+            persist_dir=persist_dir,
+            pool_size=settings.retrieval_pool_size,
+            timeout_s=max(settings.request_timeout_s, 60.0),
+            maintenance_timeout_s=settings.retrieval_maintenance_timeout_s,
+        )
+    if settings.shard_strategy == "none":
+        return ChromaVectorStore(persist_dir=persist_dir, embedder=embedder)
+    return ShardedVectorStore(
+        persist_dir=persist_dir,
+        embedder=embedder,
+        strategy=settings.shard_strategy,
+        num_shards=settings.vector_shards,
+    )
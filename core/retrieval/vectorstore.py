@@ -1,11 +1,108 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
-
-import chromadb
-from chromadb.config import Settings as ChromaSettings
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock, RLock
+from typing import Any, Dict, Iterator, List, Optional
 
+from apps.api.config import settings
+from core.ingestion.versioning import content_hash
+from core.registry.filelock import file_lock
+from core.resilience.deadline import Deadline
 from core.retrieval.embedder import OpenAIEmbedder
+from core.retrieval.index_state import IndexState
+
+
+# companion collection holding one profile vector per document
+DOCS_SUFFIX = "__docs"
+
+_clients: Dict[str, Any] = {}
+_clients_lock = Lock()
+
+
+def _client_for(persist_dir: str):
+    """One PersistentClient per directory per process.
+
+    Creating clients concurrently from several ingest threads races inside
+    chromadb's shared-system setup, so clients are created once under a lock.
+    """
+    key = str(Path(persist_dir).resolve())
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            # chromadb takes ~0.5s to import; only pay it once a store is used
+            import chromadb
+            from chromadb.config import Settings as ChromaSettings
+
+            client = chromadb.PersistentClient(
+                path=persist_dir,
+                settings=ChromaSettings(anonymized_telemetry=False),
+            )
+            _clients[key] = client
+        return client
+
+
+class _WriterLock:
+    """Writes to the collections of one directory, serialized across threads
+    and processes (re-entrant within a thread)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = RLock()
+        self._depth = 0
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        with self._lock:
+            self._depth += 1
+            try:
+                if self._depth == 1:
+                    with file_lock(self.path):
+                        yield
+                else:
+                    yield
+            finally:
+                self._depth -= 1
+
+
+_writer_locks: Dict[str, _WriterLock] = {}
+
+
+def _writer_lock_for(persist_dir: Path) -> _WriterLock:
+    key = str(persist_dir.resolve())
+    with _clients_lock:
+        lock = _writer_locks.get(key)
+        if lock is None:
+            lock = _writer_locks[key] = _WriterLock(persist_dir / "writers.lock")
+        return lock
+
+
+def hnsw_configuration(
+    space: str | None = None,
+    m: int | None = None,
+    ef_construction: int | None = None,
+    ef_search: int | None = None,
+) -> Dict[str, Any]:
+    """Chroma collection configuration; unset values come from settings."""
+    return {
+        "hnsw": {
+            "space": space or settings.hnsw_space,
+            "max_neighbors": m or settings.hnsw_m,
+            "ef_construction": ef_construction or settings.hnsw_ef_construction,
+            "ef_search": ef_search or settings.hnsw_ef_search,
+        }
+    }
+
+
+def doc_collection_name(collection: str) -> str:
+    """Document-level companion of chunk collection `collection`."""
+    return f"{collection}{DOCS_SUFFIX}"
+
+
+def collection_space(col) -> str:
+    cfg = getattr(col, "configuration", None) or {}
+    hnsw = cfg.get("hnsw") if isinstance(cfg, dict) else None
+    return str((hnsw or {}).get("space") or "l2")
 
 
 class ChromaVectorStore:
@@ -13,14 +110,81 @@ class ChromaVectorStore:
         self,
         persist_dir: str,
         embedder: OpenAIEmbedder,
-        collection_name: str = "guidelines",
+        collection_name: str | None = None,
+        state: IndexState | None = None,
     ):
-        self.client = chromadb.PersistentClient(
-            path=persist_dir,
-            settings=ChromaSettings(anonymized_telemetry=False),
-        )
-        self.col = self.client.get_or_create_collection(name=collection_name)
+        self.client = _client_for(persist_dir)
+        self.persist_dir = Path(persist_dir)
+        self.state = state or IndexState(self.persist_dir)
+        # None = follow the active collection recorded in index_state.json
+        self._pinned_name = collection_name
+        self._col = None
+        self._col_name: str | None = None
+        self._space = "l2"
+        self._docs_col = None
+        self._docs_col_name: str | None = None
         self.embedder = embedder
+        self._writer = _writer_lock_for(self.persist_dir)
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """Held around every write and around a generation switch, so a
+        write lands either before the final catch-up or in the new one."""
+        with self._writer.hold():
+            yield
+
+    @property
+    def collection_name(self) -> str:
+        return self._pinned_name or self.state.active_collection()
+
+    @property
+    def col(self):
+        name = self.collection_name
+        if self._col is None or self._col_name != name:
+            # the configuration only applies when the collection is created;
+            # space/M/ef_construction of an existing one change via compaction
+            cfg = hnsw_configuration()
+            col = self.client.get_or_create_collection(name=name, configuration=cfg)
+            current = (col.configuration or {}).get("hnsw") or {}
+            if current and current.get("ef_search") != cfg["hnsw"]["ef_search"]:
+                col.modify(
+                    configuration={"hnsw": {"ef_search": cfg["hnsw"]["ef_search"]}}
+                )
+            self._space = collection_space(col)
+            self._col, self._col_name = col, name
+        return self._col
+
+    @property
+    def docs_col(self):
+        """One profile vector per document, next to the active collection (a
+        compaction or migration carries it over to the next generation)."""
+        name = doc_collection_name(self.collection_name)
+        if self._docs_col is None or self._docs_col_name != name:
+            self._docs_col = self.client.get_or_create_collection(
+                name=name, configuration=hnsw_configuration()
+            )
+            self._docs_col_name = name
+        return self._docs_col
+
+    @property
+    def space(self) -> str:
+        """Distance space of the active collection (l2 | cosine | ip)."""
+        return collection_space(self.col)
+
+    def adopt_embed_model(self, model: str) -> str:
+        return self.state.adopt_embed_model(model)
+
+    @property
+    def embed_model(self) -> str | None:
+        """
+        Model the active collection's vectors were embedded with; every embed
+        call uses it. Recorded on first use (the configured model) and only
+        changed by a re-embedding migration, so changing OPENAI_EMBED_MODEL
+        never mixes incompatible vectors into one collection.
+        """
+        if self.embedder is None:
+            return self.state.embed_model()
+        return self.adopt_embed_model(self.embedder.model)
 
     def upsert_chunks(
         self,
@@ -28,7 +192,9 @@ class ChromaVectorStore:
         title: str | None,
         source: str | None,
         category: str | None,
-        chunks: List[Dict[str, Any]],  # [{"id", "page", "text",}]
+        chunks: List[
+            Dict[str, Any]
+        ],  # [{"id", "page", "text", "pages"?, "page_end"?, "embedding"?}]
         batch_size: int = 50,
     ) -> int:
         ids = [f"{doc_id}:{c['id']}" for c in chunks]
@@ -41,6 +207,11 @@ class ChromaVectorStore:
                 "title": title,
                 "source": source,
                 "category": category,
+                "content_hash": content_hash(c["text"]),
+                # pages of near-duplicates collapsed into this chunk
+                **({"pages": ",".join(map(str, c["pages"]))} if c.get("pages") else {}),
+                # last page of a chunk that runs on across a page break
+                **({"page_end": int(c["page_end"])} if c.get("page_end") else {}),
             }
             for c in chunks
         ]
@@ -52,45 +223,222 @@ class ChromaVectorStore:
             batch_docs = docs[i : i + batch_size]  # batch of text = 50 chunks
             batch_metas = metas[i : i + batch_size]
 
-            batch_embs = self.embedder.embed(
-                batch_docs
-            )  # Doing this in batches to avoid rate limits
-            self.col.upsert(
-                ids=batch_ids,
-                documents=batch_docs,
-                metadatas=batch_metas,
-                embeddings=batch_embs,
-            )
+            # Chunks may carry a reused vector (new document version); only
+            # embed the rest. Doing this in batches to avoid rate limits
+            batch_embs = [c.get("embedding") for c in chunks[i : i + batch_size]]
+            missing = [j for j, e in enumerate(batch_embs) if e is None]
+            if missing:
+                fresh = self.embedder.embed(
+                    [batch_docs[j] for j in missing], model=self.embed_model
+                )
+                for j, emb in zip(missing, fresh):
+                    batch_embs[j] = emb
+            with self.writing():
+                self.col.upsert(
+                    ids=batch_ids,
+                    documents=batch_docs,
+                    metadatas=batch_metas,
+                    embeddings=batch_embs,
+                )
             total_indexed += len(batch_ids)
+        self.state.bump_version()
         return total_indexed
 
+    def upsert_doc_profile(
+        self,
+        doc_id: str,
+        title: str | None,
+        category: str | None,
+        text: str,
+        embedding: List[float] | None = None,
+    ) -> bool:
+        """Index the document-level profile text of `doc_id` (see
+        `doc_index.doc_profile`); False when it is already indexed as is."""
+        digest = content_hash(text)
+        if self.doc_profile_hash(doc_id) == digest:
+            return False
+        emb = embedding or self.embedder.embed([text], model=self.embed_model)[0]
+        with self.writing():
+            self.docs_col.upsert(
+                ids=[doc_id],
+                documents=[text],
+                metadatas=[
+                    {
+                        "doc_id": doc_id,
+                        "title": title,
+                        "category": category,
+                        "content_hash": digest,
+                    }
+                ],
+                embeddings=[emb],
+            )
+        self.state.bump_version()
+        return True
+
+    def doc_profile_hash(self, doc_id: str) -> str | None:
+        res = self.docs_col.get(ids=[doc_id], include=["metadatas"])
+        return (res["metadatas"][0] or {}).get("content_hash") if res["ids"] else None
+
+    def doc_count(self) -> int:
+        """Documents with a profile vector."""
+        return self.docs_col.count()
+
+    def doc_candidates(
+        self, embeddings: List[List[float]], n: int
+    ) -> List[List[Dict[str, Any]]]:
+        """The `n` documents with the closest profiles, per query vector."""
+        count = self.docs_col.count()
+        if not count:
+            return [[] for _ in embeddings]
+        res = self.docs_col.query(
+            query_embeddings=embeddings,
+            n_results=min(n, count),
+            include=["distances"],
+        )
+        return [
+            [{"doc_id": i, "distance": float(d)} for i, d in zip(ids, dists)]
+            for ids, dists in zip(res["ids"], res["distances"])
+        ]
+
+    def existing_chunk_ids(self, doc_id: str) -> set[str]:
+        """Chunk ids of `doc_id` already present in the collection."""
+        res = self.col.get(where={"doc_id": doc_id}, include=[])
+        prefix = f"{doc_id}:"
+        return {i[len(prefix) :] for i in res.get("ids", []) if i.startswith(prefix)}
+
+    def doc_index(self, doc_id: str) -> Dict[str, str]:
+        """{chunk_id: content_hash} for everything indexed under `doc_id`."""
+        res = self.col.get(where={"doc_id": doc_id}, include=["metadatas", "documents"])
+        out: Dict[str, str] = {}
+        for meta, doc in zip(res.get("metadatas") or [], res.get("documents") or []):
+            # chunks indexed before content hashes existed: hash the stored text
+            out[str(meta["chunk_id"])] = meta.get("content_hash") or content_hash(doc)
+        return out
+
+    def get_embeddings(
+        self, doc_id: str, chunk_ids: List[str]
+    ) -> Dict[str, List[float]]:
+        if not chunk_ids:
+            return {}
+        res = self.col.get(
+            ids=[f"{doc_id}:{c}" for c in chunk_ids], include=["embeddings"]
+        )
+        prefix = f"{doc_id}:"
+        return {
+            i[len(prefix) :]: [float(x) for x in emb]
+            for i, emb in zip(res["ids"], res["embeddings"])
+        }
+
+    def update_metadata(
+        self,
+        doc_id: str,
+        chunk_ids: List[str],
+        title: str | None,
+        source: str | None,
+        category: str | None,
+        batch_size: int = 500,
+    ) -> None:
+        """Rewrite document-level metadata on existing chunks (no re-embedding)."""
+        ids = [f"{doc_id}:{c}" for c in chunk_ids]
+        with self.writing():
+            for i in range(0, len(ids), batch_size):
+                batch = ids[i : i + batch_size]
+                res = self.col.get(ids=batch, include=["metadatas"])
+                metas = [
+                    {**m, "title": title, "source": source, "category": category}
+                    for m in res["metadatas"]
+                ]
+                self.col.update(ids=res["ids"], metadatas=metas)
+        self.state.bump_version()
+
+    def delete_chunks(
+        self, doc_id: str, chunk_ids: List[str], batch_size: int = 500
+    ) -> int:
+        ids = [f"{doc_id}:{c}" for c in chunk_ids]
+        with self.writing():
+            for i in range(0, len(ids), batch_size):
+                self.col.delete(ids=ids[i : i + batch_size])
+            if ids:
+                # counted against the generation the deletes landed in
+                self.state.record_deletes(len(ids))
+        if ids:
+            self.state.bump_version()
+        return len(ids)
+
+    def delete_doc(self, doc_id: str, batch_size: int = 500) -> int:
+        """Remove every vector of `doc_id` (profile included), in batches;
+        returns the chunk count."""
+        with self.writing():
+            self.docs_col.delete(ids=[doc_id])
+        return self.delete_chunks(
+            doc_id, sorted(self.existing_chunk_ids(doc_id)), batch_size=batch_size
+        )
+
+    def index_version(self) -> str:
+        return self.state.version_key()
+
+    def count(self) -> int:
+        return self.col.count()
+
+    def deleted_since_compaction(self) -> int:
+        return self.state.deleted_since_compaction()
+
+    def deleted_fraction(self) -> float:
+        """Share of HNSW entries that are tombstones since the last compaction."""
+        deleted = self.state.deleted_since_compaction()
+        total = self.col.count() + deleted
+        return deleted / total if total else 0.0
+
     def query(
         self,
         question: str,
         top_k: int = 5,
         doc_id: Optional[str] = None,
+        deadline: Deadline | None = None,
     ) -> List[Dict[str, Any]]:
-        q_emb = self.embedder.embed([question])[0]
-        where = {"doc_id": doc_id} if doc_id else None
+        q_emb = self.embedder.embed(
+            [question], deadline=deadline, model=self.embed_model
+        )[0]
+        if deadline is not None:
+            deadline.check("vector search")
+        return self.query_embeddings([q_emb], top_k=top_k, doc_id=doc_id)[0]
+
+    def query_embeddings(
+        self,
+        embeddings: List[List[float]],
+        top_k: int = 5,
+        doc_id: Optional[str] = None,
+        doc_ids: Optional[List[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """One Chroma query for many vectors; one result list per vector.
+        `doc_ids` restricts the search to those documents' chunks."""
+        if doc_ids:
+            where: Dict[str, Any] | None = {"doc_id": {"$in": list(doc_ids)}}
+        else:
+            where = {"doc_id": doc_id} if doc_id else None
 
         res = self.col.query(
-            query_embeddings=[q_emb],
+            query_embeddings=embeddings,
             n_results=top_k,
             where=where,
             include=["documents", "metadatas", "distances"],
         )
 
-        out: List[Dict[str, Any]] = []
-        docs = res.get("documents", [[]])[0]
-        metas = res.get("metadatas", [[]])[0]
-        dists = res.get("distances", [[]])[0]
-
-        for doc, meta, dist in zip(docs, metas, dists):
-            out.append(
-                {
-                    "text": doc,
-                    "meta": meta,
-                    "distance": float(dist),
-                }
+        results: List[List[Dict[str, Any]]] = []
+        for docs, metas, dists in zip(
+            res.get("documents") or [[]] * len(embeddings),
+            res.get("metadatas") or [[]] * len(embeddings),
+            res.get("distances") or [[]] * len(embeddings),
+        ):
+            results.append(
+                [
+                    {
+                        "text": doc,
+                        "meta": meta,
+                        "distance": float(dist),
+                        "space": self._space,
+                    }
+                    for doc, meta, dist in zip(docs, metas, dists)
+                ]
             )
-        return out
+        return results
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import Annotated, Literal, Optional
 
 
 class HealthResponse(BaseModel):
@@ -13,16 +13,31 @@ class HealthResponse(BaseModel):
 class Citation(BaseModel):
     doc_id: str
     page: int
+    page_end: Optional[int] = None  # set when the chunk runs on to later pages
     chunk_id: str
     snippet: str
     score: float = Field(ge=0.0, le=1.0)
 
 
+# "compact": shorter snippets, rounded scores, per-document metadata once
+CitationFormat = Literal["full", "compact"]
+
+
+class DocRef(BaseModel):
+    title: str | None = None
+    source: str | None = None
+    category: str | None = None
+
+
 class Meta(BaseModel):
     request_id: str
     latency_ms: int
     model: str
     prompt_version: str
+    # "partial" when a searched document is still being indexed: only its
+    # already-indexed pages could be cited
+    coverage: Literal["full", "partial"] = "full"
+    indexing_doc_ids: list[str] = Field(default_factory=list)
 
 
 class IngestResponse(BaseModel):
@@ -33,15 +48,23 @@ class IngestResponse(BaseModel):
     message: str | None = None
 
 
+# "partially_indexed": the first pages / table of contents are searchable;
+# "error": the ingest failed (whatever it indexed stays searchable)
+DocStatus = Literal["indexing", "partially_indexed", "ready", "error"]
+
+
 class DocInfo(BaseModel):
     doc_id: str
     title: str | None = None
     source: str | None = None
     category: str | None = None
+    version: int = 1
+    status: DocStatus = "ready"
 
 
 class DocList(BaseModel):
     items: list[DocInfo]
+    next_cursor: str | None = None
 
 
 class AskRequest(BaseModel):
@@ -49,11 +72,55 @@ class AskRequest(BaseModel):
     doc_ids: list[str] = Field(default_factory=list)
     top_k: int = Field(default=5, ge=1, le=20)
     mode: Literal["rag", "no_rag"] = "rag"
+    # per-request latency budget; defaults to REQUEST_TIMEOUT_S
+    timeout_ms: int | None = Field(default=None, ge=100, le=300_000)
+    citation_format: CitationFormat = "full"
 
 
 class AskResponse(BaseModel):
     answer: str
     citations: list[Citation] = Field(default_factory=list)
+    documents: dict[str, DocRef] | None = None  # compact format only
+    meta: Meta
+    error: str | None = None  # set on a failed item of /ask/batch
+
+
+class AskBatchRequest(BaseModel):
+    questions: list[Annotated[str, Field(min_length=3)]] = Field(
+        min_length=1, max_length=100
+    )
+    doc_ids: list[str] = Field(default_factory=list)
+    top_k: int = Field(default=5, ge=1, le=20)
+    mode: Literal["rag", "no_rag"] = "rag"
+    timeout_ms: int | None = Field(default=None, ge=100, le=300_000)
+    citation_format: CitationFormat = "full"
+
+
+class BatchTiming(BaseModel):
+    retrieval_ms: int  # one embedding call + one multi-query search
+    generation_ms: int  # concurrent chat completions
+    total_ms: int
+
+
+class AskBatchResponse(BaseModel):
+    items: list[AskResponse]
+    timing: BatchTiming
+    meta: Meta
+
+
+class RetrieveRequest(BaseModel):
+    question: str = Field(min_length=3)
+    doc_ids: list[str] = Field(default_factory=list)
+    top_k: int = Field(default=5, ge=1, le=20)
+    score_threshold: float | None = Field(default=None, ge=0.0, le=1.0)
+    timeout_ms: int | None = Field(default=None, ge=100, le=300_000)
+    citation_format: CitationFormat = "full"
+
+
+class RetrieveResponse(BaseModel):
+    citations: list[Citation] = Field(default_factory=list)
+    documents: dict[str, DocRef] | None = None  # compact format only
+    cached: bool = False
     meta: Meta
 
 
@@ -61,6 +128,7 @@ class SummarizeRequest(BaseModel):
     doc_ids: list[str] = Field(default_factory=list)
     style: Literal["tldr", "key_steps", "contraindications", "eligibility"] = "tldr"
     query: str | None = None
+    timeout_ms: int | None = Field(default=None, ge=100, le=300_000)
 
 
 class SummarizeResponse(BaseModel):
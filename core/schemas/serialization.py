@@ -0,0 +1,25 @@
+"""
+JSON encoding for API payloads: orjson when installed (several times faster
+than the stdlib encoder on citation-heavy responses), stdlib json otherwise.
+Output is compact (no whitespace) and UTF-8 either way.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode()
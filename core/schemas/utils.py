@@ -1,7 +1,76 @@
 from __future__ import annotations
 
+from typing import Any, Dict, List
 
-def distance_to_score(distance: float) -> float:
-    """Convert ChromaDB distance (lower = better) to a 0..1 similarity score. score = 1 / (1 + d)"""
-    s = 1.0 / (1.0 + max(0.0, float(distance)))  # ensure distance is non-negative
+from core.schemas.models import Citation
+
+
+def distance_to_score(distance: float, space: str = "l2") -> float:
+    """Convert ChromaDB distance (lower = better) to a 0..1 similarity score.
+
+    l2: score = 1 / (1 + d). cosine / ip: Chroma returns d = 1 - similarity,
+    so score = 1 - d (for ip this assumes normalized embeddings, as OpenAI's are).
+    """
+    d = float(distance)
+    if space in ("cosine", "ip"):
+        s = 1.0 - d
+    else:
+        s = 1.0 / (1.0 + max(0.0, d))  # ensure distance is non-negative
     return max(0.0, min(1.0, s))  # clamp to [0,1]
+
+
+SNIPPET_CHARS = 350  # keep UI readable
+COMPACT_SNIPPET_CHARS = 200
+
+
+def citation_dicts(
+    retrieved: List[Dict[str, Any]],
+    snippet_chars: int = SNIPPET_CHARS,
+    score_digits: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Retrieved chunks ({"text", "meta", "distance", "space"}) -> citation
+    dicts (the Citation schema), without building a model per chunk."""
+    out: List[Dict[str, Any]] = []
+    for c in retrieved:
+        meta = c["meta"]
+        score = distance_to_score(float(c["distance"]), c.get("space", "l2"))
+        row = {
+            "doc_id": str(meta.get("doc_id", "")),
+            "page": int(meta.get("page") or 0),
+            "chunk_id": str(meta.get("chunk_id", "")),
+            "snippet": c["text"][:snippet_chars],
+            "score": score if score_digits is None else round(score, score_digits),
+        }
+        if meta.get("page_end"):
+            row["page_end"] = int(meta["page_end"])
+        out.append(row)
+    return out
+
+
+def citations_from_retrieved(
+    retrieved: List[Dict[str, Any]], snippet_chars: int = SNIPPET_CHARS
+) -> List[Citation]:
+    """Retrieved chunks -> API citations."""
+    return [Citation(**c) for c in citation_dicts(retrieved, snippet_chars)]
+
+
+def citation_payload(
+    retrieved: List[Dict[str, Any]], citation_format: str = "full"
+) -> Dict[str, Any]:
+    """`{"citations": [...]}`, plus for the compact format `{"documents":
+    {doc_id: {title, source, category}}}` carrying each document's metadata
+    once, with shorter snippets and scores rounded to 3 digits."""
+    if citation_format != "compact":
+        return {"citations": citation_dicts(retrieved)}
+    documents: Dict[str, Dict[str, Any]] = {}
+    for c in retrieved:
+        meta = c["meta"]
+        doc_id = str(meta.get("doc_id", ""))
+        if doc_id not in documents:
+            documents[doc_id] = {
+                k: meta[k] for k in ("title", "source", "category") if meta.get(k)
+            }
+    return {
+        "citations": citation_dicts(retrieved, COMPACT_SNIPPET_CHARS, score_digits=3),
+        "documents": documents,
+    }
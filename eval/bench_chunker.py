@@ -0,0 +1,211 @@
+"""
+Character-window vs structure-aware chunking on a synthetic corpus.
+
+For each chunker configuration, chunks the same `eval.corpus` documents,
+indexes them (hash embeddings, no API key) and asks the same questions:
+
+  pages_per_s       chunking throughput (chunking only, no embedding)
+  chunks            resulting chunk count, and est. tokens per chunk p50/p99
+  tiny_chunks       share of chunks under a quarter of the target size
+  cut_sentences     share of recommendations no single chunk holds whole
+  evidence_hit      share of queries with the whole recommendation the query
+                    was taken from inside one of the top-k chunks
+  source_hit        share of queries whose top hit is from the right document
+
+By default the last line of each page is moved to the top of the next page
+when it continues a recommendation, so sentences run across page breaks as
+they do in real PDFs (`--no-page-breaks` keeps the generator's layout).
+
+Run:
+    python -m eval.bench_chunker --docs 200 --chars 900 --tokens 192,256,384
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from core.ingestion.chunker import (
+    CHARS_PER_TOKEN,
+    Chunk,
+    chunk_pages,
+    chunk_structured,
+    est_tokens,
+)
+from core.retrieval.vectorstore import ChromaVectorStore
+from eval.corpus import SyntheticDoc, iter_docs
+from eval.fake_openai import HashEmbedder
+from eval.metrics import percentile
+from eval.run_eval import REPORTS_DIR
+
+_RECOMMENDATION = re.compile(r"\d+\.\d+ [^.]+\.")
+_NUMBERED = re.compile(r"^\d+\.\d+ ")
+
+
+def _ints(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def _norm(text: str) -> str:
+    return " ".join(text.split())
+
+
+def break_pages(doc: SyntheticDoc) -> List[tuple[int, str]]:
+    """Page text with each page's last line moved to the next page when it
+    continues a recommendation started above it."""
+    pages = [list(lines) for lines in doc.pages]
+    for lines, following in zip(pages, pages[1:]):
+        if len(lines) > 2 and not _NUMBERED.match(lines[-1]):
+            following.insert(0, lines.pop())
+    return [(i, "\n".join(lines)) for i, lines in enumerate(pages, start=1)]
+
+
+def make_queries(
+    docs: Dict[str, List[tuple[int, str]]], n: int, words: int, seed: int
+) -> List[Dict[str, str]]:
+    """Questions cut from random recommendations, with the whole
+    recommendation as the evidence to retrieve."""
+    rng = random.Random(seed)
+    evidence = [
+        (doc_id, m.group(0))
+        for doc_id, pairs in docs.items()
+        for m in _RECOMMENDATION.finditer(_norm(" ".join(t for _, t in pairs)))
+    ]
+    out = []
+    for doc_id, sentence in rng.sample(evidence, min(n, len(evidence))):
+        tokens = sentence.split()[1:]
+        start = rng.randrange(max(1, len(tokens) - words))
+        out.append(
+            {
+                "doc_id": doc_id,
+                "evidence": sentence,
+                "query": " ".join(tokens[start : start + words]),
+            }
+        )
+    return out
+
+
+def evaluate(
+    name: str,
+    chunker: Callable[[List[tuple[int, str]]], List[Chunk]],
+    target_tokens: int,
+    docs: Dict[str, List[tuple[int, str]]],
+    queries: List[Dict[str, str]],
+    embedder: HashEmbedder,
+    persist_dir: Path,
+    k: int,
+) -> Dict[str, Any]:
+    n_pages = sum(len(pairs) for pairs in docs.values())
+    t0 = time.perf_counter()
+    chunked = {doc_id: chunker(pairs) for doc_id, pairs in docs.items()}
+    chunk_s = time.perf_counter() - t0
+
+    chunks = [c for cs in chunked.values() for c in cs]
+    sizes = [est_tokens(c.text) for c in chunks]
+    texts = {doc_id: [_norm(c.text) for c in cs] for doc_id, cs in chunked.items()}
+    evidence = {(q["doc_id"], q["evidence"]) for q in queries}
+    cut = sum(not any(e in t for t in texts[d]) for d, e in evidence)
+
+    store = ChromaVectorStore(str(persist_dir / name), embedder=embedder)
+    for doc_id, cs in chunked.items():
+        store.upsert_chunks(
+            doc_id,
+            doc_id,
+            f"{doc_id}.pdf",
+            None,
+            [{"id": c.chunk_id, "page": c.page, "text": c.text} for c in cs],
+            batch_size=500,
+        )
+    vectors = embedder.embed([q["query"] for q in queries])
+    results = store.query_embeddings(vectors, k)
+    evidence_hits = sum(
+        any(q["evidence"] in _norm(h["text"]) for h in hits)
+        for q, hits in zip(queries, results)
+    )
+    source_hits = sum(
+        bool(hits) and hits[0]["meta"]["doc_id"] == q["doc_id"]
+        for q, hits in zip(queries, results)
+    )
+    return {
+        "chunker": name,
+        "pages_per_s": round(n_pages / chunk_s, 1),
+        "chunks": len(chunks),
+        "tokens_per_chunk": {
+            "p50": percentile(sizes, 50),
+            "p99": percentile(sizes, 99),
+        },
+        "tiny_chunks": round(sum(s < target_tokens / 4 for s in sizes) / len(sizes), 3),
+        "cut_sentences": round(cut / len(evidence), 3),
+        "evidence_hit": round(evidence_hits / len(queries), 3),
+        "source_hit": round(source_hits / len(queries), 3),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=200)
+    ap.add_argument("--pages", type=int, default=20, help="mean pages per doc")
+    ap.add_argument("--chars", default="900", help="chunk_pages sizes (characters)")
+    ap.add_argument("--char-overlap", type=int, default=150)
+    ap.add_argument("--tokens", default="192,256,384", help="chunk_structured sizes")
+    ap.add_argument("--token-overlap", type=int, default=32)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("--query-words", type=int, default=8)
+    ap.add_argument("--dim", type=int, default=384, help="fake embedding size")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-page-breaks", action="store_true")
+    ap.add_argument("--dir", type=Path, default=None, help="default: a temp dir")
+    args = ap.parse_args()
+
+    persist_dir = args.dir or Path(tempfile.mkdtemp(prefix="gc_chunker_"))
+    docs = {
+        d.doc_id: d.page_pairs() if args.no_page_breaks else break_pages(d)
+        for d in iter_docs(args.docs, args.pages, args.seed)
+    }
+    queries = make_queries(docs, args.queries, args.query_words, args.seed)
+    embedder = HashEmbedder(dim=args.dim)
+
+    configs = [
+        (
+            f"chars_{n}",
+            lambda pairs, n=n: chunk_pages(pairs, n, args.char_overlap),
+            n // CHARS_PER_TOKEN,
+        )
+        for n in _ints(args.chars)
+    ] + [
+        (
+            f"structure_{n}",
+            lambda pairs, n=n: chunk_structured(pairs, n, args.token_overlap),
+            n,
+        )
+        for n in _ints(args.tokens)
+    ]
+    rows = []
+    for name, chunker, target in configs:
+        rows.append(
+            evaluate(
+                name, chunker, target, docs, queries, embedder, persist_dir, args.k
+            )
+        )
+        print(json.dumps(rows[-1]), flush=True)
+
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = Path(REPORTS_DIR) / f"chunker_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "dir"},
+        "pages": sum(len(p) for p in docs.values()),
+        "rows": rows,
+    }
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Hedging benchmark against a latency-injecting stand-in upstream.
+
+Starts a local HTTP server whose response time is drawn from a long-tailed
+distribution (mostly fast, occasionally very slow), then issues the same
+workload with hedging off and on and compares p50 / p95 / p99.
+
+Run:
+    python -m eval.bench_hedging --n 400 --slow-prob 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from core.resilience.deadline import Deadline
+from core.resilience.hedging import Hedger
+from eval.metrics import percentile
+
+
+def _make_handler(base_ms: float, slow_ms: float, slow_prob: float, seed: int):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            with lock:
+                slow = rng.random() < slow_prob
+                jitter = rng.lognormvariate(0.0, 0.25)
+            time.sleep(((slow_ms if slow else base_ms) * jitter) / 1000.0)
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+def _run(url: str, hedger: Hedger, n: int, timeout_s: float) -> Dict[str, Any]:
+    def _call(timeout: float | None) -> bytes:
+        with urllib.request.urlopen(url, timeout=timeout) as r:
+            return r.read()
+
+    lat: List[float] = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        hedger.call(_call, Deadline.after(timeout_s))
+        lat.append((time.perf_counter() - t0) * 1000.0)
+
+    snap = hedger.snapshot()
+    return {
+        "p50": percentile(lat, 50),
+        "p95": percentile(lat, 95),
+        "p99": percentile(lat, 99),
+        "hedge_rate": snap["hedge_rate"],
+        "hedge_wins": snap["hedge_wins"],
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=400)
+    ap.add_argument("--base-ms", type=float, default=40.0)
+    ap.add_argument("--slow-ms", type=float, default=800.0)
+    ap.add_argument("--slow-prob", type=float, default=0.05)
+    ap.add_argument("--max-hedge-rate", type=float, default=0.1)
+    ap.add_argument("--timeout-s", type=float, default=5.0)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    results = {}
+    for label, enabled in (("no_hedge", False), ("hedge", True)):
+        handler = _make_handler(args.base_ms, args.slow_ms, args.slow_prob, args.seed)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        hedger = Hedger(label, enabled=enabled, max_hedge_rate=args.max_hedge_rate)
+        try:
+            results[label] = _run(url, hedger, args.n, args.timeout_s)
+        finally:
+            server.shutdown()
+
+    base, hedged = results["no_hedge"]["p99"], results["hedge"]["p99"]
+    results["p99_improvement_pct"] = 100.0 * (base - hedged) / base if base > 0 else 0.0
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
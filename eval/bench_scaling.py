@@ -0,0 +1,197 @@
+"""
+Retrieval scaling benchmark on a synthetic corpus.
+
+Grows one index through `ChromaVectorStore.upsert_chunks` (documents from
+`eval.corpus`, vectors from the in-process hash embedder, so no API key and
+no network) and, each time it passes a checkpoint size, records:
+
+  upsert_chunks_per_s    index write throughput since the last checkpoint
+                         (embedding time excluded, reported as embed_s)
+  query_ms / filtered_query_ms
+                         p50/p99 of single-vector queries, unfiltered and
+                         restricted to one random document (where doc_id=)
+  rss_mb / peak_rss_mb   resident memory of this process (client + index)
+  disk_mb                size of the persist directory
+
+One JSON row per checkpoint, i.e. the curves; the report goes to
+eval/reports/. The HNSW parameters come from settings (HNSW_*), so the same
+run can be repeated per configuration.
+
+Run:
+    python -m eval.bench_scaling --sizes 10000,50000,200000 --pages 40 --dim 384
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from core.retrieval.vectorstore import ChromaVectorStore, hnsw_configuration
+from eval.corpus import TOPICS, iter_docs
+from eval.fake_openai import HashEmbedder
+from eval.metrics import percentile
+from eval.run_eval import REPORTS_DIR
+
+
+def _ints(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:  # not Linux: fall back to the peak
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if os.uname().sysname == "Darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def disk_mb(path: Path) -> float:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / 2**20
+
+
+def _ms(xs: List[float]) -> Dict[str, float]:
+    return {"p50": round(percentile(xs, 50), 2), "p99": round(percentile(xs, 99), 2)}
+
+
+def measure_queries(
+    store: ChromaVectorStore,
+    queries: List[List[float]],
+    doc_ids: List[str],
+    k: int,
+    rng: random.Random,
+) -> Dict[str, Any]:
+    store.query_embeddings(queries[:1], top_k=k)  # warm the index after writes
+    plain, filtered = [], []
+    for q in queries:
+        t = time.perf_counter()
+        store.query_embeddings([q], top_k=k)
+        plain.append((time.perf_counter() - t) * 1000)
+        t = time.perf_counter()
+        store.query_embeddings([q], top_k=k, doc_id=rng.choice(doc_ids))
+        filtered.append((time.perf_counter() - t) * 1000)
+    return {"query_ms": _ms(plain), "filtered_query_ms": _ms(filtered)}
+
+
+def run(
+    persist_dir: Path,
+    sizes: List[int],
+    pages: int = 20,
+    dim: int = 384,
+    queries: int = 100,
+    k: int = 5,
+    seed: int = 0,
+    chunk_size: int = 900,
+    chunk_overlap: int = 150,
+) -> List[Dict[str, Any]]:
+    embedder = HashEmbedder(dim=dim)
+    store = ChromaVectorStore(str(persist_dir), embedder=embedder)
+    rng = random.Random(seed)
+    qvecs = embedder.embed(
+        [
+            f"What is recommended about {rng.choice(t.split())}?"
+            for t in (TOPICS * queries)[:queries]
+        ]
+    )
+
+    rows: List[Dict[str, Any]] = []
+    targets = sorted(sizes)
+    doc_ids: List[str] = []
+    total = n_pages = 0
+    embed_s = upsert_s = 0.0
+    since_chunks, since_s = 0, 0.0
+    for doc in iter_docs(10**9, pages, seed):
+        if not targets:
+            break
+        chunks = doc.chunks(chunk_size, chunk_overlap)
+        t = time.perf_counter()
+        for c, emb in zip(chunks, embedder.embed([c["text"] for c in chunks])):
+            c["embedding"] = emb
+        embed_s += time.perf_counter() - t
+        t = time.perf_counter()
+        store.upsert_chunks(
+            doc.doc_id, doc.title, doc.source, doc.category, chunks, batch_size=500
+        )
+        dt = time.perf_counter() - t
+        upsert_s += dt
+        since_s += dt
+        since_chunks += len(chunks)
+        total += len(chunks)
+        n_pages += len(doc.pages)
+        doc_ids.append(doc.doc_id)
+        if total < targets[0]:
+            continue
+        while targets and total >= targets[0]:
+            targets.pop(0)
+        row = {
+            "chunks": total,
+            "docs": len(doc_ids),
+            "pages": n_pages,
+            "upsert_chunks_per_s": round(since_chunks / since_s, 1),
+            "upsert_s": round(upsert_s, 2),
+            "embed_s": round(embed_s, 2),
+        }
+        row.update(measure_queries(store, qvecs, doc_ids, k, rng))
+        row.update(
+            rss_mb=round(rss_mb(), 1),
+            peak_rss_mb=round(peak_rss_mb(), 1),
+            disk_mb=round(disk_mb(persist_dir), 1),
+        )
+        rows.append(row)
+        print(json.dumps(row), flush=True)
+        since_chunks, since_s = 0, 0.0
+    return rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,5000,20000", help="chunk checkpoints")
+    ap.add_argument("--pages", type=int, default=20, help="mean pages per doc")
+    ap.add_argument("--dim", type=int, default=384, help="fake embedding size")
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--chunk-size", type=int, default=900)
+    ap.add_argument("--chunk-overlap", type=int, default=150)
+    ap.add_argument("--dir", type=Path, default=None, help="default: a temp dir")
+    args = ap.parse_args()
+
+    persist_dir = args.dir or Path(tempfile.mkdtemp(prefix="gc_scaling_"))
+    rows = run(
+        persist_dir,
+        _ints(args.sizes),
+        pages=args.pages,
+        dim=args.dim,
+        queries=args.queries,
+        k=args.k,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+    )
+
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = Path(REPORTS_DIR) / f"bench_scaling_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "dir"},
+        "hnsw": hnsw_configuration(),
+        "persist_dir": str(persist_dir),
+        "curves": rows,
+    }
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
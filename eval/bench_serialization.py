@@ -0,0 +1,135 @@
+"""
+Serialization benchmark for citation-heavy responses.
+
+Builds a synthetic top_k retrieval result (realistic chunk texts and
+metadata spread over a few documents) and compares, per wire format, the
+payload size (raw and gzip) and the time to produce the response bytes:
+
+- models_stdlib: Citation/AskResponse models, validated again as the
+  response_model and encoded with the stdlib (the previous /ask path)
+- fast_full / fast_compact: plain dicts + core.schemas.serialization
+- stream_raw / stream_compact: the __CITATIONS__ line of /ask/stream,
+  previously every retrieved chunk with its full text and metadata
+
+Run:
+    python -m eval.bench_serialization --top-k 20 --n 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from core.schemas.models import AskResponse, Meta
+from core.schemas.serialization import dumps, dumps_str, orjson
+from core.schemas.utils import citation_payload, citations_from_retrieved
+from eval.metrics import percentile
+
+WORDS = (
+    "patients dose mg daily therapy recommended evidence risk renal adults "
+    "children monitoring contraindicated first-line treatment guideline "
+    "assessment clinical trial outcome adverse events should be considered"
+).split()
+
+META = {"request_id": "req_0123456789", "latency_ms": 1234, "model": "gpt-4o-mini"}
+
+
+def synthetic_retrieved(top_k: int, n_docs: int = 3, seed: int = 7) -> List[Dict]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(top_k):
+        d = i % n_docs
+        page = rng.randint(1, 120)
+        out.append(
+            {
+                "text": " ".join(rng.choice(WORDS) for _ in range(180)),
+                "meta": {
+                    "doc_id": f"doc_{d:04d}",
+                    "page": page,
+                    "chunk_id": f"p{page}_c{i}",
+                    "title": f"National guideline on condition {d}: diagnosis "
+                    "and management in adults and children",
+                    "source": f"https://guidelines.example.org/ng{100 + d}",
+                    "category": "cardiology",
+                    "content_hash": f"{rng.getrandbits(256):064x}",
+                },
+                "distance": rng.uniform(0.2, 0.9),
+                "space": "l2",
+            }
+        )
+    return out
+
+
+def models_stdlib(retrieved: List[Dict]) -> bytes:
+    resp = AskResponse(
+        answer="An answer. " * 40,
+        citations=citations_from_retrieved(retrieved),
+        meta=Meta(**META, prompt_version="ask_v1"),
+    )
+    # FastAPI validates the returned model against response_model, then
+    # JSONResponse encodes the jsonable result with the stdlib
+    data = AskResponse.model_validate(resp.model_dump()).model_dump(mode="json")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast(citation_format: str) -> Callable[[List[Dict]], bytes]:
+    def run(retrieved: List[Dict]) -> bytes:
+        return dumps(
+            {
+                "answer": "An answer. " * 40,
+                **citation_payload(retrieved, citation_format),
+                "meta": {**META, "prompt_version": "ask_v1"},
+            }
+        )
+
+    return run
+
+
+def stream_raw(retrieved: List[Dict]) -> bytes:
+    return json.dumps(retrieved).encode()
+
+
+def stream_compact(retrieved: List[Dict]) -> bytes:
+    return dumps_str(citation_payload(retrieved, "compact")).encode()
+
+
+def measure(fn: Callable[[List[Dict]], bytes], retrieved, n: int) -> Dict[str, Any]:
+    body = fn(retrieved)
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn(retrieved)
+        times.append((time.perf_counter() - t0) * 1e6)
+    return {
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+        "p50_us": round(percentile(times, 50), 1),
+        "p95_us": round(percentile(times, 95), 1),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--top-k", type=int, default=20)
+    ap.add_argument("--n", type=int, default=2000)
+    args = ap.parse_args()
+
+    retrieved = synthetic_retrieved(args.top_k)
+    cases = {
+        "models_stdlib": models_stdlib,
+        "fast_full": fast("full"),
+        "fast_compact": fast("compact"),
+        "stream_raw": stream_raw,
+        "stream_compact": stream_compact,
+    }
+    results = {name: measure(fn, retrieved, args.n) for name, fn in cases.items()}
+    results["encoder"] = "orjson" if orjson is not None else "json"
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
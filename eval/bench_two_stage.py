@@ -0,0 +1,150 @@
+"""
+Two-stage (document profile -> chunks) vs flat retrieval on a synthetic corpus.
+
+Builds an index from `eval.corpus` documents (chunks plus one profile vector
+per document, hash embeddings, no API key), then for each candidate count N
+measures, over the same queries:
+
+  latency_ms      p50/p99 of the whole search (profile query + restricted
+                  chunk query for two-stage)
+  recall_at_k     share of flat search's top-k chunks two-stage also returns
+  source_hit      share of queries whose top hit comes from the document the
+                  query text was taken from
+
+Queries are short passages cut from random chunks, so each has a known
+source document.
+
+Run:
+    python -m eval.bench_two_stage --docs 500 --pages 20 --candidates 5,10,20,50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from core.retrieval.doc_index import doc_profile, two_stage_query
+from core.retrieval.vectorstore import ChromaVectorStore
+from eval.corpus import iter_docs
+from eval.fake_openai import HashEmbedder
+from eval.metrics import percentile
+from eval.run_eval import REPORTS_DIR
+
+
+def _ints(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def build_index(
+    store: ChromaVectorStore, docs: int, pages: int, seed: int
+) -> List[tuple[str, str]]:
+    """Index the corpus; returns (doc_id, chunk text) pairs to cut queries from."""
+    texts = []
+    for doc in iter_docs(docs, pages, seed):
+        chunks = doc.chunks()
+        store.upsert_chunks(
+            doc.doc_id, doc.title, doc.source, doc.category, chunks, batch_size=500
+        )
+        profile = doc_profile(doc.title, doc.category, doc.page_pairs())
+        store.upsert_doc_profile(doc.doc_id, doc.title, doc.category, profile)
+        texts += [(doc.doc_id, c["text"]) for c in chunks]
+    return texts
+
+
+def make_queries(texts: List[tuple[str, str]], n: int, words: int, seed: int):
+    rng = random.Random(seed)
+    out = []
+    for doc_id, text in rng.sample(texts, min(n, len(texts))):
+        tokens = text.split()
+        start = rng.randrange(max(1, len(tokens) - words))
+        out.append((doc_id, " ".join(tokens[start : start + words])))
+    return out
+
+
+def _key(hit: Dict[str, Any]) -> str:
+    return f"{hit['meta']['doc_id']}:{hit['meta']['chunk_id']}"
+
+
+def measure(search, queries, vectors, flat=None) -> Dict[str, Any]:
+    lat, results = [], []
+    for v in vectors:
+        t = time.perf_counter()
+        results.append(search(v))
+        lat.append((time.perf_counter() - t) * 1000)
+    hits = sum(
+        bool(r) and r[0]["meta"]["doc_id"] == doc_id
+        for r, (doc_id, _) in zip(results, queries)
+    )
+    row: Dict[str, Any] = {
+        "latency_ms": {
+            "p50": round(percentile(lat, 50), 2),
+            "p99": round(percentile(lat, 99), 2),
+        },
+        "source_hit": round(hits / len(queries), 3),
+    }
+    if flat is not None:
+        recall = [
+            len({_key(h) for h in r} & {_key(h) for h in f}) / len(f)
+            for r, f in zip(results, flat)
+            if f
+        ]
+        row["recall_at_k"] = round(sum(recall) / len(recall), 3) if recall else None
+    return row, results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=300)
+    ap.add_argument("--pages", type=int, default=20, help="mean pages per doc")
+    ap.add_argument("--candidates", default="5,10,20,50", help="comma-separated N")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--query-words", type=int, default=12)
+    ap.add_argument("--dim", type=int, default=384, help="fake embedding size")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--dir", type=Path, default=None, help="default: a temp dir")
+    args = ap.parse_args()
+
+    persist_dir = args.dir or Path(tempfile.mkdtemp(prefix="gc_two_stage_"))
+    embedder = HashEmbedder(dim=args.dim)
+    store = ChromaVectorStore(str(persist_dir), embedder=embedder)
+    t0 = time.perf_counter()
+    texts = build_index(store, args.docs, args.pages, args.seed)
+    build_s = time.perf_counter() - t0
+    queries = make_queries(texts, args.queries, args.query_words, args.seed)
+    vectors = embedder.embed([q for _, q in queries])
+
+    flat_row, flat = measure(
+        lambda v: store.query_embeddings([v], args.k)[0], queries, vectors
+    )
+    rows = [{"mode": "flat", **flat_row}]
+    print(json.dumps(rows[0]), flush=True)
+    for n in _ints(args.candidates):
+        row, _ = measure(
+            lambda v, n=n: two_stage_query(store, [v], args.k, n)[0],
+            queries,
+            vectors,
+            flat,
+        )
+        rows.append({"mode": "two_stage", "candidates": n, **row})
+        print(json.dumps(rows[-1]), flush=True)
+
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = Path(REPORTS_DIR) / f"two_stage_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "dir"},
+        "chunks": len(texts),
+        "build_s": round(build_s, 2),
+        "rows": rows,
+    }
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Synthetic guideline corpus for scale tests.
+
+Documents are generated from (seed, index) alone, so any slice of a corpus
+can be regenerated without the rest, and two runs with the same seed see the
+same text. Each document mixes one topic's words into generic guideline
+prose, so topic questions have a "right" document to retrieve.
+
+Two output formats:
+  pdf     one PDF per document (exercises extraction and the ingest API)
+  chunks  one JSONL line per document with pre-chunked text in the shape
+          `ChromaVectorStore.upsert_chunks` takes (index-only benchmarks)
+
+Run:
+    python -m eval.corpus out/ --docs 1000 --pages 40 --format chunks
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from core.ingestion.chunker import chunk_pages
+from eval.pdfgen import guideline_pages, make_pdf
+
+TOPICS = [
+    "asthma inhaler spacer bronchodilator",
+    "diabetes insulin glucose hba1c",
+    "hypertension blood pressure amlodipine",
+    "sepsis lactate antibiotics fluids",
+    "pneumonia oxygen saturation amoxicillin",
+    "malaria artemisinin parasitaemia",
+    "tuberculosis rifampicin isoniazid",
+    "anaemia iron ferritin transfusion",
+]
+_SYLLABLES = (
+    "ra ze mol tin pra ver ox dal fen cor lu zan tri mab sol ped qui nel vat ost"
+).split()
+CATEGORIES = ["adult", "paediatric", "maternal", "emergency", "primary care"]
+
+
+@dataclass
+class SyntheticDoc:
+    doc_id: str
+    title: str
+    category: str
+    topic: str
+    pages: List[List[str]]  # text lines per page
+
+    @property
+    def source(self) -> str:
+        return f"{self.doc_id}.pdf"
+
+    def page_pairs(self) -> List[tuple[int, str]]:
+        return [(i, "\n".join(lines)) for i, lines in enumerate(self.pages, start=1)]
+
+    def chunks(self, chunk_size: int = 900, overlap: int = 150) -> List[Dict]:
+        return [
+            {"id": c.chunk_id, "page": c.page, "text": c.text}
+            for c in chunk_pages(self.page_pairs(), chunk_size, overlap)
+        ]
+
+
+def make_doc(index: int, pages: int = 20, seed: int = 0) -> SyntheticDoc:
+    """Document `index` of the corpus for `seed`; page counts vary +-50%
+    around `pages`."""
+    rng = random.Random(f"{seed}:{index}")
+    # a few made-up terms (drug, test, procedure names) only this document uses
+    terms = ["".join(rng.choice(_SYLLABLES) for _ in range(3)) for _ in range(3)]
+    topic = f"{TOPICS[index % len(TOPICS)]} {' '.join(terms)}"
+    n_pages = rng.randint(max(1, pages // 2), max(1, pages + pages // 2))
+    return SyntheticDoc(
+        doc_id=f"doc_syn_{index:06d}",
+        title=f"{topic.split()[0].title()} and {terms[0]} guideline {index}",
+        category=CATEGORIES[index % len(CATEGORIES)],
+        topic=topic,
+        pages=guideline_pages(n_pages, seed=rng.randrange(2**31), topic=topic),
+    )
+
+
+def iter_docs(n_docs: int, pages: int = 20, seed: int = 0) -> Iterator[SyntheticDoc]:
+    for i in range(n_docs):
+        yield make_doc(i, pages, seed)
+
+
+def chunk_record(doc: SyntheticDoc, chunk_size: int, overlap: int) -> Dict[str, Any]:
+    return {
+        "doc_id": doc.doc_id,
+        "title": doc.title,
+        "source": doc.source,
+        "category": doc.category,
+        "chunks": doc.chunks(chunk_size, overlap),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("out", type=Path, help="output directory")
+    ap.add_argument("--docs", type=int, default=100)
+    ap.add_argument("--pages", type=int, default=20, help="mean pages per doc")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--format", choices=["pdf", "chunks"], default="chunks")
+    ap.add_argument("--chunk-size", type=int, default=900)
+    ap.add_argument("--chunk-overlap", type=int, default=150)
+    args = ap.parse_args()
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    n_pages = n_chunks = 0
+    if args.format == "pdf":
+        for doc in iter_docs(args.docs, args.pages, args.seed):
+            (args.out / doc.source).write_bytes(make_pdf(doc.pages, title=doc.title))
+            n_pages += len(doc.pages)
+    else:
+        path = args.out / "chunks.jsonl"
+        with path.open("w", encoding="utf-8") as f:
+            for doc in iter_docs(args.docs, args.pages, args.seed):
+                rec = chunk_record(doc, args.chunk_size, args.chunk_overlap)
+                f.write(json.dumps(rec) + "\n")
+                n_pages += len(doc.pages)
+                n_chunks += len(rec["chunks"])
+    print(
+        json.dumps(
+            {"out": str(args.out), "docs": args.docs, "pages": n_pages}
+            | ({"chunks": n_chunks} if args.format == "chunks" else {})
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
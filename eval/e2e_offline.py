@@ -0,0 +1,177 @@
+"""
+Offline end-to-end run: generated guideline PDFs through the real API
+(served by uvicorn in-process: ingest -> /ask -> /ask/stream) against the
+fake OpenAI server, so latency
+and throughput experiments need no API key, cost nothing and are repeatable.
+
+Each document gets its own topic words; a question about a topic counts as a
+retrieval hit when the top citation comes from that topic's document.
+
+Run:
+    python -m eval.e2e_offline --docs 4 --pages 30 --latency-ms 60 --tokens-per-s 80
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import requests
+
+from eval.corpus import TOPICS
+from eval.fake_openai import FakeConfig, FakeOpenAI, add_config_args
+from eval.metrics import percentile
+from eval.pdfgen import guideline_pages, make_pdf
+
+REPORTS_DIR = Path("eval/reports")
+
+
+def _latency(xs: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(xs, 50), 1),
+        "p95": round(percentile(xs, 95), 1),
+        "max": round(max(xs, default=0.0), 1),
+    }
+
+
+class _Client(requests.Session):
+    """requests with paths relative to the API base URL."""
+
+    def __init__(self, base_url: str) -> None:
+        super().__init__()
+        self.base_url = base_url
+
+    def request(self, method: str, url: str, *args: Any, **kwargs: Any):
+        kwargs.setdefault("timeout", 120)
+        return super().request(method, self.base_url + url, *args, **kwargs)
+
+
+def _serve_api() -> tuple[Any, str]:
+    """The API under uvicorn on a free local port (a real server, so the
+    stream timings are what a client sees)."""
+    import socket
+
+    import uvicorn
+
+    from apps.api.main import app
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, name="api", daemon=True).start()
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(600):
+        try:
+            if requests.get(f"{base_url}/ready", timeout=1).ok:
+                return server, base_url
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("API did not become ready")
+
+
+def run(client, docs: int, pages: int, asks: int, seed: int) -> Dict[str, Any]:
+    topics = [TOPICS[i % len(TOPICS)] for i in range(docs)]
+    t0 = time.perf_counter()
+    doc_by_topic: Dict[str, str] = {}
+    jobs = {}
+    for i, topic in enumerate(topics):
+        pdf = make_pdf(guideline_pages(pages, seed=seed + i, topic=topic))
+        r = client.post(
+            "/ingest",
+            files={"file": (f"guideline_{i}.pdf", pdf, "application/pdf")},
+            data={"doc_id": f"doc_e2e_{i}", "title": topic.split()[0]},
+        )
+        r.raise_for_status()
+        jobs[r.json()["job_id"]] = topic
+        doc_by_topic[topic] = r.json()["doc_id"]
+    while True:
+        status = [client.get(f"/ingest/status/{j}").json() for j in jobs]
+        if all(s["status"] in ("done", "error") for s in status):
+            break
+        time.sleep(0.05)
+    ingest_s = time.perf_counter() - t0
+    errors = [s["error"] for s in status if s["status"] == "error"]
+
+    ask_ms, stream_first_ms, stream_ms, hits = [], [], [], 0
+    for i in range(asks):
+        topic = topics[i % len(topics)]
+        question = f"What is recommended about {topic.split()[1]}?"
+        t = time.perf_counter()
+        r = client.post("/ask", json={"question": question})
+        ask_ms.append((time.perf_counter() - t) * 1000)
+        r.raise_for_status()
+        cites = r.json()["citations"]
+        hits += bool(cites) and cites[0]["doc_id"] == doc_by_topic[topic]
+
+        t = time.perf_counter()
+        first = None
+        with client.post("/ask/stream", json={"question": question}, stream=True) as s:
+            for _ in s.iter_content(chunk_size=None):
+                first = first or (time.perf_counter() - t) * 1000
+        stream_first_ms.append(first or 0.0)
+        stream_ms.append((time.perf_counter() - t) * 1000)
+
+    return {
+        "ingest": {
+            "docs": docs,
+            "pages": docs * pages,
+            "chunks": sum(s["total_chunks"] for s in status),
+            "seconds": round(ingest_s, 2),
+            "pages_per_s": round(docs * pages / ingest_s, 1),
+            "errors": errors,
+        },
+        "ask_ms": _latency(ask_ms),
+        "stream_first_token_ms": _latency(stream_first_ms),
+        "stream_total_ms": _latency(stream_ms),
+        "retrieval_hit_rate": round(hits / asks, 3) if asks else None,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=4)
+    ap.add_argument("--pages", type=int, default=20)
+    ap.add_argument("--asks", type=int, default=20)
+    ap.add_argument("--data-dir", default=None, help="default: a fresh temp dir")
+    ap.add_argument("--save", action="store_true", help="write eval/reports/")
+    add_config_args(ap)  # fake API behaviour; --seed also seeds the corpus
+    args = vars(ap.parse_args())
+    run_args = {k: args.pop(k) for k in ("docs", "pages", "asks")}
+    data_dir = args.pop("data_dir") or tempfile.mkdtemp(prefix="gc_e2e_")
+    save = args.pop("save")
+
+    with FakeOpenAI(FakeConfig(**args)) as fake:
+        # settings are read at import time: configure before importing the app
+        os.environ.update(
+            OPENAI_BASE_URL=fake.base_url,
+            OPENAI_API_KEY="fake-key",
+            DATA_DIR=str(data_dir),
+        )
+        server, base_url = _serve_api()
+        try:
+            report = run(_Client(base_url), seed=args["seed"], **run_args)
+        finally:
+            server.should_exit = True
+        report["fake_openai"] = {"config": args, "stats": fake.stats()}
+    report["data_dir"] = str(data_dir)
+
+    print(json.dumps(report, indent=2))
+    if save:
+        REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = REPORTS_DIR / f"e2e_offline_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Saved report: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+Offline, deterministic stand-in for the OpenAI API.
+
+Implements the endpoints this stack uses: embeddings (float and base64),
+chat completions (plain and streamed) and model retrieval (warm-up). Point
+the API at it with OPENAI_BASE_URL and any OPENAI_API_KEY:
+
+    python -m eval.fake_openai --port 8089 --latency-ms 80 --tokens-per-s 60
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake uvicorn ...
+
+- Embeddings are hashed bags of words: identical text gives identical
+  vectors, texts sharing words are close, and every model name spans its
+  own vector space (so re-embedding migrations behave like the real thing).
+- Chat answers quote the first guideline excerpt of the prompt, so they are
+  deterministic and cite retrieved text.
+- Latency is lognormal around `latency_ms` with a `slow_prob` tail of
+  `slow_ms`; streams emit `tokens_per_s` words per second.
+- Failure injection: 429 with Retry-After (`rate_limit_prob`), 500
+  (`error_prob`), hanging for `hang_s` (`hang_prob`) and streams cut off
+  mid-answer (`drop_prob`). The injection RNG is seeded, so a run with the
+  same request sequence sees the same faults.
+
+`GET /stats` returns request and fault counters. In-process use (tests,
+benchmarks): `with FakeOpenAI(FakeConfig(...)) as fake: fake.base_url`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import numpy as np
+
+MODEL_DIMS = {"text-embedding-3-large": 3072}
+DEFAULT_DIM = 1536
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 0.0
+    jitter: float = 0.25  # sigma of the lognormal latency factor
+    slow_prob: float = 0.0
+    slow_ms: float = 1000.0
+    tokens_per_s: float = 0.0  # 0 = stream as fast as possible
+    rate_limit_prob: float = 0.0
+    retry_after_s: float = 1.0
+    error_prob: float = 0.0
+    hang_prob: float = 0.0
+    hang_s: float = 30.0
+    drop_prob: float = 0.0
+    seed: int = 0
+
+
+@lru_cache(maxsize=200_000)
+def _token_vector(model: str, dim: int, token: str) -> np.ndarray:
+    seed = hashlib.blake2b(f"{model}\0{token}".encode(), digest_size=8).digest()
+    return np.random.default_rng(int.from_bytes(seed, "big")).standard_normal(dim)
+
+
+def embed_text(text: str, model: str, dim: int | None = None) -> np.ndarray:
+    """Deterministic unit vector for `text` in `model`'s space."""
+    dim = dim or MODEL_DIMS.get(model, DEFAULT_DIM)
+    counts = Counter(_TOKEN.findall(text.lower()))
+    vec = np.zeros(dim)
+    for token, n in counts.items():
+        vec += (1.0 + np.log(n)) * _token_vector(model, dim, token)
+    norm = np.linalg.norm(vec)
+    if norm == 0.0:
+        return _token_vector(model, dim, "")  # empty text: a fixed vector
+    return vec / norm
+
+
+class HashEmbedder:
+    """In-process embedder with the fake API's vectors, for benchmarks that
+    should not pay for HTTP (same interface as OpenAIEmbedder)."""
+
+    def __init__(
+        self, model: str = "text-embedding-3-small", dim: int | None = None
+    ) -> None:
+        self.model = model
+        self.dim = dim
+
+    def embed(
+        self, texts: List[str], deadline: Any = None, model: str | None = None
+    ) -> List[List[float]]:
+        return [embed_text(t, model or self.model, self.dim).tolist() for t in texts]
+
+
+def fake_answer(messages: List[Dict[str, Any]]) -> str:
+    """First excerpt of the last user message, or an echo of the question."""
+    prompt = str(messages[-1].get("content", "")) if messages else ""
+    _, _, excerpts = prompt.partition("Guideline excerpts:")
+    lines = [ln.strip() for ln in excerpts.splitlines() if ln.strip()]
+    body = [ln for ln in lines if not ln.startswith("[")]
+    if body:
+        quote = " ".join(body[0].split()[:60])
+        return f"According to the guideline excerpts: {quote} [1]"
+    question = " ".join(prompt.split()[:40])
+    return f"Offline answer (no guideline context) to: {question}"
+
+
+class _Faults:
+    def __init__(self, config: FakeConfig) -> None:
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.stats: Counter[str] = Counter()
+
+    def draw(self, endpoint: str, stream: bool = False) -> tuple[str | None, float]:
+        """(fault or None, latency in seconds) for one request; only streams
+        can be dropped."""
+        c = self.config
+        with self.lock:
+            self.stats[f"requests.{endpoint}"] += 1
+            r = self.rng.random()
+            fault = None
+            for name, p in (
+                ("rate_limited", c.rate_limit_prob),
+                ("error", c.error_prob),
+                ("hang", c.hang_prob),
+                ("drop", c.drop_prob if stream else 0.0),
+            ):
+                if r < p:
+                    fault = name
+                    break
+                r -= p
+            slow = self.rng.random() < c.slow_prob
+            factor = self.rng.lognormvariate(0.0, c.jitter) if c.jitter else 1.0
+            if fault:
+                self.stats[f"faults.{fault}"] += 1
+        latency_ms = (c.slow_ms if slow else c.latency_ms) * factor
+        return fault, latency_ms / 1000.0
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self.lock:
+            self.stats[key] += n
+
+
+def _make_handler(faults: _Faults):
+    config = faults.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def _json(
+            self, status: int, obj: Any, headers: Dict[str, str] | None = None
+        ) -> None:
+            body = json.dumps(obj).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, message: str, kind: str) -> None:
+            headers = {}
+            if status == 429:
+                headers["Retry-After"] = str(config.retry_after_s)
+            self._json(status, {"error": {"message": message, "type": kind}}, headers)
+
+        def _body(self) -> Dict[str, Any]:
+            n = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(n) or b"{}")
+
+        def _begin(self, endpoint: str, stream: bool = False) -> str | None:
+            """Wait out the drawn latency and answer injected 429/500s.
+            Returns "answered" if the response was sent, else the fault left
+            to the caller ("drop") or None."""
+            fault, latency_s = faults.draw(endpoint, stream)
+            if fault == "hang":
+                time.sleep(config.hang_s)
+            time.sleep(latency_s)
+            if fault == "rate_limited":
+                self._error(429, "Rate limit reached (injected).", "rate_limit")
+                return "answered"
+            if fault == "error":
+                self._error(500, "Internal error (injected).", "server_error")
+                return "answered"
+            return fault
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.rstrip("/") == "/stats":
+                with faults.lock:
+                    stats = dict(faults.stats)
+                self._json(200, {"config": asdict(config), "stats": stats})
+            elif self.path.startswith("/v1/models/"):
+                model = self.path.rsplit("/", 1)[-1]
+                self._json(
+                    200,
+                    {"id": model, "object": "model", "created": 0, "owned_by": "fake"},
+                )
+            else:
+                self._error(404, f"Unknown path {self.path}", "invalid_request_error")
+
+        def do_POST(self) -> None:  # noqa: N802
+            req = self._body()
+            if self.path == "/v1/embeddings":
+                if self._begin("embeddings") != "answered":
+                    self._embeddings(req)
+            elif self.path == "/v1/chat/completions":
+                fault = self._begin("chat", stream=bool(req.get("stream")))
+                if fault != "answered":
+                    if req.get("stream"):
+                        self._chat_stream(req, drop=fault == "drop")
+                    else:
+                        self._chat(req)
+            else:
+                self._error(404, f"Unknown path {self.path}", "invalid_request_error")
+
+        def _embeddings(self, req: Dict[str, Any]) -> None:
+            texts = req.get("input", [])
+            texts = [texts] if isinstance(texts, str) else texts
+            model = req.get("model", "")
+            as_base64 = req.get("encoding_format") == "base64"
+            data = []
+            for i, text in enumerate(texts):
+                vec = embed_text(str(text), model, req.get("dimensions"))
+                emb: Any = (
+                    base64.b64encode(vec.astype("<f4").tobytes()).decode()
+                    if as_base64
+                    else vec.tolist()
+                )
+                data.append({"object": "embedding", "index": i, "embedding": emb})
+            tokens = sum(len(str(t).split()) for t in texts)
+            faults.count("embedded_texts", len(texts))
+            self._json(
+                200,
+                {
+                    "object": "list",
+                    "data": data,
+                    "model": model,
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                },
+            )
+
+        def _chat(self, req: Dict[str, Any]) -> None:
+            answer = fake_answer(req.get("messages", []))
+            n_out = len(answer.split())
+            time.sleep(n_out / config.tokens_per_s if config.tokens_per_s else 0.0)
+            faults.count("completion_tokens", n_out)
+            self._json(
+                200,
+                {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": req.get("model", ""),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": answer},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": 0,
+                        "completion_tokens": n_out,
+                        "total_tokens": n_out,
+                    },
+                },
+            )
+
+        def _chunk(self, data: bytes) -> None:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def _chat_stream(self, req: Dict[str, Any], drop: bool) -> None:
+            words = fake_answer(req.get("messages", [])).split(" ")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            base = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": req.get("model", ""),
+            }
+            delay = 1.0 / config.tokens_per_s if config.tokens_per_s else 0.0
+            try:
+                for i, word in enumerate(words):
+                    if drop and i == len(words) // 2:
+                        self.close_connection = True
+                        return  # cut off: no terminating chunk
+                    delta = {"content": word if i == 0 else " " + word}
+                    if i == 0:
+                        delta["role"] = "assistant"
+                    choice = {"index": 0, "delta": delta, "finish_reason": None}
+                    event = {**base, "choices": [choice]}
+                    self._chunk(b"data: " + json.dumps(event).encode() + b"\n\n")
+                    faults.count("completion_tokens")
+                    time.sleep(delay)
+                done = {"index": 0, "delta": {}, "finish_reason": "stop"}
+                event = {**base, "choices": [done]}
+                self._chunk(b"data: " + json.dumps(event).encode() + b"\n\n")
+                self._chunk(b"data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # the client went away: stop generating, like the real API
+                faults.count("streams_cancelled")
+                self.close_connection = True
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        import sys
+
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)  # clients hang up
+
+
+class FakeOpenAI:
+    """The fake API on a background thread (port 0 = pick a free one)."""
+
+    def __init__(
+        self, config: FakeConfig | None = None, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.config = config or FakeConfig()
+        self._faults = _Faults(self.config)
+        self.server = _Server((host, port), _make_handler(self._faults))
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="fake-openai", daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def stats(self) -> Dict[str, int]:
+        with self._faults.lock:
+            return dict(self._faults.stats)
+
+    def start(self) -> FakeOpenAI:
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> FakeOpenAI:
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def add_config_args(ap: argparse.ArgumentParser) -> None:
+    """--latency-ms, --rate-limit-prob, ... for every FakeConfig field."""
+    for name, default in asdict(FakeConfig()).items():
+        ap.add_argument(
+            f"--{name.replace('_', '-')}", type=type(default), default=default
+        )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    add_config_args(ap)
+    args = vars(ap.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+    fake = FakeOpenAI(FakeConfig(**args), host=host, port=port)
+    print(f"fake OpenAI API on {fake.base_url} ({asdict(fake.config)})")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+HNSW recall-vs-latency sweep over the indexed corpus.
+
+Copies the vectors of the active collection into scratch collections built
+with each (space, M, ef_construction) combination, then for every query-time
+ef measures recall@k against exact (brute-force) search and per-query
+latency. Queries are the eval dataset questions (embedded with the configured
+model; needs OPENAI_API_KEY) plus, or instead (`--no-dataset`), stored chunk
+vectors with a little noise added.
+
+The live index is only read. Apply the chosen operating point with
+HNSW_SPACE / HNSW_M / HNSW_EF_CONSTRUCTION / HNSW_EF_SEARCH and, for the
+build-time values, `POST /index/compact`.
+
+Run:
+    python -m eval.hnsw_sweep --m 8,16,32 --ef 10,20,40,80,160 --k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from apps.api.config import settings
+from core.retrieval.sharding import ShardedVectorStore, open_store
+from core.retrieval.vectorstore import hnsw_configuration
+from eval.metrics import percentile
+from eval.run_eval import DATASET_PATH, REPORTS_DIR, load_jsonl
+
+
+def _ints(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def load_corpus(store, batch_size: int = 1000):
+    """All vectors of the index (every shard, when sharded)."""
+    shards = (
+        store.shards().values() if isinstance(store, ShardedVectorStore) else [store]
+    )
+    ids: List[str] = []
+    embs: List[List[float]] = []
+    for shard in shards:
+        offset = 0
+        while True:
+            res = shard.col.get(limit=batch_size, offset=offset, include=["embeddings"])
+            if not res["ids"]:
+                break
+            ids.extend(res["ids"])
+            embs.extend(res["embeddings"])
+            offset += len(res["ids"])
+    return ids, np.asarray(embs, dtype=np.float32)
+
+
+def dataset_queries() -> List[str]:
+    return [
+        ex["question"]
+        for ex in load_jsonl(DATASET_PATH)
+        if ex.get("type", "ask") == "ask" and ex.get("question")
+    ]
+
+
+def sample_queries(vectors: np.ndarray, n: int, noise: float, seed: int):
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.choice(len(vectors), size=min(n, len(vectors)), replace=False)]
+    q = picks + rng.normal(0.0, noise, size=picks.shape).astype(np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int, space: str):
+    if space == "l2":
+        d = (
+            (queries**2).sum(1)[:, None]
+            - 2 * queries @ vectors.T
+            + (vectors**2).sum(1)[None, :]
+        )
+    elif space == "cosine":
+        vn = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        qn = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        d = 1.0 - qn @ vn.T
+    else:  # ip
+        d = 1.0 - queries @ vectors.T
+    return np.argsort(d, axis=1)[:, :k]
+
+
+def fresh_client(path: str):
+    """New client with no cached segments: a changed ef_search only takes
+    effect when the HNSW segment is loaded again."""
+    import chromadb
+    from chromadb.api.client import SharedSystemClient
+    from chromadb.config import Settings as ChromaSettings
+
+    SharedSystemClient.clear_system_cache()
+    return chromadb.PersistentClient(
+        path=path, settings=ChromaSettings(anonymized_telemetry=False)
+    )
+
+
+def build(client, name: str, cfg: Dict[str, Any], ids, vectors, batch_size: int):
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+    col = client.create_collection(name=name, configuration=cfg)
+    t0 = time.perf_counter()
+    for i in range(0, len(ids), batch_size):
+        col.add(ids=ids[i : i + batch_size], embeddings=vectors[i : i + batch_size])
+    return col, time.perf_counter() - t0
+
+
+def measure(col, ids, queries: np.ndarray, truth: np.ndarray, k: int):
+    hits = 0
+    lat: List[float] = []
+    for q, want in zip(queries, truth):
+        t0 = time.perf_counter()
+        res = col.query(query_embeddings=[q.tolist()], n_results=k, include=[])
+        lat.append((time.perf_counter() - t0) * 1000.0)
+        got = set(res["ids"][0])
+        hits += sum(1 for j in want if ids[j] in got)
+    return {
+        "recall": round(hits / (len(queries) * k), 4),
+        "p50_ms": round(percentile(lat, 50), 3),
+        "p95_ms": round(percentile(lat, 95), 3),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--space", default=settings.hnsw_space)
+    ap.add_argument("--m", default=str(settings.hnsw_m), help="comma-separated")
+    ap.add_argument("--ef-construction", default=str(settings.hnsw_ef_construction))
+    ap.add_argument("--ef", default="10,20,40,80,160", help="query-time ef values")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--samples", type=int, default=200, help="noisy corpus queries")
+    ap.add_argument("--noise", type=float, default=0.02)
+    ap.add_argument("--no-dataset", action="store_true")
+    ap.add_argument("--batch-size", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    store = open_store(None)
+    ids, vectors = load_corpus(store, args.batch_size)
+    if len(ids) < args.k:
+        raise SystemExit(f"Index has {len(ids)} entries; ingest documents first.")
+
+    queries = [sample_queries(vectors, args.samples, args.noise, args.seed)]
+    if not args.no_dataset and settings.openai_api_key:
+        from core.retrieval.embedder import OpenAIEmbedder
+
+        embedder = OpenAIEmbedder(settings.openai_api_key, settings.openai_embed_model)
+        questions = dataset_queries()
+        if questions:
+            queries.append(np.asarray(embedder.embed(questions), dtype=np.float32))
+    q = np.concatenate(queries)
+    truth = exact_top_k(vectors, q, args.k, args.space)
+
+    rows: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="hnsw_sweep_") as tmp:
+        for m in _ints(args.m):
+            for efc in _ints(args.ef_construction):
+                cfg = hnsw_configuration(args.space, m, efc)
+                _, build_s = build(
+                    fresh_client(tmp),
+                    "sweep",
+                    cfg,
+                    ids,
+                    vectors.tolist(),
+                    args.batch_size,
+                )
+                for ef in _ints(args.ef):
+                    fresh_client(tmp).get_collection("sweep").modify(
+                        configuration={"hnsw": {"ef_search": ef}}
+                    )
+                    col = fresh_client(tmp).get_collection("sweep")
+                    row = {"space": args.space, "M": m, "ef_construction": efc}
+                    row.update(ef_search=ef, build_s=round(build_s, 2))
+                    row.update(measure(col, ids, q, truth, args.k))
+                    rows.append(row)
+                    print(json.dumps(row), flush=True)
+
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = Path(REPORTS_DIR) / f"hnsw_sweep_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    report = {
+        "entries": len(ids),
+        "queries": len(q),
+        "k": args.k,
+        "current": hnsw_configuration(),
+        "rows": rows,
+    }
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
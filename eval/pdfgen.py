@@ -0,0 +1,108 @@
+"""
+Minimal text-only PDF writer for offline tests and benchmarks.
+
+Produces valid PDF 1.4 files (one Helvetica text stream per page) that pypdf
+extracts line by line, so the real ingest path can run without sample
+guidelines or extra dependencies.
+
+Run:
+    python -m eval.pdfgen out.pdf --pages 12 --seed 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import textwrap
+from pathlib import Path
+from typing import List, Sequence
+
+from eval.bench_serialization import WORDS
+
+LINES_PER_PAGE = 48
+_TOP, _LEADING, _LEFT = 760, 14, 56
+
+
+def _escape(line: str) -> str:
+    text = line.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(lines: Sequence[str]) -> bytes:
+    ops = [f"BT /F1 10 Tf {_LEADING} TL {_LEFT} {_TOP} Td"]
+    ops += [f"({_escape(line)}) Tj T*" for line in lines[:LINES_PER_PAGE]]
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def make_pdf(pages: Sequence[Sequence[str]], title: str | None = None) -> bytes:
+    """PDF bytes with one page per entry of `pages` (lists of text lines)."""
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for lines in pages:
+        stream = _page_stream(lines)
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids),
+        len(kids),
+    )
+    if title:
+        objects.append(b"<< /Title (%s) >>" % _escape(title).encode("latin-1"))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    info = b" /Info %d 0 R" % len(objects) if title else b""
+    out += b"trailer\n<< /Size %d /Root 1 0 R%s >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        info,
+        xref,
+    )
+    return bytes(out)
+
+
+def guideline_pages(n_pages: int, seed: int = 0, topic: str = "") -> List[List[str]]:
+    """Deterministic guideline-like text: a heading and numbered
+    recommendations per page, with `topic` words mixed in."""
+    rng = random.Random(seed)
+    vocab = WORDS + topic.split() * 3
+    pages = []
+    for p in range(1, n_pages + 1):
+        lines = [f"Section {p}. {' '.join(rng.choice(vocab) for _ in range(4))}"]
+        for r in range(1, rng.randint(6, 10)):
+            words = [rng.choice(vocab) for _ in range(rng.randint(12, 30))]
+            lines += textwrap.wrap(f"{p}.{r} " + " ".join(words) + ".", 95)
+        pages.append(lines)
+    return pages
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("out", type=Path)
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--topic", default="")
+    args = ap.parse_args()
+    pages = guideline_pages(args.pages, args.seed, args.topic)
+    args.out.write_bytes(make_pdf(pages, title=args.out.stem))
+    print(f"wrote {args.out} ({args.pages} pages)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import hashlib
+
+import pytest
+
+
+class FakeEmbedder:
+    """Deterministic 8-d embeddings from the sha256 of the text (no API).
+
+    Vectors of model "m2" are the same ones scaled by 2: rankings agree with
+    any other model's, distances do not (for re-embedding tests)."""
+
+    def __init__(self, model: str = "fake-embed") -> None:
+        self.model = model
+        self.scale = {"m2": 2.0}
+
+    def embed(self, texts, deadline=None, model=None):
+        scale = self.scale.get(model or self.model, 1.0)
+        return [
+            [scale * b / 255 for b in hashlib.sha256(t.encode()).digest()[:8]]
+            for t in texts
+        ]
+
+
+@pytest.fixture
+def fake_embedder():
+    """FakeEmbedder factory: `fake_embedder(model)`, or `migration._embedder`."""
+    return FakeEmbedder
@@ -0,0 +1,17 @@
+from eval.bench_scaling import run
+from eval.corpus import iter_docs, make_doc
+
+
+def test_corpus_is_deterministic_per_seed_and_index():
+    docs = list(iter_docs(3, pages=4, seed=5))
+    assert make_doc(2, pages=4, seed=5) == docs[2]
+    assert make_doc(2, pages=4, seed=6).pages != docs[2].pages
+    chunks = docs[0].chunks(300, 50)
+    assert chunks and {"id", "page", "text"} <= set(chunks[0])
+
+
+def test_scaling_run_reports_one_row_per_checkpoint(tmp_path):
+    rows = run(tmp_path, sizes=[40, 10], pages=3, dim=32, queries=5)
+    assert [r["chunks"] >= s for r, s in zip(rows, [10, 40])] == [True, True]
+    assert rows[0]["chunks"] < rows[1]["chunks"]
+    assert rows[-1]["disk_mb"] > 0 and rows[-1]["query_ms"]["p99"] > 0
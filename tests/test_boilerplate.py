@@ -0,0 +1,39 @@
+from core.ingestion.boilerplate import strip_repeated_lines
+
+
+def _page(p: int) -> str:
+    return "\n".join(
+        [
+            "WHO Guideline on Malaria 2023",
+            "10",  # a dose that starts a table on every page
+            f"{p}.1 Give artesunate {p * 2} mg/kg for severe malaria.",
+            f"Dose {p} mg",
+            f"Weight band {p * 5} kg",
+            "© WHO 2023. All rights reserved.",
+            f"Page {p} of 10",
+        ]
+    )
+
+
+def test_running_headers_footers_and_page_numbers_are_removed():
+    pages = [(p, _page(p)) for p in range(1, 11)]
+    out, stats = strip_repeated_lines(pages)
+    assert out[2] == (
+        3,
+        "10\n3.1 Give artesunate 6 mg/kg for severe malaria.\nDose 3 mg\nWeight band 15 kg",
+    )
+    assert stats["boilerplate_lines_removed"] == 30
+    assert stats["chars_saved"] == sum(len(t) for _, t in pages) - sum(
+        len(t) for _, t in out
+    )
+    assert stats["est_tokens_saved"] == stats["chars_saved"] // 4
+
+
+def test_short_documents_and_rare_lines_are_left_alone():
+    pages = [(p, _page(p)) for p in range(1, 3)]
+    assert strip_repeated_lines(pages)[0] == pages
+    words = "asthma sepsis malaria anaemia diabetes pneumonia tuberculosis".split()
+    mixed = [(p, _page(p)) for p in range(1, 4)]
+    mixed += [(p, f"Annex on {w}") for p, w in enumerate(words, start=4)]
+    out, stats = strip_repeated_lines(mixed, min_fraction=0.5)
+    assert out == mixed and stats["boilerplate_lines_removed"] == 0
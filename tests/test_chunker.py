@@ -0,0 +1,42 @@
+from core.ingestion.chunker import chunk_structured, est_tokens
+
+
+def _sentence(i: int) -> str:
+    return f"Recommendation {i} applies to adults with moderate disease only."
+
+
+def test_sentences_are_packed_whole_and_run_across_page_breaks():
+    pages = [
+        (1, "1. ASSESSMENT\n" + " ".join(_sentence(i) for i in range(6)) + " Give"),
+        (2, "oxygen when saturation is low.\n" + _sentence(6)),
+    ]
+    chunks = chunk_structured(pages, target_tokens=60, overlap_tokens=0)
+    texts = [" ".join(c.text.split()) for c in chunks]
+    assert texts[0].startswith("1. ASSESSMENT")
+    for i in range(7):
+        assert sum(_sentence(i) in t for t in texts) == 1
+    assert all(est_tokens(c.text) <= 60 for c in chunks)
+    broken = [c for c in chunks if "Give oxygen when saturation is low." in c.text]
+    assert len(broken) == 1 and (broken[0].page, broken[0].page_end) == (1, 2)
+    assert [c.chunk_id for c in chunks][:2] == ["p1_s0", "p1_s1"]
+
+
+def test_headings_start_chunks_and_overlap_stays_within_a_section():
+    body = " ".join(_sentence(i) for i in range(8))
+    pages = [(1, f"1. DIAGNOSIS\n{body}\n2. TREATMENT\n{body}")]
+    chunks = chunk_structured(pages, target_tokens=80, overlap_tokens=20)
+    starts = [c for c in chunks if c.text.startswith("2. TREATMENT")]
+    assert len(starts) == 1
+    before = chunks[chunks.index(starts[0]) - 1]
+    assert "TREATMENT" not in before.text
+    # consecutive chunks of a section repeat the last sentence
+    assert chunks[1].text.splitlines()[0] == chunks[0].text.splitlines()[-1]
+    assert not any(c.text.rstrip().endswith("TREATMENT") for c in chunks)
+
+
+def test_overlong_sentences_are_cut_between_words_and_tiny_tail_is_merged():
+    long_line = " ".join(["word"] * 200) + "."
+    chunks = chunk_structured([(1, long_line + " Short end.")], target_tokens=50)
+    assert all(est_tokens(c.text) <= 50 + 3 for c in chunks)
+    assert chunks[-1].text.endswith("Short end.")
+    assert "".join(c.text for c in chunks).count("word") == 200
@@ -0,0 +1,57 @@
+import threading
+
+from core.retrieval import maintenance
+from core.retrieval.vectorstore import ChromaVectorStore
+from eval.fake_openai import HashEmbedder
+
+
+def _chunks(text: str, n: int = 3) -> list[dict]:
+    return [{"id": f"c{i}", "page": 1, "text": f"{text} ({i})"} for i in range(n)]
+
+
+def test_compaction_keeps_writes_made_during_the_copy_and_the_switch(
+    tmp_path, monkeypatch
+):
+    store = ChromaVectorStore(str(tmp_path), HashEmbedder(dim=32))
+    store.upsert_chunks("asthma", "Asthma", None, None, _chunks("Use a spacer."))
+    store.upsert_chunks("sepsis", "Sepsis", None, None, _chunks("Give fluids."))
+    store.delete_doc("sepsis")
+
+    copy_ids = maintenance._copy_ids
+    calls = []
+    blocked = []
+
+    def hooked(src, dst, ids, batch_size):
+        copy_ids(src, dst, ids, batch_size)
+        calls.append(src.name)
+        if len(calls) == 1:
+            # bulk copy done, writers still running: re-upsert an existing id
+            store.update_metadata("asthma", ["c0", "c1", "c2"], "Asthma v2", None, None)
+            store.upsert_chunks(
+                "asthma", "Asthma v2", None, None, [_chunks("Use a mask.")[0]]
+            )
+        elif len(calls) == 3:
+            # final catch-up under the writer lock: a new write has to wait
+            t = threading.Thread(
+                target=store.upsert_chunks,
+                args=("malaria", "Malaria", None, None, _chunks("Give ACT.")),
+            )
+            t.start()
+            t.join(0.3)
+            assert t.is_alive()
+            blocked.append(t)
+
+    monkeypatch.setattr(maintenance, "_copy_ids", hooked)
+    report = maintenance.compact(store)
+    blocked[0].join()
+
+    assert store.collection_name == report["after"]["collection"] != "guidelines"
+    assert report["caught_up"] == {"copied": 3, "removed": 0}
+    res = store.col.get(include=["documents", "metadatas"])
+    by_id = dict(zip(res["ids"], zip(res["documents"], res["metadatas"])))
+    assert by_id["asthma:c0"][0] == "Use a mask. (0)"
+    assert {m["title"] for d, m in by_id.values() if m["doc_id"] == "asthma"} == {
+        "Asthma v2"
+    }
+    assert store.existing_chunk_ids("malaria") == {"c0", "c1", "c2"}
+    assert store.existing_chunk_ids("sepsis") == set()
@@ -0,0 +1,49 @@
+from core.ingestion.chunker import Chunk
+from core.ingestion.dedup import collapse_near_duplicates
+from core.retrieval.vectorstore import ChromaVectorStore
+from eval.fake_openai import HashEmbedder
+from eval.pdfgen import guideline_pages
+
+DISCLAIMER = (
+    "This guideline does not replace clinical judgement. The authors accept no "
+    "liability for decisions made using it. Reproduction for non-commercial "
+    "educational use is permitted provided the source is acknowledged. Page {}"
+)
+
+
+def _pages(n):
+    return ["\n".join(lines) for lines in guideline_pages(n, seed=4)]
+
+
+def test_repeated_boilerplate_collapses_to_one_chunk_with_all_pages():
+    chunks = []
+    for p, text in enumerate(_pages(5), start=1):
+        chunks.append(Chunk(f"p{p}_c0", p, text[:900]))
+        chunks.append(Chunk(f"p{p}_c1", p, DISCLAIMER.format(p)))
+
+    kept, stats = collapse_near_duplicates(chunks, threshold=0.8)
+    assert [c.chunk_id for c in kept] == [
+        "p1_c0",
+        "p1_c1",
+        "p2_c0",
+        "p3_c0",
+        "p4_c0",
+        "p5_c0",
+    ]
+    assert kept[1].pages == [1, 2, 3, 4, 5] and kept[0].pages == []
+    assert stats == {
+        "chunks_before_dedup": 10,
+        "duplicates_removed": 4,
+        "chunks_with_duplicates": 1,
+    }
+
+
+def test_collapsed_pages_are_stored_in_chunk_metadata(tmp_path):
+    store = ChromaVectorStore(str(tmp_path), HashEmbedder(dim=16))
+    chunks = [
+        {"id": "p1_c1", "page": 1, "text": DISCLAIMER, "pages": [1, 2, 7]},
+        {"id": "p1_c0", "page": 1, "text": "Give oxygen below 90% saturation."},
+    ]
+    store.upsert_chunks("doc", None, None, None, chunks)
+    metas = store.col.get(include=["metadatas"])["metadatas"]
+    assert sorted(m.get("pages", "") for m in metas) == ["", "1,2,7"]
@@ -0,0 +1,30 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apps.api.routers import ingest
+from core.registry.registry import DocumentRegistry
+from core.schemas.models import DocInfo
+
+
+def test_documents_paging_filters_and_etag(tmp_path, monkeypatch):
+    registry = DocumentRegistry(tmp_path / "registry.json")
+    for i, cat in enumerate(["a", "b", "a", "a", "b"]):
+        registry.add(DocInfo(doc_id=f"doc{i}", category=cat), file_hash=f"h{i}")
+    monkeypatch.setattr(ingest, "registry", registry)
+    app = FastAPI()
+    app.include_router(ingest.router)
+    client = TestClient(app)
+
+    r = client.get("/documents", params={"category": "a", "limit": 2})
+    assert [d["doc_id"] for d in r.json()["items"]] == ["doc0", "doc2"]
+    cursor = r.json()["next_cursor"]
+    r2 = client.get("/documents", params={"category": "a", "cursor": cursor})
+    assert [d["doc_id"] for d in r2.json()["items"]] == ["doc3"]
+    assert r2.json()["next_cursor"] is None
+
+    etag = r.headers["ETag"]
+    assert client.get("/documents", headers={"If-None-Match": etag}).status_code == 304
+    registry.delete("doc1")
+    r3 = client.get("/documents", headers={"If-None-Match": etag})
+    assert r3.status_code == 200 and r3.headers["ETag"] != etag
+    assert len(r3.json()["items"]) == 4
@@ -0,0 +1,53 @@
+import pytest
+from openai import OpenAI, RateLimitError
+
+from core.ingestion.pdf_loader import extract_page_pairs
+from eval.fake_openai import FakeConfig, FakeOpenAI
+from eval.pdfgen import guideline_pages, make_pdf
+
+
+def test_fake_api_is_deterministic_and_streams():
+    with FakeOpenAI() as fake:
+        client = OpenAI(api_key="fake", base_url=fake.base_url, max_retries=0)
+        texts = ["asthma inhaler dose", "asthma inhaler dosing", "renal failure"]
+        a = client.embeddings.create(model="text-embedding-3-small", input=texts)
+        b = client.embeddings.create(
+            model="text-embedding-3-small", input=texts, encoding_format="float"
+        )
+        va, vb = [d.embedding for d in a.data], [d.embedding for d in b.data]
+        assert len(va[0]) == 1536
+        assert va[0] == pytest.approx(vb[0], abs=1e-6)  # base64 == float
+
+        def dot(x, y):
+            return sum(i * j for i, j in zip(x, y))
+
+        assert dot(va[0], va[1]) > dot(va[0], va[2])
+
+        prompt = "Question: dose?\n\nGuideline excerpts:\n[1] (doc p.2)\nUse a spacer."
+        messages = [{"role": "user", "content": prompt}]
+        full = client.chat.completions.create(model="m", messages=messages)
+        streamed = "".join(
+            c.choices[0].delta.content or ""
+            for c in client.chat.completions.create(
+                model="m", messages=messages, stream=True
+            )
+            if c.choices
+        )
+        assert streamed == full.choices[0].message.content
+        assert "Use a spacer." in streamed
+        assert fake.stats()["requests.chat"] == 2
+
+
+def test_injected_rate_limit():
+    with FakeOpenAI(FakeConfig(rate_limit_prob=1.0)) as fake:
+        client = OpenAI(api_key="fake", base_url=fake.base_url, max_retries=0)
+        with pytest.raises(RateLimitError):
+            client.embeddings.create(model="m", input=["x"])
+        assert fake.stats()["faults.rate_limited"] == 1
+
+
+def test_generated_pdf_round_trips_through_extraction():
+    pages = guideline_pages(3, seed=1, topic="asthma inhaler")
+    extracted = extract_page_pairs(make_pdf(pages))
+    assert [p for p, _ in extracted] == [1, 2, 3]
+    assert extracted[0][1].splitlines() == pages[0]
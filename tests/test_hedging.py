@@ -0,0 +1,56 @@
+import time
+from dataclasses import replace
+
+import openai
+import pytest
+
+from apps.api import config
+from core.resilience.deadline import Deadline, DeadlineExceeded
+from core.resilience.hedging import Hedger
+from core.retrieval.embedder import OpenAIEmbedder
+from eval.fake_openai import FakeConfig, FakeOpenAI
+
+
+def test_hedge_wins_when_primary_is_slow():
+    hedger = Hedger("t", enabled=True, max_hedge_rate=1.0, min_samples=5)
+    for _ in range(5):
+        hedger.upstream.add(0.01)
+
+    calls = []
+
+    def fn(timeout):
+        calls.append(timeout)
+        time.sleep(0.5 if len(calls) == 1 else 0.0)
+        return len(calls)
+
+    t0 = time.perf_counter()
+    assert hedger.call(fn, Deadline.after(5)) == 2
+    assert time.perf_counter() - t0 < 0.4
+    assert hedger.snapshot()["hedge_wins"] == 1
+
+
+def test_hedge_rate_is_capped():
+    hedger = Hedger("t", enabled=True, max_hedge_rate=0.0, min_samples=1)
+    hedger.upstream.add(0.001)
+    assert hedger.call(lambda timeout: time.sleep(0.02) or "ok", None) == "ok"
+    assert hedger.snapshot()["hedged"] == 0
+
+
+def test_deadline_exceeded():
+    hedger = Hedger("t", enabled=True)
+    with pytest.raises(DeadlineExceeded):
+        hedger.call(lambda timeout: time.sleep(0.3), Deadline.after(0.05))
+
+
+def test_deadline_bound_call_is_not_retried_past_the_deadline(monkeypatch):
+    with FakeOpenAI(FakeConfig(hang_prob=1.0, hang_s=3.0)) as fake:
+        monkeypatch.setattr(
+            config, "settings", replace(config.settings, openai_base_url=fake.base_url)
+        )
+        embedder = OpenAIEmbedder("fake", "text-embedding-3-small")
+        timeout_ms = 300
+        t0 = time.perf_counter()
+        with pytest.raises(openai.APITimeoutError):
+            embedder.embed(["x"], deadline=Deadline.after(timeout_ms / 1000.0))
+        assert time.perf_counter() - t0 < 1.5 * timeout_ms / 1000.0
+        assert fake.stats()["requests.embeddings"] == 1
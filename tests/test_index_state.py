@@ -0,0 +1,34 @@
+import multiprocessing
+
+from core.retrieval.index_state import IndexState
+
+
+def _bump(persist_dir, n: int) -> None:
+    state = IndexState(persist_dir)
+    for i in range(n):
+        state.bump_version()
+        state.assign_shard(f"doc_{multiprocessing.current_process().pid}_{i}", "s0")
+
+
+def test_updates_from_concurrent_processes_are_never_lost(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_bump, args=(tmp_path, 40)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+
+    state = IndexState(tmp_path)
+    assert state.read()["version"] == 120
+    assert len(state.shard_map()) == 120
+
+
+def test_cached_state_follows_every_write(tmp_path):
+    reader, writer = IndexState(tmp_path), IndexState(tmp_path)
+    writer.update(active_collection="guidelines__g2")
+    assert reader.active_collection() == "guidelines__g2"
+    # same size, written within the same mtime tick: the counter still differs
+    writer.update(active_collection="guidelines__g3")
+    assert reader.active_collection() == "guidelines__g3"
+    assert reader.version_key() == "guidelines__g3:0"
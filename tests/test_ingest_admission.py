@@ -0,0 +1,74 @@
+import io
+import threading
+import time
+import zipfile
+
+from apps.api import bulk
+from apps.api.bulk import IngestAdmission
+from apps.api.job_registry import JobRegistry, JobStatus
+
+
+def test_jobs_beyond_the_budget_wait_queued(monkeypatch):
+    jobs = JobRegistry()
+    monkeypatch.setattr(bulk, "job_registry", jobs)
+    adm = IngestAdmission(max_bytes=100, max_pages=10, max_queued=2)
+    for job_id in ("a", "b", "c"):
+        jobs.create(job_id, f"doc_{job_id}")
+        adm.enqueue()
+    assert adm.full()
+
+    release = threading.Event()
+    got_pages = threading.Event()
+
+    def first():
+        with adm.admit("a", 80) as use_pages:
+            use_pages(8)
+            got_pages.set()
+            release.wait(5)
+
+    t = threading.Thread(target=first)
+    t.start()
+    got_pages.wait(5)
+
+    # bytes were swapped for pages, so b fits the byte budget right away
+    with adm.admit("b", 80) as use_pages:
+        assert jobs.get("b").status == JobStatus.PENDING
+        waiter = threading.Thread(target=use_pages, args=(5,))
+        waiter.start()
+        time.sleep(0.1)
+        assert jobs.get("b").status == JobStatus.QUEUED
+        assert waiter.is_alive()
+        release.set()
+        waiter.join(5)
+        assert jobs.get("b").status == JobStatus.PROCESSING
+        assert adm.snapshot()["inflight_pages"] == 5
+
+    # c alone exceeds the byte budget: it runs once nothing else holds bytes
+    with adm.admit("c", 500):
+        assert adm.snapshot()["inflight_bytes"] == 500
+    t.join(5)
+    snap = adm.snapshot()
+    assert (snap["waiting"], snap["running"], snap["inflight_bytes"]) == (0, 0, 0)
+    assert snap["inflight_pages"] == 0
+    assert adm.retry_after() >= 1
+
+
+def test_zip_members_are_checked_before_they_are_inflated():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("bomb.pdf", b"%PDF-" + bytes(64 << 20))
+        for i in range(3):
+            zf.writestr(f"ok{i}.pdf", b"%PDF-" + bytes(1 << 20))
+        zf.writestr("notes.txt", b"not a pdf")
+    data = buf.getvalue()
+    assert len(data) < 1 << 20  # ~70 MB of PDFs in well under a megabyte
+
+    skipped = []
+    members = bulk.iter_zip_pdfs(
+        data, 2 << 20, 3 << 20, lambda name, reason: skipped.append((name, reason))
+    )
+    name, read = next(members)
+    assert name == "ok0.pdf" and skipped == [("bomb.pdf", "larger than 2 MB")]
+    assert len(read()) == (1 << 20) + 5
+    assert [name for name, _ in members] == ["ok1.pdf"]
+    assert skipped[1] == ("ok2.pdf", "zip expands to more than 3 MB")
@@ -0,0 +1,51 @@
+import json
+
+from apps.api.job_registry import JobRegistry, JobStatus
+
+
+def test_jobs_and_progress_survive_reload(tmp_path):
+    path = tmp_path / "jobs.json"
+    reg = JobRegistry(path, save_interval_s=0)
+    reg.create("job_1", "doc_1", title="T")
+    reg.update("job_1", status=JobStatus.PROCESSING, total_chunks=4)
+    reg.add_indexed("job_1", 2)
+    reg.add_indexed("job_1", 1, indexed_pages=1)
+
+    reloaded = JobRegistry(path)
+    job = reloaded.get("job_1")
+    assert job.status == JobStatus.PROCESSING
+    assert job.title == "T"
+    assert (job.indexed_chunks, job.progress, job.indexed_pages) == (3, 75, 1)
+    assert [j.job_id for j in reloaded.active()] == ["job_1"]
+
+    reloaded.set_done("job_1", pages=2, chunks=4)
+    assert JobRegistry(path).active() == []
+
+
+def test_batch_progress_is_throttled_and_finished_jobs_are_pruned(tmp_path):
+    path = tmp_path / "jobs.json"
+    reg = JobRegistry(path, save_interval_s=60, keep_finished=2)
+    reg.create("job_0", "doc_0")
+    reg.update("job_0", status=JobStatus.PROCESSING, total_chunks=100)
+    writes = path.stat().st_mtime_ns
+    for _ in range(10):
+        reg.add_indexed("job_0", 5)
+    assert path.stat().st_mtime_ns == writes  # only in memory so far
+    assert reg.get("job_0").indexed_chunks == 50
+    reg.set_done("job_0", pages=1, chunks=100)  # status changes are written
+
+    for i in range(1, 4):
+        reg.create(f"job_{i}", f"doc_{i}")
+        if i == 2:
+            reg.set_error(f"job_{i}", "boom")
+        else:
+            reg.set_done(f"job_{i}", pages=1, chunks=1)
+    reg.create("job_4", "doc_4")
+    on_disk = [d["job_id"] for d in json.loads(path.read_text())]
+    assert on_disk == ["job_2", "job_3", "job_4"]
+    assert reg.get("job_0") is None and reg.get("job_4") is not None
+    # files written before progress became a counter still load
+    old = json.loads(path.read_text())
+    old[0]["done_chunk_ids"] = ["p1_c0"]
+    path.write_text(json.dumps(old))
+    assert JobRegistry(path).get("job_2").status == JobStatus.ERROR
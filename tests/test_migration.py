@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from core.retrieval import migration
+from core.retrieval.sharding import ShardedVectorStore
+from core.retrieval.vectorstore import ChromaVectorStore
+
+
+def test_reembed_switches_generation_and_rolls_back(
+    tmp_path, monkeypatch, fake_embedder
+):
+    monkeypatch.setattr(migration, "_embedder", fake_embedder)
+    store = ChromaVectorStore(str(tmp_path), fake_embedder("m1"))
+    chunks = [{"id": f"c{i}", "page": 1, "text": f"chunk {i}"} for i in range(20)]
+    store.upsert_chunks("doc", None, None, None, chunks)
+    assert store.embed_model == "m1"
+
+    report = migration.migrate(store, "m2", 0.5, ["chunk 3"])
+    assert report["switched"] and report["checks"]["eval_overlap_at_k"] == 1.0
+    # the configured model is still m1, but the index now embeds with m2
+    assert store.embed_model == "m2" and store.collection_name == "guidelines__g2"
+    assert store.query("chunk 3", top_k=1)[0]["distance"] < 1e-6
+
+    migration.rollback(store)
+    assert (store.embed_model, store.collection_name) == ("m1", "guidelines")
+    migration.cleanup(store)
+    names = sorted(c.name for c in store.client.list_collections())
+    assert names == ["guidelines", "guidelines__docs"]  # + document profiles
+
+
+def test_eval_set_does_not_depend_on_cwd_and_a_missing_one_is_reported(
+    tmp_path, monkeypatch, fake_embedder
+):
+    monkeypatch.chdir(tmp_path)
+    assert migration.eval_questions()  # the repo's eval/dataset.jsonl
+
+    monkeypatch.setattr(migration, "_embedder", fake_embedder)
+    monkeypatch.setattr(migration, "EVAL_DATASET", tmp_path / "missing.jsonl")
+    store = ChromaVectorStore(str(tmp_path / "chroma"), fake_embedder("m1"))
+    chunks = [{"id": f"c{i}", "page": 1, "text": f"chunk {i}"} for i in range(5)]
+    store.upsert_chunks("doc", None, None, None, chunks)
+
+    report = migration.migrate(store, "m2", 0.5, None)
+    assert report["checks"]["eval_questions"] == 0
+    assert "missing.jsonl" in report["warnings"][0]
+
+
+def test_a_failed_catch_up_on_one_shard_switches_no_shard(
+    tmp_path, monkeypatch, fake_embedder
+):
+    monkeypatch.setattr(migration, "_embedder", fake_embedder)
+    store = ShardedVectorStore(str(tmp_path), fake_embedder("m1"), "hash", num_shards=2)
+    for d in ("doc_a", "doc_b", "doc_c", "doc_d"):
+        chunks = [
+            {"id": f"c{i}", "page": 1, "text": f"{d} chunk {i}"} for i in range(3)
+        ]
+        store.upsert_chunks(d, None, None, None, chunks)
+    shards = store.shards()
+    assert list(shards) == ["default", "h00", "h01"]
+
+    sync = migration.sync_collection
+    phase = []
+    switch_syncs = []
+
+    def flaky(src, dst, *args, **kwargs):
+        if phase[-1] == "switching":
+            switch_syncs.append(src.name)
+            if len(switch_syncs) == 3:  # the second shard's chunks
+                raise RuntimeError("catch-up failed")
+        return sync(src, dst, *args, **kwargs)
+
+    monkeypatch.setattr(migration, "sync_collection", flaky)
+    with pytest.raises(RuntimeError, match="catch-up failed"):
+        migration.migrate(store, "m2", 0.0, [], on_phase=phase.append)
+
+    assert store.embed_model == "m1"
+    for s in shards.values():
+        assert s.state.embed_model() == "m1"
+        assert "__g2" not in s.collection_name
+    assert not [
+        c.name for c in shards["default"].client.list_collections() if "__g2" in c.name
+    ]
+
+
+def test_labelled_eval_questions_must_find_their_document(
+    tmp_path, monkeypatch, fake_embedder
+):
+    rows = [
+        {"type": "ask", "question": "doc_b chunk 0", "doc_id": "doc_b"},
+        {"type": "ask", "question": "doc_a chunk 1", "doc_ids": ["doc_e"]},
+        {"type": "ask", "question": "doc_c chunk 1", "doc_ids": ["doc_gone"]},
+        {"type": "ask", "question": "doc_d chunk 0"},
+    ]
+    dataset = tmp_path / "dataset.jsonl"
+    dataset.write_text("\n".join(json.dumps(r) for r in rows))
+    monkeypatch.setattr(migration, "EVAL_DATASET", dataset)
+    monkeypatch.setattr(migration, "_embedder", fake_embedder)
+    store = ChromaVectorStore(str(tmp_path / "chroma"), fake_embedder("m1"))
+    for d in "abcdefgh":
+        chunks = [
+            {"id": f"c{i}", "page": 1, "text": f"doc_{d} chunk {i}"} for i in (0, 1)
+        ]
+        store.upsert_chunks(f"doc_{d}", None, None, None, chunks)
+
+    report = migration.migrate(store, "m2", 0.5, None)
+    # doc_e is indexed but not among the top 5; doc_gone is not indexed at all
+    assert report["checks"]["eval_documents"] == {
+        "checked": 2,
+        "missed": ["doc_a chunk 1"],
+    }
+    assert report["checks"]["eval_overlap_at_k"] == 1.0
+    assert not report["switched"] and store.embed_model == "m1"
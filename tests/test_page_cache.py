@@ -0,0 +1,21 @@
+from core.ingestion import page_cache as pc
+from core.ingestion.page_cache import PageCache
+
+
+def test_page_cache_round_trip_and_staleness(tmp_path, monkeypatch):
+    cache = PageCache(tmp_path)
+    pages = [(1, "first page"), (2, ""), (3, "dosing: 5 mg/kg — daily")]
+    assert cache.load("doc", "h1") is None
+
+    cache.save("doc", "h1", pages)
+    assert cache.load("doc", "h1") == pages
+    assert cache.page("doc", 3) == "dosing: 5 mg/kg — daily"
+    assert cache.load("doc", "h2") is None  # new document version
+
+    monkeypatch.setattr(pc, "EXTRACTOR_REVISION", pc.EXTRACTOR_REVISION + 1)
+    pc.extractor_version.cache_clear()
+    try:
+        assert cache.load("doc", "h1") is None  # extractor changed
+    finally:
+        monkeypatch.undo()
+        pc.extractor_version.cache_clear()
@@ -0,0 +1,142 @@
+from dataclasses import replace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apps.api.job_registry import JobRegistry, JobStatus
+from apps.api.routers import ask, ingest
+from core.ingestion.chunker import Chunk
+from core.ingestion.page_cache import PageCache
+from core.ingestion.pdf_loader import extract_page_pairs
+from core.ingestion.priority import PageCoverage, prioritize, priority_pages
+from core.registry.registry import DocumentRegistry
+from core.retrieval.vectorstore import ChromaVectorStore
+from core.schemas.models import DocInfo, Meta
+from eval.fake_openai import HashEmbedder
+from eval.pdfgen import guideline_pages, make_pdf
+
+TOC = "\n".join(
+    ["Contents"] + [f"{i}. Section {i} ........ {i * 3}" for i in range(1, 7)]
+)
+
+
+def test_first_pages_and_toc_go_first_and_coverage_tracks_pages():
+    pairs = [(p, f"Page {p} text") for p in range(1, 9)]
+    pairs[5] = (6, TOC)  # a table of contents after the opening pages
+    first = priority_pages(pairs, 2)
+    assert first == {1, 2, 6}
+
+    chunks = [Chunk(f"p{p}_c{i}", p, "x") for p in range(1, 9) for i in range(2)]
+    ordered = prioritize(chunks, first)
+    assert [c.page for c in ordered[:6]] == [1, 1, 2, 2, 6, 6]
+    coverage = PageCoverage(ordered, first)
+    coverage.done([c.chunk_id for c in ordered[:5]])
+    assert coverage.pages_indexed == 2 and not coverage.priority_indexed
+    coverage.done([ordered[5].chunk_id])
+    assert coverage.priority_indexed and not coverage.complete
+
+
+def _offline_ingest(tmp_path, monkeypatch):
+    """Ingest router wired to temp registries and a hash-embedding store."""
+    registry = DocumentRegistry(tmp_path / "registry.json")
+    jobs = JobRegistry()
+    store = ChromaVectorStore(str(tmp_path / "chroma"), embedder=HashEmbedder())
+    monkeypatch.setattr(ingest, "settings", replace(ingest.settings, raw_dir=tmp_path))
+    monkeypatch.setattr(ingest, "registry", registry)
+    monkeypatch.setattr(ask, "registry", registry)
+    monkeypatch.setattr(ingest, "job_registry", jobs)
+    monkeypatch.setattr(ingest, "page_cache", PageCache(tmp_path / "pages"))
+    monkeypatch.setattr(
+        ingest, "load_page_pairs", lambda doc_id, data, h=None: extract_page_pairs(data)
+    )
+    monkeypatch.setattr(ingest, "OpenAIEmbedder", lambda **kw: None)
+    monkeypatch.setattr(ingest, "open_store", lambda embedder: store)
+    return registry, jobs, store
+
+
+def test_long_pdf_is_searchable_before_its_ingest_finishes(tmp_path, monkeypatch):
+    registry, jobs, store = _offline_ingest(tmp_path, monkeypatch)
+
+    seen = []  # document state each time chunks are written
+    upsert = store.upsert_chunks
+
+    def spy(doc_id, title, source, category, chunks, **kw):
+        seen.append(
+            (registry.get(doc_id).status, {c["page"] for c in chunks}, store.count())
+        )
+        return upsert(doc_id, title, source, category, chunks, **kw)
+
+    monkeypatch.setattr(store, "upsert_chunks", spy)
+
+    n_pages = 3 * ingest.settings.ingest_priority_pages
+    data = make_pdf(guideline_pages(n_pages, seed=1), title="Long guideline")
+    (tmp_path / "doc_long.pdf").write_bytes(data)
+    registry.add(DocInfo(doc_id="doc_long", status="indexing"), file_hash="h")
+    jobs.create("job_1", "doc_long")
+    ingest._run_ingest("job_1", "doc_long", None, None, None, None)
+
+    job = jobs.get("job_1")
+    assert job.status == JobStatus.DONE, job.error
+    # the preview holds only the priority pages, written before the rest exists
+    status, pages, indexed = seen[0]
+    assert status == "indexing" and indexed == 0
+    assert pages <= set(range(1, ingest.settings.ingest_priority_pages + 1))
+    # everything after it lands while the document is already searchable
+    assert {s for s, _, _ in seen[1:]} == {"partially_indexed"}
+    assert all(n > 0 for _, _, n in seen[1:])
+    assert registry.get("doc_long").status == "ready"
+    assert registry.indexing() == [] and job.indexed_pages == n_pages
+    assert store.existing_chunk_ids("doc_long") == {
+        c.chunk_id for c in ingest._prepare(extract_page_pairs(data))[1]
+    }
+
+
+def test_failed_ingest_stops_reporting_partial_coverage(tmp_path, monkeypatch):
+    registry, jobs, _ = _offline_ingest(tmp_path, monkeypatch)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("embedding API down")
+
+    monkeypatch.setattr(ingest, "_apply_plan", fail)
+    data = make_pdf(guideline_pages(4, seed=2), title="Short guideline")
+    (tmp_path / "doc_bad.pdf").write_bytes(data)
+    registry.add(DocInfo(doc_id="doc_bad", status="indexing"), file_hash="h")
+    jobs.create("job_1", "doc_bad")
+    assert registry.coverage(["doc_bad"])["coverage"] == "partial"
+
+    ingest._run_ingest("job_1", "doc_bad", None, None, None, None)
+
+    assert jobs.get("job_1").status == JobStatus.ERROR
+    app = FastAPI()
+    app.include_router(ingest.router)
+    items = TestClient(app).get("/documents").json()["items"]
+    assert [(d["doc_id"], d["status"]) for d in items] == [("doc_bad", "error")]
+    meta = Meta(
+        request_id="r",
+        latency_ms=1,
+        model="m",
+        prompt_version="p",
+        **registry.coverage([]),
+    )
+    assert meta.coverage == "full" and meta.indexing_doc_ids == []
+
+
+def test_failed_new_version_marks_the_document_and_keeps_its_hash(
+    tmp_path, monkeypatch
+):
+    registry, jobs, _ = _offline_ingest(tmp_path, monkeypatch)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("embedding API down")
+
+    monkeypatch.setattr(ingest, "_apply_plan", fail)
+    data = make_pdf(guideline_pages(4, seed=3), title="Revised guideline")
+    (tmp_path / "doc_v.pdf").write_bytes(data)
+    registry.add(DocInfo(doc_id="doc_v", status="ready"), file_hash="h1")
+    jobs.create("job_2", "doc_v", kind="new_version", file_hash="h2")
+
+    ingest._run_new_version("job_2", "doc_v", None, None, None, None, "h2")
+
+    assert jobs.get("job_2").status == JobStatus.ERROR
+    assert registry.get("doc_v").status == "error"
+    assert registry.file_hash("doc_v") == "h1" and registry.get_by_hash("h2") is None
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.resilience.deadline import Deadline, DeadlineExceeded
+from core.resilience.limiter import AdaptiveLimiter, Overloaded
+
+
+def test_sheds_when_the_queue_wait_would_exceed_the_budget():
+    lim = AdaptiveLimiter("t", initial=1, max_queue_wait_s=0.2)
+    lim._long_s = lim._short_s = 1.0  # requests take ~1 s
+
+    held = lim.acquire()
+    with pytest.raises(Overloaded) as e:
+        lim.acquire()
+    assert e.value.retry_after_s == 1
+    held.release()
+    held.release()  # idempotent
+    assert lim.snapshot()["inflight"] == 0
+    assert lim.snapshot()["rejected"] == 1
+
+
+def test_queued_request_gets_the_freed_slot():
+    lim = AdaptiveLimiter("t", initial=1, max_queue_wait_s=5.0)
+    lim._long_s = lim._short_s = 0.1
+    held = lim.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(lim.acquire(Deadline.after(5))))
+    waiter.start()
+    threading.Timer(0.05, held.release).start()
+    waiter.join(5)
+    assert got and lim.snapshot()["inflight"] == 1
+
+
+def test_limit_backs_off_on_timeouts_and_grows_when_used():
+    lim = AdaptiveLimiter("t", initial=10, min_limit=2, max_limit=12)
+    lim._long_s = lim._short_s = 1.0
+    with pytest.raises(DeadlineExceeded):
+        with lim.slot():
+            raise DeadlineExceeded("slow upstream")
+    assert lim.limit == pytest.approx(9.0)
+
+    for _ in range(8):
+        lim.acquire()
+    for _ in range(8):
+        lim._release(1.0, timed_out=False)  # steady latency while busy
+    assert lim.limit > 9.0
+    grown = lim.limit
+    lim._last_cut = float("-inf")
+    lim.acquire()
+    lim._release(20.0, timed_out=False)  # latency spike
+    assert lim.limit == pytest.approx(grown * 0.9)
+    lim.acquire()
+    lim._release(20.0, timed_out=False)  # same burst: no second cut
+    assert lim.limit == pytest.approx(grown * 0.9)
+
+    disabled = AdaptiveLimiter("t", enabled=False, initial=1)
+    assert [disabled.acquire() for _ in range(3)]
+
+
+def test_async_waiters_queue_on_the_event_loop():
+    lim = AdaptiveLimiter("t", initial=1, max_queue_wait_s=5.0)
+    lim._long_s = lim._short_s = 0.01
+
+    async def one() -> None:
+        permit = await lim.acquire_async(Deadline.after(5))
+        await asyncio.sleep(0.001)
+        permit.release()
+
+    async def main() -> None:
+        held = await lim.acquire_async()
+        threads = threading.active_count()
+        waiters = [asyncio.create_task(one()) for _ in range(50)]
+        await asyncio.sleep(0.05)
+        # 50 queued requests, not one extra thread
+        assert lim.snapshot()["queued"] == 50
+        assert threading.active_count() == threads
+        threading.Timer(0.01, held.release).start()  # freed by a worker thread
+        await asyncio.wait_for(asyncio.gather(*waiters), 5)
+
+        lim.limit = 1.0  # (grew while the queue drained)
+        held = await lim.acquire_async()
+        with pytest.raises(Overloaded):
+            await lim.acquire_async(Deadline.after(0.05))
+        held.release()
+
+    asyncio.run(main())
+    snap = lim.snapshot()
+    assert (snap["inflight"], snap["queued"], snap["admitted"]) == (0, 0, 52)
+    assert snap["rejected"] == 1
@@ -0,0 +1,27 @@
+from apps.api import warmup
+from apps.api.warmup import Readiness
+
+
+def test_ready_without_eager_warmup():
+    r = Readiness()
+    assert not r.ready
+    r.run(eager=False)
+    assert r.ready and r.snapshot()["status"] == "ready"
+
+
+def test_upstream_failure_does_not_block_readiness(monkeypatch):
+    def boom():
+        raise ConnectionError("no route")
+
+    monkeypatch.setattr(warmup, "warm_imports", lambda: {})
+    monkeypatch.setattr(warmup, "warm_index", lambda: {"entries": 0})
+    monkeypatch.setattr(warmup, "warm_upstream", boom)
+    r = Readiness()
+    r.run()
+    assert r.ready
+    assert r.snapshot()["steps"]["upstream"]["error"] == "no route"
+
+    monkeypatch.setattr(warmup, "warm_index", boom)
+    r = Readiness()
+    r.run()
+    assert r.status == "failed"
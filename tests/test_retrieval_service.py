@@ -0,0 +1,127 @@
+import socketserver
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from core.retrieval import maintenance
+from core.retrieval.service import RemoteVectorStore, recv_msg, send_msg, serve
+from core.retrieval.vectorstore import ChromaVectorStore
+
+
+def _wait_ready(remote: RemoteVectorStore) -> None:
+    for _ in range(100):
+        try:
+            if remote.ping():
+                return
+        except OSError:
+            threading.Event().wait(0.05)
+
+
+def test_remote_store_round_trip(tmp_path, fake_embedder):
+    sock = str(tmp_path / "r.sock")
+    local = ChromaVectorStore(str(tmp_path / "chroma"), None)
+    threading.Thread(target=serve, args=(sock, local), daemon=True).start()
+
+    remote = RemoteVectorStore(sock, fake_embedder(), str(tmp_path / "chroma"))
+    _wait_ready(remote)
+
+    chunks = [{"id": f"c{i}", "page": 1, "text": f"chunk {i}"} for i in range(4)]
+    assert remote.upsert_chunks("doc", "T", None, None, chunks) == 4
+    assert remote.existing_chunk_ids("doc") == {"c0", "c1", "c2", "c3"}
+
+    hits = remote.query("chunk 2", top_k=2)
+    assert hits[0]["meta"]["chunk_id"] == "c2" and hits[0]["distance"] < 1e-6
+    assert remote.delete_doc("doc") == 4 and remote.count() == 0
+
+
+def test_maintenance_calls_get_their_own_timeout(tmp_path, monkeypatch):
+    def slow_compaction(store):
+        time.sleep(0.5)
+        return {"compacted": True}
+
+    monkeypatch.setattr(maintenance, "compact_store", slow_compaction)
+    sock = str(tmp_path / "r.sock")
+    local = ChromaVectorStore(str(tmp_path / "chroma"), None)
+    threading.Thread(target=serve, args=(sock, local), daemon=True).start()
+
+    remote = RemoteVectorStore(
+        sock, None, str(tmp_path / "chroma"), timeout_s=0.2, maintenance_timeout_s=5
+    )
+    _wait_ready(remote)
+    assert remote.compact() == {"compacted": True}
+    assert remote.count() == 0  # the pooled connection is back on the short timeout
+
+
+def test_queries_neither_wait_for_compaction_nor_write(
+    tmp_path, monkeypatch, fake_embedder
+):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_compaction(store):
+        started.set()
+        release.wait(5)
+        return {"compacted": True}
+
+    monkeypatch.setattr(maintenance, "compact_store", slow_compaction)
+    sock = str(tmp_path / "r.sock")
+    local = ChromaVectorStore(str(tmp_path / "chroma"), None)
+    adopted = []
+    adopt = local.adopt_embed_model
+    local.adopt_embed_model = lambda model: adopted.append(model) or adopt(model)
+    threading.Thread(target=serve, args=(sock, local), daemon=True).start()
+
+    remote = RemoteVectorStore(sock, fake_embedder(), str(tmp_path / "chroma"))
+    _wait_ready(remote)
+    chunks = [{"id": "c0", "page": 1, "text": "chunk 0"}]
+    remote.upsert_chunks("doc", "T", None, None, chunks)
+    compaction = threading.Thread(target=remote.compact)
+    compaction.start()
+    started.wait(5)
+
+    t0 = time.monotonic()
+    for _ in range(3):
+        assert remote.query("chunk 0", top_k=1)[0]["meta"]["chunk_id"] == "c0"
+    assert time.monotonic() - t0 < 2
+    release.set()
+    compaction.join()
+    assert adopted == ["fake-embed"]
+
+
+def test_only_reads_are_resent_after_a_lost_answer(tmp_path):
+    """A service that drops the connection instead of answering the first
+    `count` and every `delete_doc`, and closes idle connections after `ping`."""
+    seen: Counter = Counter()
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self) -> None:
+            while True:
+                try:
+                    req = recv_msg(self.request)
+                except ConnectionError:
+                    return
+                method = req["method"]
+                seen[method] += 1
+                if method == "delete_doc" or (method == "count" and seen[method] == 1):
+                    return
+                result = "pong" if method == "ping" else 0
+                send_msg(self.request, {"ok": True, "result": result})
+                if method == "ping" and seen[method] == 1:
+                    return
+
+    sock = str(tmp_path / "r.sock")
+    server = socketserver.ThreadingUnixStreamServer(sock, Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    remote = RemoteVectorStore(sock, None, str(tmp_path / "chroma"), pool_size=1)
+
+    assert remote.ping()  # the service then closes this idle connection
+    assert remote.ping()  # stale connection replaced before sending
+    assert remote.count() == 0  # answer lost on a pooled connection: resent
+    assert seen["count"] == 2
+    with pytest.raises(ConnectionError):
+        remote.delete_doc("doc")
+    assert seen["delete_doc"] == 1  # never resent: it may have run
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from apps.api.responses import FastJSONResponse, GZipExceptStreams
+from core.schemas.utils import citation_payload
+
+
+def _chunk(doc_id, page, distance):
+    meta = {"doc_id": doc_id, "page": page, "chunk_id": f"p{page}_c0"}
+    meta.update(title=f"Title {doc_id}", source="src", category=None)
+    return {"text": "x" * 1000, "meta": meta, "distance": distance}
+
+
+def test_compact_citations_dedupe_doc_metadata():
+    retrieved = [_chunk("a", 1, 0.5), _chunk("b", 2, 0.25), _chunk("a", 3, 0.75)]
+    full = citation_payload(retrieved)
+    assert set(full) == {"citations"} and len(full["citations"][0]["snippet"]) == 350
+
+    compact = citation_payload(retrieved, "compact")
+    assert compact["documents"] == {
+        "a": {"title": "Title a", "source": "src"},
+        "b": {"title": "Title b", "source": "src"},
+    }
+    assert [c["page"] for c in compact["citations"]] == [1, 2, 3]
+    assert compact["citations"][1]["score"] == 0.8
+    assert len(compact["citations"][0]["snippet"]) < 350
+
+
+def test_gzip_negotiated_but_streams_left_alone():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(GZipExceptStreams, minimum_size=100)
+
+    @app.get("/big")
+    def big():
+        return {"items": ["guideline"] * 200}
+
+    @app.post("/ask/stream")
+    def stream():
+        return StreamingResponse(iter(["tok "] * 200), media_type="text/plain")
+
+    client = TestClient(app)
+    r = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip" and len(r.json()["items"]) == 200
+    plain = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    r = client.post("/ask/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
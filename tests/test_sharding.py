@@ -0,0 +1,25 @@
+from core.retrieval.sharding import ShardedVectorStore
+
+
+def test_docs_routed_to_shards_and_fanout_merges(tmp_path, fake_embedder):
+    store = ShardedVectorStore(str(tmp_path), fake_embedder(), "hash", num_shards=4)
+    for d in ("doc_a", "doc_b", "doc_c", "doc_d"):
+        chunks = [
+            {"id": f"c{i}", "page": 1, "text": f"{d} chunk {i}"} for i in range(5)
+        ]
+        store.upsert_chunks(d, None, None, None, chunks)
+
+    assignments = store.state.shard_map()
+    assert set(assignments) == {"doc_a", "doc_b", "doc_c", "doc_d"}
+    assert store.count() == 20
+
+    hits = store.query("doc_c chunk 2", top_k=3, doc_id="doc_c")
+    assert {h["meta"]["doc_id"] for h in hits} == {"doc_c"}
+
+    # unfiltered: exact text match is the global nearest neighbour
+    top = store.query("doc_d chunk 4", top_k=5)
+    assert top[0]["meta"]["doc_id"] == "doc_d" and top[0]["distance"] < 1e-6
+    assert [h["distance"] for h in top] == sorted(h["distance"] for h in top)
+
+    assert store.delete_doc("doc_a") == 5
+    assert "doc_a" not in store.state.shard_map() and store.count() == 15
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Cold-import budget (seconds) per entry point; override for slow CI machines.
+BUDGET_S = float(os.getenv("STARTUP_BUDGET_S", "1.0"))
+HEAVY = ("chromadb", "openai", "pypdf")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+print(json.dumps({{
+    "seconds": time.perf_counter() - t0,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "apps.api.config",
+        "apps.api.main",
+        "apps.api.cli",
+        "apps.api.bulk",
+        "core.rag.pipeline",
+        "core.retrieval.vectorstore",
+    ],
+)
+def test_import_is_fast_and_lazy(module, tmp_path):
+    env = {**os.environ, "DATA_DIR": str(tmp_path / "data")}
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert result["heavy"] == [], f"{module} imports {result['heavy']} eagerly"
+    assert result["seconds"] < BUDGET_S, f"{module}: {result['seconds']:.2f}s"
+    # importing config must not touch the filesystem
+    assert not (tmp_path / "data").exists()
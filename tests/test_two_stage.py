@@ -0,0 +1,49 @@
+from core.retrieval.doc_index import doc_profile, two_stage_query
+from core.retrieval.maintenance import compact
+from core.retrieval.vectorstore import ChromaVectorStore
+from eval.fake_openai import HashEmbedder
+
+DOCS = {
+    "asthma": "Inhaled corticosteroids and a spacer for asthma in children.",
+    "malaria": "Artemisinin combination therapy for uncomplicated malaria.",
+    "sepsis": "Take lactate and blood cultures, give antibiotics within an hour.",
+}
+
+
+def test_profile_keeps_title_opening_and_headings():
+    pages = [
+        (1, "ASTHMA IN CHILDREN\nThis guideline covers inhaler use at home."),
+        (2, "2.1 Acute attacks\nGive salbutamol via a spacer, ten puffs.\nsmall"),
+        (3, "Section 4 Follow up\n2.1 Acute attacks"),
+    ]
+    profile = doc_profile("Asthma", "paediatric", pages).splitlines()
+    assert profile[:2] == ["Asthma", "paediatric"]
+    assert profile[2].startswith("ASTHMA IN CHILDREN This guideline")
+    assert profile[3:] == [
+        "ASTHMA IN CHILDREN",
+        "2.1 Acute attacks",
+        "Section 4 Follow up",
+    ]
+
+
+def test_two_stage_searches_only_candidate_documents(tmp_path):
+    embedder = HashEmbedder(dim=64)
+    store = ChromaVectorStore(str(tmp_path), embedder)
+    for doc_id, text in DOCS.items():
+        chunks = [{"id": f"c{i}", "page": 1, "text": f"{text} ({i})"} for i in range(3)]
+        store.upsert_chunks(doc_id, doc_id, None, None, chunks)
+        assert store.upsert_doc_profile(doc_id, doc_id, None, f"{doc_id}\n{text}")
+    assert not store.upsert_doc_profile(
+        "sepsis", "sepsis", None, f"sepsis\n{DOCS['sepsis']}"
+    )
+
+    q = embedder.embed(["artemisinin therapy for malaria"])
+    hits = two_stage_query(store, q, top_k=5, n_docs=1)[0]
+    assert {h["meta"]["doc_id"] for h in hits} == {"malaria"}
+    # fewer profiled documents than candidates: plain flat search
+    assert two_stage_query(store, q, 5, n_docs=10) == store.query_embeddings(q, 5)
+
+    store.delete_doc("sepsis")
+    compact(store)  # the next generation keeps the remaining profiles
+    assert store.doc_count() == 2
+    assert two_stage_query(store, q, 5, n_docs=1)[0][0]["meta"]["doc_id"] == "malaria"
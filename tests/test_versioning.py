@@ -0,0 +1,22 @@
+from core.ingestion.chunker import Chunk
+from core.ingestion.versioning import content_hash, plan_reindex
+
+
+def test_plan_reindex_reuses_moved_chunks_and_drops_stale():
+    indexed = {
+        "p1_c0": content_hash("intro"),
+        "p2_c0": content_hash("dosing"),
+        "p3_c0": content_hash("old warning"),
+    }
+    chunks = [
+        Chunk(chunk_id="p1_c0", page=1, text="intro"),
+        Chunk(chunk_id="p2_c0", page=2, text="new warning"),
+        Chunk(chunk_id="p3_c0", page=3, text="dosing"),
+    ]
+    plan = plan_reindex(indexed, chunks)
+
+    assert [c.chunk_id for c in plan.unchanged] == ["p1_c0"]
+    assert plan.reuse == {"p3_c0": "p2_c0"}
+    assert [c.text for c in plan.embed] == ["new warning"]
+    assert plan.stale == []
+    assert plan_reindex(indexed, chunks[:1]).stale == ["p2_c0", "p3_c0"]